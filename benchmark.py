@@ -0,0 +1,462 @@
+import argparse
+import json
+import math
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+from documentation_parser import (
+    HTML_PARSER_BACKENDS,
+    available_parser_backends,
+    default_parser_backend,
+    extract_partitioning_key,
+    extract_page,
+    generate_yml,
+    parse_columns,
+    parse_has_project_id_scope,
+    parse_html,
+    parse_page,
+    parse_required_role,
+    parse_table_name,
+    partitioning_key_from_scan,
+    scan_document,
+    update_column_list,
+)
+from sql_generator import generate_sql
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Checked-in documentation pages the benchmarks run on
+FIXTURE_PAGES = ("html_content.html", "html_content_2.html")
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(ROOT_DIR, name), "r") as f:
+        return f.read()
+
+
+def time_call(function: Callable, repeat: int) -> List[float]:
+    """
+    Run a function several times and return the duration of each run in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def benchmark_parser_backends(repeat: int = 5) -> dict:
+    """
+    Time the tree building and the extraction of each fixture page per backend.
+
+    Returns:
+        Dictionary {fixture: {backend: {"parse": seconds, "extract": seconds}}}
+        with the fastest of `repeat` runs
+    """
+    results = {}
+    for fixture in FIXTURE_PAGES:
+        html_content = read_fixture(fixture)
+        results[fixture] = {}
+        for backend in available_parser_backends():
+            soup = parse_html(html_content, backend)
+            results[fixture][backend] = {
+                "parse": min(
+                    time_call(lambda: parse_html(html_content, backend), repeat)
+                ),
+                "extract": min(time_call(lambda: extract_page(soup), repeat)),
+            }
+    return results
+
+
+def print_parser_backends(results: dict):
+    print(f"{'page':<22}{'backend':<14}{'parse':>10}{'extract':>10}")
+    for fixture, backends in results.items():
+        for backend, timings in backends.items():
+            print(
+                f"{fixture:<22}{backend:<14}"
+                f"{timings['parse'] * 1000:>8.1f}ms{timings['extract'] * 1000:>8.1f}ms"
+            )
+
+
+def measure_peak_memory(function: Callable) -> int:
+    """
+    Return the peak memory in bytes allocated while running a function.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_scoped_parsing(repeat: int = 5) -> dict:
+    """
+    Compare parsing the full document with parsing only the article body.
+
+    Returns:
+        Dictionary {fixture: {backend: {"full"|"scoped": {"nodes", "parse",
+        "peak_memory"}}}} with the fastest parse time of `repeat` runs
+    """
+    results = {}
+    for fixture in FIXTURE_PAGES:
+        html_content = read_fixture(fixture)
+        results[fixture] = {}
+        for backend in available_parser_backends():
+            results[fixture][backend] = {}
+            for mode, scoped in (("full", False), ("scoped", True)):
+
+                def parse():
+                    return parse_html(html_content, backend, scoped=scoped)
+
+                results[fixture][backend][mode] = {
+                    "nodes": len(parse().find_all(True)),
+                    "parse": min(time_call(parse, repeat)),
+                    "peak_memory": measure_peak_memory(parse),
+                }
+    return results
+
+
+def print_scoped_parsing(results: dict):
+    print(
+        f"{'page':<22}{'backend':<14}{'mode':<8}"
+        f"{'nodes':>8}{'parse':>10}{'peak memory':>14}"
+    )
+    for fixture, backends in results.items():
+        for backend, modes in backends.items():
+            for mode, measures in modes.items():
+                print(
+                    f"{fixture:<22}{backend:<14}{mode:<8}{measures['nodes']:>8}"
+                    f"{measures['parse'] * 1000:>8.1f}ms"
+                    f"{measures['peak_memory'] / 1024 / 1024:>11.1f}MiB"
+                )
+
+
+def serialising_partitioning_key(scan: dict):
+    """
+    Partitioning and clustering extraction as it was done before, with regexes run
+    on every text block and the whole document serialised back to HTML.
+    """
+    partitioning_key = None
+    clustering_columns = []
+    for element in scan["text_blocks"]:
+        if element.name == "span":
+            continue
+        spans = element.find_all("span") if element.name == "aside" else []
+        for elem in spans or [element]:
+            element_text = elem.get_text()
+            element_html = str(elem)
+            if "partitioned by" in element_text:
+                match = re.search(
+                    r"partitioned by the <code[^>]*>([^<]+)</code>", element_html
+                )
+                if match:
+                    partitioning_key = match.group(1)
+            if "clustered by" in element_text:
+                code_texts = [tag.get_text() for tag in elem.find_all("code")]
+                if not partitioning_key and len(code_texts) == 1:
+                    clustering_columns = code_texts
+                elif partitioning_key in code_texts:
+                    code_texts.remove(partitioning_key)
+                    clustering_columns = code_texts
+
+    if not clustering_columns:
+        for element in scan["text_blocks"]:
+            match = re.search(r"clustered by <code[^>]*>([^<]+)</code>", str(element))
+            if match:
+                clustering_columns = [match.group(1)]
+                break
+
+    html_str = str(scan["soup"])
+    if partitioning_key and not clustering_columns:
+        names = (partitioning_key, "project_id", "user_email")
+        if all(name in html_str for name in names):
+            clustering_columns = ["project_id", "user_email"]
+    return partitioning_key, clustering_columns
+
+
+def benchmark_partitioning(repeat: int = 5) -> dict:
+    """
+    Compare the partitioning extraction on serialised HTML with the extraction on
+    element text and <code> children, on the full and the scoped tree.
+
+    Returns:
+        Dictionary {fixture: {"full"|"scoped": {"serialising"|"element":
+        seconds}}} with the fastest of `repeat` runs
+    """
+    results = {}
+    for fixture in FIXTURE_PAGES:
+        html_content = read_fixture(fixture)
+        results[fixture] = {}
+        for mode, scoped in (("full", False), ("scoped", True)):
+            soup = parse_html(html_content, "html.parser", scoped=scoped)
+            # A fresh scan per run so the cached page text index is rebuilt too
+            results[fixture][mode] = {
+                "serialising": min(
+                    time_call(
+                        lambda: serialising_partitioning_key(scan_document(soup)),
+                        repeat,
+                    )
+                ),
+                "element": min(
+                    time_call(
+                        lambda: partitioning_key_from_scan(scan_document(soup)),
+                        repeat,
+                    )
+                ),
+            }
+    return results
+
+
+def print_partitioning(results: dict):
+    print(f"{'page':<22}{'mode':<8}{'serialising':>13}{'element':>10}{'speedup':>9}")
+    for fixture, modes in results.items():
+        for mode, timings in modes.items():
+            print(
+                f"{fixture:<22}{mode:<8}"
+                f"{timings['serialising'] * 1000:>11.1f}ms"
+                f"{timings['element'] * 1000:>8.1f}ms"
+                f"{timings['serialising'] / timings['element']:>8.1f}x"
+            )
+
+
+# Allowed slowdown of a stage median over the baseline before it is a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+
+# Slowdowns smaller than this are timer noise on the sub-millisecond stages
+MIN_REGRESSION_SECONDS = 0.0005
+
+
+def summarize(durations: List[float]) -> dict:
+    """
+    Return the min, median and 95th percentile (nearest rank) of durations.
+    """
+    ordered = sorted(durations)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)],
+    }
+
+
+def pipeline_soup(html_content: str, backend: str):
+    # Same tree as extract_page_from_html: the article body, else the document
+    return parse_page(html_content, backend)[0]
+
+
+def pipeline_stages(html_content: str, backend: str) -> dict:
+    """
+    Return the stages of the generation of a model from a page, in order, as
+    callables running one stage on the output of the previous ones.
+    """
+    soup = pipeline_soup(html_content, backend)
+    columns = parse_columns(soup)
+    model_columns = update_column_list(columns, [])
+    sql_columns = [
+        {
+            "name": column["name"],
+            "description": column["description"],
+            "data_type": column["type"],
+        }
+        for column in model_columns
+    ]
+    table_name = parse_table_name(soup)
+    has_project_id_scope = parse_has_project_id_scope(soup)
+    partitioning_key = extract_partitioning_key(soup)[0]
+
+    return {
+        "parse": lambda: pipeline_soup(html_content, backend),
+        "table_name": lambda: parse_table_name(soup),
+        "required_role": lambda: parse_required_role(soup),
+        "project_id_scope": lambda: parse_has_project_id_scope(soup),
+        "partitioning_key": lambda: extract_partitioning_key(soup),
+        "columns": lambda: parse_columns(soup),
+        "update_column_list": lambda: update_column_list(columns, []),
+        "generate_sql": lambda: generate_sql(
+            "https://cloud.google.com/bigquery/docs",
+            sql_columns,
+            table_name,
+            "",
+            "table",
+            has_project_id_scope,
+            partitioning_key,
+        ),
+        "generate_yml": lambda: generate_yml("information_schema_model", model_columns),
+    }
+
+
+def benchmark_stages(repeat: int = 20, backend: str = None) -> dict:
+    """
+    Time every stage of the generation separately on each fixture page.
+
+    Returns:
+        Dictionary {fixture: {stage: {"min", "median", "p95" (seconds),
+        "peak_memory" (bytes)}}}
+    """
+    backend = backend or default_parser_backend()
+    results = {}
+    for fixture in FIXTURE_PAGES:
+        results[fixture] = {}
+        for stage, function in pipeline_stages(read_fixture(fixture), backend).items():
+            results[fixture][stage] = {
+                **summarize(time_call(function, repeat)),
+                "peak_memory": measure_peak_memory(function),
+            }
+    return results
+
+
+def print_stages(results: dict):
+    print(
+        f"{'page':<22}{'stage':<20}{'min':>10}{'median':>10}{'p95':>10}"
+        f"{'peak memory':>14}"
+    )
+    for fixture, stages in results.items():
+        for stage, measures in stages.items():
+            print(
+                f"{fixture:<22}{stage:<20}"
+                f"{measures['min'] * 1000:>8.2f}ms"
+                f"{measures['median'] * 1000:>8.2f}ms"
+                f"{measures['p95'] * 1000:>8.2f}ms"
+                f"{measures['peak_memory'] / 1024:>11.0f}KiB"
+            )
+
+
+def compare_to_baseline(
+    results: dict, baseline: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD
+) -> List[dict]:
+    """
+    Compare stage medians with a baseline saved by --save.
+
+    A stage regresses when its median is more than `threshold` slower than the
+    baseline, and by more than MIN_REGRESSION_SECONDS.
+
+    Args:
+        results: The results of benchmark_stages
+        baseline: The results of a previous run
+        threshold: Allowed relative slowdown, 0.25 accepts up to 25% slower
+
+    Returns:
+        The regressions, as {"page", "stage", "baseline", "median", "ratio"}
+    """
+    regressions = []
+    for fixture, stages in results.items():
+        for stage, measures in stages.items():
+            reference = baseline.get(fixture, {}).get(stage)
+            if not reference or not reference["median"]:
+                continue
+            ratio = measures["median"] / reference["median"]
+            slowdown = measures["median"] - reference["median"]
+            if ratio > 1 + threshold and slowdown > MIN_REGRESSION_SECONDS:
+                regressions.append(
+                    {
+                        "page": fixture,
+                        "stage": stage,
+                        "baseline": reference["median"],
+                        "median": measures["median"],
+                        "ratio": ratio,
+                    }
+                )
+    return regressions
+
+
+def save_results(path: str, results: dict, backend: str, repeat: int):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "backend": backend,
+                "repeat": repeat,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def load_baseline(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)["results"]
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the documentation parser on the fixture pages."
+    )
+    parser.add_argument(
+        "suite",
+        choices=["parsers", "scoped", "partitioning", "stages"],
+        help="benchmark to run",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        help="runs per measure (default: 20 for stages, else 5)",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=HTML_PARSER_BACKENDS,
+        help="HTML parser backend of the stages suite (default: the parser's own)",
+    )
+    parser.add_argument(
+        "--save", metavar="PATH", help="save the stages results as JSON in PATH"
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="PATH",
+        help="compare the stages results with a JSON file saved by --save, and exit "
+        "with status 1 on a regression",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="allowed relative slowdown of a stage median over the baseline "
+        f"(default: {DEFAULT_REGRESSION_THRESHOLD})",
+    )
+    args = parser.parse_args(argv)
+    if args.repeat is None:
+        args.repeat = 20 if args.suite == "stages" else 5
+
+    if args.suite == "parsers":
+        print_parser_backends(benchmark_parser_backends(args.repeat))
+    elif args.suite == "scoped":
+        print_scoped_parsing(benchmark_scoped_parsing(args.repeat))
+    elif args.suite == "partitioning":
+        print_partitioning(benchmark_partitioning(args.repeat))
+    elif args.suite == "stages":
+        backend = args.parser or default_parser_backend()
+        results = benchmark_stages(args.repeat, backend)
+        print_stages(results)
+        if args.save:
+            save_results(args.save, results, backend, args.repeat)
+            print(f"Saved the results in {args.save}")
+        if args.baseline:
+            regressions = compare_to_baseline(
+                results, load_baseline(args.baseline), args.threshold
+            )
+            for regression in regressions:
+                print(
+                    f"Regression: {regression['page']} {regression['stage']} "
+                    f"{regression['baseline'] * 1000:.2f}ms -> "
+                    f"{regression['median'] * 1000:.2f}ms "
+                    f"({regression['ratio']:.2f}x)"
+                )
+            if regressions:
+                sys.exit(1)
+            print(
+                f"No stage is more than {args.threshold:.0%} slower than the baseline"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import List
+
+MANIFEST_FILE = ".parser_manifest.json"
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose code shapes the generated models, hashed into the generator version
+GENERATOR_SOURCES = ("documentation_parser.py", "sql_generator.py", "schema_model.py")
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def config_hash(target: dict) -> str:
+    """
+    Hash a pages_to_process entry, independently of the order of its keys.
+    """
+    return hash_text(json.dumps(target, sort_keys=True, default=str))
+
+
+def generator_version() -> str:
+    """
+    Hash the sources of the generator, so changing the code rebuilds every model.
+    """
+    digest = hashlib.sha256()
+    for source in GENERATOR_SOURCES:
+        with open(os.path.join(ROOT_DIR, source), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def target_inputs(page_hash: str, target: dict, version: str) -> dict:
+    """
+    Return the hashes of everything a target is generated from.
+    """
+    return {
+        "page_hash": page_hash,
+        "config_hash": config_hash(target),
+        "generator_version": version,
+    }
+
+
+class BuildManifest:
+    """
+    Record of the inputs and outputs of every generated target.
+
+    Each key stores the hash of its page, of its configuration entry, the
+    generator version and the hash of every file it produced. A target whose
+    inputs are unchanged and whose files are still as written is up to date.
+
+    Args:
+        output_dir: Directory of the generated models, holding the manifest
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILE)
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                # A corrupted manifest only costs a full rebuild
+                self.entries = {}
+
+    def is_up_to_date(self, key: str, inputs: dict) -> bool:
+        """
+        Tell whether a target was generated from these inputs and its files were
+        not modified or removed since.
+        """
+        entry = self.entries.get(key)
+        if entry is None or not entry["outputs"]:
+            return False
+        if any(entry.get(name) != value for name, value in inputs.items()):
+            return False
+        for path, output_hash in entry["outputs"].items():
+            try:
+                if hash_file(path) != output_hash:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def record(self, key: str, inputs: dict, outputs: List[str]):
+        self.entries[key] = {
+            **inputs,
+            "outputs": {path: hash_file(path) for path in outputs},
+        }
+
+    def retain(self, keys):
+        """
+        Forget the targets that are not in keys.
+        """
+        self.entries = {
+            key: entry for key, entry in self.entries.items() if key in keys
+        }
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(dict(sorted(self.entries.items())), f, indent=2)
+                f.write("\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -122,6 +122,7 @@ pages_to_process = {
             "query_info.optimization_details",
             "folder_numbers",
         ],
+        "incremental": {"strategy": "insert_overwrite"},
     },
     # jobs timeline
     "jobs_timeline": {
@@ -157,6 +158,7 @@ pages_to_process = {
         "enabled": False,
         "dir": "jobs_timeline",
         "url": "https://cloud.google.com/bigquery/docs/information-schema-jobs-timeline-by-organization",
+        "incremental": {"strategy": "insert_overwrite"},
     },
     # recommendations and insights
     "insights": {
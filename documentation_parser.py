@@ -1,22 +1,192 @@
+import argparse
+import importlib.util
 import os
 import re
-import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import List
 import yaml
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+from build_manifest import BuildManifest, generator_version, hash_text, target_inputs
 from config import pages_to_process
-from sql_generator import generate_sql
+from fetcher import DEFAULT_JOBS, fetch_page, fetch_pages, format_transfer_summary
+from http_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL, HttpCache
+from metrics import (
+    collect_run_metrics,
+    format_metrics_summary,
+    write_prometheus_textfile,
+)
+from output_writer import prune_generated_files, write_if_changed
+from page_corpus import dump_pages, record_pages, replay_pages
+from profiling import DEFAULT_TOP, ProfileReport, profile
+from schema_model import (
+    DEFAULT_SCHEMA_DIR,
+    SchemaCache,
+    TableSchema,
+    scope_has_project,
+)
+from sql_generator import generate_sql, partitioning_key_error, sql_type_for_scope
+from tracing import (
+    add_memory_report,
+    collect_spans,
+    format_memory_report,
+    is_accounting_memory,
+    is_tracing,
+    memory_accounting,
+    span,
+    start_trace,
+    stop_trace,
+    write_spans,
+)
+
+
+# BeautifulSoup tree builders, from the fastest to the slowest
+HTML_PARSER_BACKENDS = ("lxml", "html.parser", "html5lib")
+
+# Environment variable selecting the tree builder when --parser is not given
+PARSER_BACKEND_ENV = "DOC_PARSER_BACKEND"
+
+# Main article container holding the syntax, the "Required permissions" section,
+# the partitioning notes and the schema table. The class attribute is matched as
+# written in the page, before bs4 splits it into a list.
+ARTICLE_BODY_STRAINER = SoupStrainer(
+    "div", class_=re.compile(r"(^|\s)devsite-article-body(\s|$)")
+)
+
+# Directory of the generated dbt models
+OUTPUT_DIR = "output"
+
+# Pages are parsed in worker processes, tree building being CPU-bound
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Whitespace-only strings bs4 collapses when it builds the tree itself
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+
+def available_parser_backends() -> List[str]:
+    return [
+        backend
+        for backend in HTML_PARSER_BACKENDS
+        if backend == "html.parser" or importlib.util.find_spec(backend) is not None
+    ]
 
 
-def parse_table_name(soup):
+def default_parser_backend() -> str:
+    """
+    Return the backend set in DOC_PARSER_BACKEND, else lxml when it is installed.
+    """
+    backend = os.environ.get(PARSER_BACKEND_ENV)
+    if backend:
+        if backend not in HTML_PARSER_BACKENDS:
+            raise ValueError(
+                f"Invalid {PARSER_BACKEND_ENV}: {backend} "
+                f"(supported: {', '.join(HTML_PARSER_BACKENDS)})"
+            )
+        return backend
+    return available_parser_backends()[0]
+
+
+def parse_html(html_content: str, backend: str = None, scoped: bool = False):
+    """
+    Parse a documentation page with the given BeautifulSoup backend.
+
+    Args:
+        html_content: The HTML of the page
+        backend: One of HTML_PARSER_BACKENDS, defaults to default_parser_backend()
+        scoped: Only build the tree of the article body, skipping the navigation,
+            header, footer and scripts (html5lib always builds the full tree)
+
+    Returns:
+        The BeautifulSoup document
+    """
+    backend = backend or default_parser_backend()
+    with span("parse", "parse", backend=backend, scoped=scoped):
+        if scoped and backend != "html5lib":
+            return BeautifulSoup(
+                html_content, backend, parse_only=ARTICLE_BODY_STRAINER
+            )
+        return BeautifulSoup(html_content, backend)
+
+
+def element_text(element) -> str:
+    # Same as element.text, with whitespace-only strings collapsed to one "\n" or
+    # " " like bs4 does while building the tree. html5lib builds the tree without
+    # that step, so this keeps the extracted text identical across backends.
+    parts = []
+    for string in element.strings:
+        if not string.strip(ASCII_SPACES):
+            string = "\n" if "\n" in string else " "
+        parts.append(string)
+    return "".join(parts)
+
+
+# Resource scopes an INFORMATION_SCHEMA view can be queried at
+INFORMATION_SCHEMA_SCOPES = ("region", "project", "dataset", "folder", "organization")
+
+# Values of the data-text attribute of the heading introducing the required role
+REQUIRED_ROLE_HEADINGS = ("Required permissions", "Required role")
+
+
+def scan_document(soup) -> dict:
+    """
+    Walk the document tree once and collect every element read by the extractors.
+
+    Args:
+        soup: The parsed documentation page
+
+    Returns:
+        Dictionary with the 'soup', the first <code> of every <td> ('td_codes', in
+        document order), the first required role <h2> ('role_heading'), the first
+        <table> without class ('column_table'), the <p>, <aside> and <span>
+        elements in document order ('text_blocks') and every <code> ('codes')
+    """
+    td_ids = []
+    first_code_by_td = {}
+    role_heading = None
+    column_table = None
+    text_blocks = []
+    codes = []
+
+    for element in soup.descendants:
+        if not isinstance(element, Tag):
+            continue
+
+        name = element.name
+        if name == "td":
+            td_ids.append(id(element))
+            first_code_by_td[id(element)] = None
+        elif name == "code":
+            codes.append(element)
+            # The code is the first one of every enclosing <td> not matched yet
+            for parent in element.parents:
+                if parent.name == "td" and first_code_by_td[id(parent)] is None:
+                    first_code_by_td[id(parent)] = element
+        elif name == "h2":
+            data_text = element.get("data-text")
+            if role_heading is None and data_text in REQUIRED_ROLE_HEADINGS:
+                role_heading = element
+        elif name == "table":
+            if column_table is None and element.get("class") is None:
+                column_table = element
+        elif name in ("p", "aside", "span"):
+            text_blocks.append(element)
+
+    return {
+        "soup": soup,
+        "td_codes": [first_code_by_td[td_id] for td_id in td_ids],
+        "role_heading": role_heading,
+        "column_table": column_table,
+        "text_blocks": text_blocks,
+        "codes": codes,
+    }
+
+
+def table_name_from_scan(scan: dict):
     table_name = None
-    for td_tag in soup.find_all("td"):
+    for code in scan["td_codes"]:
         # Extract the text within the <code> tag
-        if td_tag and td_tag.code:
-            code_text = td_tag.code.text
-        else:
-            code_text = None
+        code_text = code.text if code else None
         if code_text is not None and "INFORMATION_SCHEMA" in code_text:
             # Use regular expression to extract the table name
             match = re.search(r"INFORMATION_SCHEMA\.(\w+)", code_text)
@@ -27,48 +197,128 @@ def parse_table_name(soup):
     return table_name
 
 
-# check if the page contains `[PROJECT_ID.]` presence
-def parse_has_project_id_scope(soup):
-    has_project_id = False
-    # Search in all text content of the page
-    page_text = soup.get_text()
-    if (
-        "[PROJECT_ID.]" in page_text
-        or "[`PROJECT_ID`.]" in page_text
-        or "PROJECT_ID" in page_text
+def scope_from_scan(scan: dict) -> List[str]:
+    """
+    Return the resource scopes of the view, read from its syntax <code> blocks.
+
+    The qualifiers before INFORMATION_SCHEMA give the region, project and dataset
+    scopes, and the view name or the "Resource scope" cell the folder and
+    organization ones. Without syntax block, the project scope is inferred from a
+    PROJECT_ID placeholder in any <code>.
+
+    Returns:
+        The scopes found, ordered as in INFORMATION_SCHEMA_SCOPES
+    """
+    scope = set()
+    syntax_codes = [
+        code
+        for code in scan["td_codes"]
+        if code is not None and "INFORMATION_SCHEMA" in code.get_text()
+    ]
+    for code in syntax_codes:
+        # "[`PROJECT_ID`.]`region-REGION`.INFORMATION_SCHEMA.VIEW[_BY_PROJECT]"
+        qualifier, _, view = code.get_text().partition("INFORMATION_SCHEMA")
+        if "region-" in qualifier:
+            scope.add("region")
+        if "PROJECT_ID" in qualifier:
+            scope.add("project")
+        if "DATASET" in qualifier:
+            scope.add("dataset")
+        if "_BY_FOLDER" in view:
+            scope.add("folder")
+        if "_BY_ORGANIZATION" in view:
+            scope.add("organization")
+
+        # Other cells of the syntax row, such as "Project level" or "Folder level"
+        row = code.find_parent("tr")
+        for cell in row.find_all("td") if row else []:
+            level = cell.get_text().strip().lower()
+            if level.endswith(" level") and level[:-6] in INFORMATION_SCHEMA_SCOPES:
+                scope.add(level[:-6])
+
+    if not syntax_codes and any(
+        "PROJECT_ID" in code.get_text() for code in scan["codes"]
     ):
-        has_project_id = True
-    return has_project_id
+        scope.add("project")
 
+    return [name for name in INFORMATION_SCHEMA_SCOPES if name in scope]
 
-def parse_required_role(soup):
-    required_role = None
-    for h2_tag in soup.find_all("h2"):
+
+def required_role_from_scan(scan: dict):
+    h2_tag = scan["role_heading"]
+    if h2_tag is None:
+        return None
+    required_role = ""
+    next_element = h2_tag.find_next_sibling()
+    while next_element and next_element.name != "h2" and not next_element.find("h2"):
+        required_role += next_element.text
+        next_element = next_element.find_next_sibling()
+    return required_role
+
+
+def page_text_index(scan: dict) -> str:
+    """
+    Return the lowercase text of the page, computed once and kept in the scan.
+    """
+    if "text_index" not in scan:
+        scan["text_index"] = scan["soup"].get_text().lower()
+    return scan["text_index"]
+
+
+def _code_literal(code) -> str:
+    """
+    Return the text of a <code> holding a single plain string, else None.
+    """
+    if len(code.contents) == 1 and isinstance(code.contents[0], NavigableString):
+        return str(code.contents[0]) or None
+    return None
+
+
+def _code_after(code, text: str) -> str:
+    """
+    Return the literal of a <code> directly preceded by a string ending with text.
+    """
+    previous = code.previous_sibling
+    if isinstance(previous, NavigableString) and previous.endswith(text):
+        return _code_literal(code)
+    return None
+
+
+def _clustering_columns_after_phrase(element) -> List[str]:
+    """
+    Read "clustered by <code>a</code> and <code>b</code>" or "clustered by
+    <code>a</code>" in an element, preferring the two column form.
+    """
+    first_single = None
+    for code in element.find_all("code"):
+        column = _code_after(code, "clustered by ")
+        if column is None:
+            continue
+        separator = code.next_sibling
+        second = separator.next_sibling if separator is not None else None
         if (
-            h2_tag.get("data-text") == "Required permissions"
-            or h2_tag.get("data-text") == "Required role"
+            isinstance(separator, NavigableString)
+            and separator == " and "
+            and isinstance(second, Tag)
+            and second.name == "code"
+            and _code_literal(second) is not None
         ):
-            required_role = ""
-            next_element = h2_tag.find_next_sibling()
-            while (
-                next_element
-                and next_element.name != "h2"
-                and not next_element.find("h2")
-            ):
-                required_role += next_element.text
-                next_element = next_element.find_next_sibling()
-            break
-    return required_role
+            return [column, _code_literal(second)]
+        if first_single is None:
+            first_single = [column]
+    return first_single or []
 
 
-def extract_partitioning_key(soup):
+def partitioning_key_from_scan(scan: dict):
     partitioning_key = None
     clustering_columns = []
     partitioning_mentioned = False
     clustering_mentioned = False
 
     # Find all paragraphs and aside notes that might contain partitioning and clustering info
-    for element in soup.find_all(["p", "aside"]):
+    for element in scan["text_blocks"]:
+        if element.name == "span":
+            continue
         # For aside elements, we need to look within span tags too
         if element.name == "aside":
             spans = element.find_all("span")
@@ -84,24 +334,23 @@ def extract_partitioning_key(soup):
 
         for elem in elements_to_process:
             element_text = elem.get_text()
-            element_html = str(elem)
+            if not ("partitioned by" in element_text or "clustered by" in element_text):
+                continue
+            code_tags = elem.find_all("code")
 
             # Check if partitioning is mentioned
             if "partitioned by" in element_text:
                 partitioning_mentioned = True
-                # Extract partitioning key
-                partitioning_match = re.search(
-                    r"partitioned by the <code[^>]*>([^<]+)</code>", element_html
-                )
-                if partitioning_match:
-                    partitioning_key = partitioning_match.group(1)
+                # The key is the first plain <code> right after "partitioned by the "
+                for code in code_tags:
+                    column = _code_after(code, "partitioned by the ")
+                    if column is not None:
+                        partitioning_key = column
+                        break
 
             # Check if clustering is mentioned
             if "clustered by" in element_text:
                 clustering_mentioned = True
-
-                # Extract all code tags
-                code_tags = elem.find_all("code")
                 code_texts = [tag.get_text() for tag in code_tags]
 
                 # For single clustering column case (no partitioning)
@@ -126,46 +375,25 @@ def extract_partitioning_key(soup):
 
     # If we still don't have clustering columns but found code tags after "clustered by"
     if not clustering_columns and clustering_mentioned:
-        # Try a more direct pattern match
-        for element in soup.find_all(["p", "aside", "span"]):
-            element_html = str(element)
-            if "clustered by" in element_html:
-                # Pattern for two clustering columns
-                two_col_match = re.search(
-                    r"clustered by <code[^>]*>([^<]+)</code> and <code[^>]*>([^<]+)</code>",
-                    element_html,
-                )
-                if two_col_match:
-                    clustering_columns = [
-                        two_col_match.group(1),
-                        two_col_match.group(2),
-                    ]
+        # Look for the columns right after the phrase
+        for element in scan["text_blocks"]:
+            if "clustered by" in element.get_text():
+                clustering_columns = _clustering_columns_after_phrase(element)
+                if clustering_columns:
                     break
-                else:
-                    # Pattern for a single clustering column
-                    one_col_match = re.search(
-                        r"clustered by <code[^>]*>([^<]+)</code>", element_html
-                    )
-                    if one_col_match:
-                        clustering_columns = [one_col_match.group(1)]
-                        break
-
-    # For the specific test cases - direct pattern match
-    html_str = str(soup)
-    if (
-        "creation_time" in html_str
-        and "project_id" in html_str
-        and "user_email" in html_str
-    ):
-        if partitioning_key == "creation_time" and not clustering_columns:
-            clustering_columns = ["project_id", "user_email"]
 
+    # For the specific test cases - direct pattern match. The page text is only
+    # indexed when one of these partitioning keys was found without clustering.
     if (
-        "job_creation_time" in html_str
-        and "project_id" in html_str
-        and "user_email" in html_str
+        partitioning_key in ("creation_time", "job_creation_time")
+        and not clustering_columns
     ):
-        if partitioning_key == "job_creation_time" and not clustering_columns:
+        text_index = page_text_index(scan)
+        if (
+            partitioning_key in text_index
+            and "project_id" in text_index
+            and "user_email" in text_index
+        ):
             clustering_columns = ["project_id", "user_email"]
 
     # Raise an error if partitioning is mentioned but we couldn't extract a key
@@ -183,55 +411,418 @@ def extract_partitioning_key(soup):
     return partitioning_key, clustering_columns
 
 
-def update_column_list(
-    input_columns: List[dict], exclude_columns: List[str], field_mappings: dict = None
-):
-    # Remove the columns that are in the exclude_columns list
-    columns = [
-        column
-        for column in input_columns
-        if column["name"].lower() not in (exclude_columns or [])
-    ]
+def columns_from_scan(scan: dict) -> List[dict]:
+    # The table with column information is the first one without class
+    table = scan["column_table"]
+    if table is None:
+        raise ValueError("Could not find the table describing the columns")
 
-    # Extract all columns that are structures (as containing ".") and remove them from the columns list
-    struct_columns = [column for column in input_columns if "." in column["name"]]
+    # Extract the column information from the table
+    columns = []
+    for row in table.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        column_info = {
+            "name": element_text(cols[0])
+            .strip()
+            .replace("\n", "")
+            .replace("_<wbr>", "_"),
+            "type": element_text(cols[1]).strip(),
+            "description": element_text(cols[2]).strip(),
+        }
+        columns.append(column_info)
+    return columns
 
-    # Remove the struct columns from the columns list
-    columns = [column for column in columns if column not in struct_columns]
 
-    # Apply field mappings if provided
-    if field_mappings:
-        for column in columns:
-            if column["name"] in field_mappings:
-                column["name"] = field_mappings[column["name"]]
+def parse_table_name(soup):
+    return table_name_from_scan(scan_document(soup))
 
-    # Extract the top level struct columns and deduplicate them
-    struct_column_names = set(
-        [column["name"].split(".")[0] for column in struct_columns]
-    )
 
-    # Sort the struct columns by name
-    struct_column_names = sorted(struct_column_names)
+def parse_information_schema_scope(soup) -> List[str]:
+    return scope_from_scan(scan_document(soup))
 
-    # Create a new column for each struct column and concatenate the description of its children columns
-    for struct_column_name in struct_column_names:
-        struct_column_description = ""
-        for struct_column in struct_columns:
-            if struct_column["name"].startswith(struct_column_name):
-                struct_column_description += (
-                    struct_column["name"] + " : " + struct_column["description"] + "\n"
-                )
-        columns.append(
-            {
-                "name": struct_column_name,
-                "type": "RECORD",
-                "description": struct_column_description.strip(),
-            }
+
+# check if the view is queried within a project, with or without a `PROJECT_ID.`
+# qualifier
+def parse_has_project_id_scope(soup):
+    return scope_has_project(parse_information_schema_scope(soup))
+
+
+def parse_required_role(soup):
+    return required_role_from_scan(scan_document(soup))
+
+
+def extract_partitioning_key(soup):
+    return partitioning_key_from_scan(scan_document(soup))
+
+
+def parse_columns(soup) -> List[dict]:
+    return columns_from_scan(scan_document(soup))
+
+
+# Types of the schema tables BigQuery can cluster a table by
+CLUSTERING_COLUMN_TYPES = {
+    "BIGNUMERIC",
+    "BOOL",
+    "BOOLEAN",
+    "DATE",
+    "DATETIME",
+    "GEOGRAPHY",
+    "INT64",
+    "INTEGER",
+    "NUMERIC",
+    "STRING",
+    "TIMESTAMP",
+}
+
+# Most columns a BigQuery table can be clustered by
+MAX_CLUSTERING_COLUMNS = 4
+
+
+def build_struct_columns(
+    struct_columns: List[dict], nested_fields: bool = False
+) -> List[dict]:
+    """
+    Group the struct fields (columns named <struct>.<field>) by top-level struct.
+
+    The fields are grouped in a single pass, by exact path segments, into a tree of
+    arbitrary depth. Intermediate structs without a row of their own are RECORDs
+    without description.
+
+    Args:
+        struct_columns: Columns whose name contains a "."
+        nested_fields: Also return the tree of each struct under 'fields', and
+            leave the description of the struct to its own row if any
+
+    Returns:
+        One RECORD column per top-level struct, sorted by name. Its description
+        lists every field as "<path> : <description>" lines, unless nested_fields
+    """
+    roots = {}
+    nodes = {}
+    field_lines = {}
+    for column in struct_columns:
+        path = column["name"].split(".")
+        root_name = path[0]
+        field_lines.setdefault(root_name, []).append(
+            column["name"] + " : " + column["description"]
         )
+        if not nested_fields:
+            continue
+
+        # Walk down the tree, creating the structs not seen yet
+        key = ()
+        siblings = roots
+        for segment in path:
+            key += (segment,)
+            node = nodes.get(key)
+            if node is None:
+                node = {"name": segment, "type": "RECORD", "description": ""}
+                nodes[key] = node
+                if siblings is roots:
+                    roots[segment] = node
+                else:
+                    siblings.append(node)
+            if len(key) < len(path):
+                siblings = node.setdefault("fields", [])
+        node["type"] = column["type"]
+        node["description"] = column["description"]
+
+    records = []
+    for root_name in sorted(field_lines):
+        record = {
+            "name": root_name,
+            "type": "RECORD",
+            "description": "\n".join(field_lines[root_name]).strip(),
+        }
+        if nested_fields:
+            record["description"] = roots[root_name]["description"]
+            record["fields"] = roots[root_name].get("fields", [])
+        records.append(record)
+    return records
+
+
+def update_column_list(
+    input_columns: List[dict],
+    exclude_columns: List[str],
+    field_mappings: dict = None,
+    nested_fields: bool = False,
+) -> List[dict]:
+    """
+    Apply the exclusions and the field mappings of a target to the page columns,
+    and replace the struct fields by one RECORD column per struct.
+
+    The input columns are not modified. Exclusions (lowercase names) and mappings
+    apply to the top-level columns; the RECORD columns are appended after them,
+    sorted by name, and describe every field of their struct.
+
+    Args:
+        input_columns: Columns with 'name', 'type' and 'description'
+        exclude_columns: Lowercase names of the columns to leave out
+        field_mappings: New names of top-level columns, by original name
+        nested_fields: Describe the struct fields as a tree under 'fields', see
+            build_struct_columns
 
+    Returns:
+        The columns of the model
+    """
+    excluded = set(exclude_columns or [])
+    field_mappings = field_mappings or {}
+    columns = []
+    struct_columns = []
+    for column in input_columns:
+        name = column["name"]
+        if "." in name:
+            struct_columns.append(column)
+        elif name.lower() not in excluded:
+            columns.append({**column, "name": field_mappings.get(name, name)})
+
+    columns.extend(build_struct_columns(struct_columns, nested_fields))
     return columns
 
 
+def model_cluster_by(
+    columns: List[dict], clustering_columns: List[str], cluster_by: List[str] = None
+) -> List[str]:
+    """
+    Choose the columns a model is clustered by.
+
+    BigQuery only clusters by top-level columns of some scalar types, at most
+    MAX_CLUSTERING_COLUMNS of them. The clustering columns documented on the page
+    are kept when the model has them as such columns, in their order. A
+    cluster_by set in config.py replaces them, an empty list disables clustering.
+
+    Args:
+        columns: The columns of the model, as returned by update_column_list
+        clustering_columns: The clustering columns extracted from the page
+        cluster_by: The cluster_by of the target in config.py, if any
+
+    Returns:
+        The lowercase names of the clustering columns
+
+    Raises:
+        ValueError: When the configured cluster_by names a column the model lacks
+            or cannot be clustered by, or more than MAX_CLUSTERING_COLUMNS columns
+    """
+    column_types = {column["name"].lower(): column["type"] for column in columns}
+
+    def clusterable(name: str) -> bool:
+        return column_types.get(name.lower()) in CLUSTERING_COLUMN_TYPES
+
+    if cluster_by is None:
+        return [name.lower() for name in clustering_columns if clusterable(name)][
+            :MAX_CLUSTERING_COLUMNS
+        ]
+
+    invalid = [name for name in cluster_by if not clusterable(name)]
+    if invalid:
+        raise ValueError(
+            f"Invalid cluster_by columns {invalid}: not top-level columns of the "
+            "model, or of a type BigQuery cannot cluster by"
+        )
+    if len(cluster_by) > MAX_CLUSTERING_COLUMNS:
+        raise ValueError(
+            f"Invalid cluster_by {cluster_by}: BigQuery clusters by at most "
+            f"{MAX_CLUSTERING_COLUMNS} columns"
+        )
+    return [name.lower() for name in cluster_by]
+
+
+def extract_page(soup) -> dict:
+    """
+    Extract the page-level facts shared by every target built from a page.
+
+    Args:
+        soup: The parsed documentation page
+
+    Returns:
+        Dictionary with 'table_name', 'required_role', 'scope' (see
+        scope_from_scan), 'has_project_id_scope', 'partitioning_key',
+        'clustering_columns' and the raw 'columns' rows
+    """
+    return page_from_scan(scan_document(soup))
+
+
+def extract_page_from_html(html_content: str, backend: str = None) -> dict:
+    """
+    Parse only the article body of a page and extract its page-level facts.
+
+    The full document is parsed instead when the article body lacks the schema
+    table or the INFORMATION_SCHEMA syntax.
+
+    Args:
+        html_content: The HTML of the page
+        backend: One of HTML_PARSER_BACKENDS, defaults to default_parser_backend()
+
+    Returns:
+        The page-level facts, as returned by extract_page
+    """
+    soup, scan = parse_page(html_content, backend)
+    try:
+        return page_from_scan(scan)
+    finally:
+        teardown_tree(soup)
+
+
+def parse_page(html_content: str, backend: str = None):
+    """
+    Parse the article body of a page, or the full document when the article body
+    lacks the schema table or the INFORMATION_SCHEMA syntax.
+
+    Args:
+        html_content: The HTML of the page
+        backend: One of HTML_PARSER_BACKENDS, defaults to default_parser_backend()
+
+    Returns:
+        The parsed tree and its scan, see scan_document
+    """
+    soup = parse_html(html_content, backend, scoped=True)
+    try:
+        with span("scan", "extract"):
+            scan = scan_document(soup)
+        if scan["column_table"] is not None and table_name_from_scan(scan) is not None:
+            return soup, scan
+    except BaseException:
+        teardown_tree(soup)
+        raise
+    teardown_tree(soup)
+
+    soup = parse_html(html_content, backend)
+    try:
+        with span("scan", "extract", fallback=True):
+            scan = scan_document(soup)
+    except BaseException:
+        teardown_tree(soup)
+        raise
+    return soup, scan
+
+
+def teardown_tree(soup):
+    """
+    Free a parsed document once its facts are extracted.
+
+    The parent and sibling links of the tree are reference cycles, so a dropped
+    tree stays in memory until a full garbage collection, and batch runs pile up
+    several of them. decompose() breaks the links so it is freed right away. The
+    extracted facts only hold plain strings, never elements of the tree.
+    """
+    with span("teardown", "extract"):
+        # The document itself is not linked to its first element, so decomposing
+        # it alone would leave the elements untouched
+        for element in list(soup.contents):
+            element.decompose()
+        soup.decompose()
+
+
+def extract_pages(
+    html_by_url: dict,
+    workers: int = DEFAULT_WORKERS,
+    backend: str = None,
+    profiles: dict = None,
+) -> dict:
+    """
+    Extract the page-level facts of several pages in a pool of processes.
+
+    Parsing and extraction are pure Python and hold the GIL, so pages are spread
+    over processes rather than threads. Only the HTML goes to the workers and only
+    the page facts (plain dicts, lists and strings) come back.
+
+    Args:
+        html_by_url: The HTML of each page by URL
+        workers: Maximum number of worker processes, 1 parses in this process
+        backend: One of HTML_PARSER_BACKENDS, defaults to default_parser_backend()
+        profiles: When given, filled with the raw profile of the extraction of
+            each page by URL, see profiling.profile
+
+    Returns:
+        Dictionary mapping each URL to its page facts, as returned by extract_page
+    """
+    # Resolved here so every worker uses the same backend
+    backend = backend or default_parser_backend()
+    urls = list(html_by_url)
+    workers = min(workers, len(urls))
+    if workers <= 1:
+        pages = {}
+        for url in urls:
+            with profile(profiles is not None) as page_profile:
+                with span("extract_page", "extract", url=url):
+                    pages[url] = extract_page_from_html(html_by_url[url], backend)
+            if profiles is not None:
+                profiles[url] = page_profile["stats"]
+        return pages
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            extract_page_task,
+            urls,
+            [html_by_url[url] for url in urls],
+            repeat(backend),
+            repeat(is_tracing()),
+            repeat(profiles is not None),
+            repeat(is_accounting_memory()),
+        )
+        pages = {}
+        for url, (page, spans, page_profile, memory) in zip(urls, results):
+            write_spans(spans)
+            add_memory_report(memory)
+            pages[url] = page
+            if profiles is not None:
+                profiles[url] = page_profile
+        return pages
+
+
+def extract_page_task(
+    url: str,
+    html_content: str,
+    backend: str,
+    trace: bool,
+    profiled: bool = False,
+    memory: bool = False,
+):
+    """
+    Worker of extract_pages, returning the page facts, the spans it recorded, its
+    raw profile, None unless profiled, and its memory report, empty unless memory
+    is accounted.
+    """
+    with collect_spans(trace) as spans, memory_accounting(memory) as memory_report:
+        with profile(profiled) as page_profile:
+            with span("extract_page", "extract", url=url):
+                page = extract_page_from_html(html_content, backend)
+    return page, spans, page_profile["stats"], memory_report
+
+
+def page_from_scan(scan: dict) -> dict:
+    # Every extractor reads from a single walk over the document tree
+    with span("table_name", "extract"):
+        table_name = table_name_from_scan(scan)
+    with span("required_role", "extract"):
+        required_role = required_role_from_scan(scan)
+    with span("scope", "extract"):
+        scope = scope_from_scan(scan)
+    with span("partitioning_key", "extract"):
+        partitioning_key, clustering_columns = partitioning_key_from_scan(scan)
+    with span("columns", "extract"):
+        columns = columns_from_scan(scan)
+    return {
+        "table_name": table_name,
+        "required_role": required_role,
+        "scope": scope,
+        "has_project_id_scope": scope_has_project(scope),
+        "partitioning_key": partitioning_key,
+        "clustering_columns": clustering_columns,
+        "columns": columns,
+    }
+
+
+def group_targets_by_url(targets: dict) -> dict:
+    """
+    Group the keys of pages_to_process by URL, keeping the configuration order.
+    """
+    targets_by_url = {}
+    for key, target in targets.items():
+        targets_by_url.setdefault(target["url"], []).append(key)
+    return targets_by_url
+
+
 def generate_files(
     filename: str,
     dir: str,
@@ -243,86 +834,150 @@ def generate_files(
     enabled: bool = None,
     tags: List[str] = None,
     field_mappings: dict = None,
+    html_content: str = None,
+    parser_backend: str = None,
 ):
-    # Fetch the HTML content from the URL
-    response = requests.get(url)
-    html_content = response.text
+    # Fetch the HTML content from the URL unless it was already fetched
+    if html_content is None:
+        html_content = fetch_page(url)["html"]
+
+    return generate_model_files(
+        filename,
+        dir,
+        url,
+        TableSchema.from_dict(extract_page_from_html(html_content, parser_backend)),
+        exclude_columns,
+        override_table_name,
+        type,
+        materialization,
+        enabled,
+        tags,
+        field_mappings,
+    )
 
-    # Parse the HTML content using BeautifulSoup
-    soup = BeautifulSoup(html_content, "html.parser")
 
-    # Write the HTML content to a file
-    with open("tmp_html_content.html", "w") as f:
-        f.write(html_content)
+# config.py settings overriding the partitioning of a model, see partition_config
+PARTITIONING_OPTIONS = {
+    "partition_granularity": "granularity",
+    "partition_expiration_days": "expiration_days",
+    "require_partition_filter": "require_partition_filter",
+}
 
-    # Extract the table name from the paragraph
-    table_name = None
 
-    # Extract the table name from the table
-    if override_table_name:
-        table_name = override_table_name
-    else:
-        table_name = parse_table_name(soup)
+def generate_target_files(
+    filename: str, target: dict, schema: TableSchema, output_dir: str = OUTPUT_DIR
+):
+    with span("render", "render", key=filename):
+        return generate_model_files(
+            filename,
+            target["dir"],
+            target["url"],
+            schema,
+            target.get("exclude_columns"),
+            target.get("override_table_name"),
+            target.get("type"),
+            target.get("materialization"),
+            target.get("enabled"),
+            target.get("tags"),
+            target.get("field_mappings"),
+            output_dir,
+            nested_fields=target.get("nested_fields", False),
+            cluster_by=target.get("cluster_by"),
+            partitioning={
+                option: target[key]
+                for key, option in PARTITIONING_OPTIONS.items()
+                if key in target
+            },
+            incremental=target.get("incremental"),
+        )
 
-    if not table_name:
-        print(f"Error: Could not find the table name for url {url}.")
-        return
 
-    print(f"Table Name: {table_name}")
+def model_name_for_key(key: str) -> str:
+    return f"information_schema_{key.lower()}"
 
-    # Extract the required role from following HTML snippet
-    required_role = parse_required_role(soup)
 
-    has_project_id_scope = parse_has_project_id_scope(soup)
-    partitioning_key, clustering_columns = extract_partitioning_key(soup)
+def generate_model_files(
+    filename: str,
+    dir: str,
+    url: str,
+    schema: TableSchema,
+    exclude_columns: List[str],
+    override_table_name: str,
+    type: str,
+    materialization: str = None,
+    enabled: bool = None,
+    tags: List[str] = None,
+    field_mappings: dict = None,
+    output_dir: str = OUTPUT_DIR,
+    nested_fields: bool = False,
+    cluster_by: List[str] = None,
+    partitioning: dict = None,
+    incremental: dict = None,
+) -> dict:
+    """
+    Render the YML and SQL files of a target from the schema of its page.
 
-    # Extract the table with column information
-    table = soup.find("table", {"class": None})
+    The model is clustered by the clustering columns of the page, or by the
+    configured cluster_by, see model_cluster_by. It is partitioned by the
+    partitioning key of the page, with the configured partitioning overriding the
+    defaults of partition_config. With incremental settings, see
+    incremental_config, it is rendered as an incremental model reading only the
+    recent partitions of the view.
 
-    # Extract the column information from the table
-    columns = []
-    for row in table.find_all("tr")[1:]:
-        cols = row.find_all("td")
-        column_info = {
-            "name": cols[0].text.strip().replace("\n", "").replace("_<wbr>", "_"),
-            "type": cols[1].text.strip(),
-            "description": cols[2].text.strip(),
-        }
-        columns.append(column_info)
+    A partitioning key of the page the model cannot be partitioned by, see
+    partitioning_key_error, leaves the model unpartitioned with a warning.
+
+    Returns:
+        Dictionary with the 'outputs' paths of the model files, empty when the
+        table name is unknown, the paths 'written' because their content changed,
+        the number of top-level 'columns' of the model and the 'warnings' raised
+        while rendering it
+    """
+    # Use the table name from the configuration, or the one found in the page
+    table_name = override_table_name or schema.table_name
 
-    # Update the column list
-    columns = update_column_list(columns, exclude_columns, field_mappings)
+    if not table_name:
+        print(f"Error: Could not find the table name for url {url}.")
+        return {"outputs": [], "written": [], "columns": 0, "warnings": []}
 
-    model_name = f"information_schema_{filename.lower()}"
+    print(f"Table Name: {table_name}")
 
-    base_filename = f"output/{dir}/{model_name}"
+    required_role = schema.required_role
+    has_project_id_scope = schema.has_project_id_scope
+    partitioning_key = schema.partitioning_key
+
+    # The page may be shared by several targets, update_column_list returns new dicts
+    with span("update_column_list", "render"):
+        columns = update_column_list(
+            [column.to_dict() for column in schema.columns],
+            exclude_columns,
+            field_mappings,
+            nested_fields,
+        )
+    try:
+        cluster_by = model_cluster_by(columns, schema.clustering_columns, cluster_by)
+    except ValueError as error:
+        raise ValueError(f"{filename}: {error}") from error
 
-    # Create the YML file
-    filename_yml = f"{base_filename}.yml"
+    model_name = model_name_for_key(filename)
 
-    # Create the directory to at the path from filename_yml if it doesn't exist
-    directory = os.path.dirname(filename_yml)
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    base_filename = f"{output_dir}/{dir}/{model_name}"
 
-    # Create the YML file
-    with open(filename_yml, "w") as f:
+    # Create the YML file, only rewritten when its content changed
+    filename_yml = f"{base_filename}.yml"
+    with span("generate_yml", "render"):
         yml_content = generate_yml(model_name, columns)
-        f.write(yml_content)
+    yml_written = write_if_changed(filename_yml, yml_content)
 
     filename_sql = f"{base_filename}.sql"
 
-    # Create the directory to at the path from filename_yml if it doesn't exist
-    directory = os.path.dirname(filename_sql)
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-
     required_role_str = (
         f"{{# Required role/permissions: {required_role} -#}}\n"
         if required_role
         else ""
     )
-    sql_type = "table" if type is None else type
+    # Without explicit type, the syntax tells whether the view is read per dataset
+    sql_type = sql_type_for_scope(schema.scope) if type is None else type
 
     # Transform columns to new nested structure for SQL generation
     columns_for_sql = [
@@ -334,26 +989,65 @@ def generate_files(
         for column in columns
     ]
 
+    # The partitioning key is scraped from the page, a wrong one must not stop
+    # the run
+    warnings = []
+    error = partitioning_key and partitioning_key_error(
+        partitioning_key, columns_for_sql
+    )
+    if error:
+        warnings.append(f"{error}, the model is left unpartitioned")
+        print(f"Warning: {filename}: {warnings[-1]}.")
+        partitioning_key = None
+
     # Create the SQL file
-    with open(filename_sql, "w") as f:
-        sql_file_content = generate_sql(
-            url,
-            columns_for_sql,
-            table_name,
-            required_role_str,
-            sql_type,
-            has_project_id_scope,
-            partitioning_key,
-            materialization,
-            enabled,
-            tags,
-        )
-        # Ensure the SQL content ends with a newline
-        if not sql_file_content.endswith("\n"):
-            sql_file_content += "\n"
-        f.write(sql_file_content)
+    with span("generate_sql", "render"):
+        try:
+            sql_file_content = generate_sql(
+                url,
+                columns_for_sql,
+                table_name,
+                required_role_str,
+                sql_type,
+                has_project_id_scope,
+                partitioning_key,
+                materialization,
+                enabled,
+                tags,
+                cluster_by,
+                partitioning,
+                incremental,
+            )
+        except ValueError as error:
+            raise ValueError(f"{filename}: {error}") from error
+    # Ensure the SQL content ends with a newline
+    if not sql_file_content.endswith("\n"):
+        sql_file_content += "\n"
+    sql_written = write_if_changed(filename_sql, sql_file_content)
+
+    if sql_written or yml_written:
+        print(f"Files '{filename_sql}' and '{filename_yml}' have been created.")
+    else:
+        print(f"Files '{filename_sql}' and '{filename_yml}' are unchanged.")
+    written = [(filename_sql, sql_written), (filename_yml, yml_written)]
+    return {
+        "outputs": [filename_sql, filename_yml],
+        "written": [path for path, path_written in written if path_written],
+        "columns": len(columns),
+        "warnings": warnings,
+    }
 
-    print(f"Files '{filename_sql}' and '{filename_yml}' have been created.")
+
+def yml_column(column: dict) -> dict:
+    # Struct fields built with nested_fields are listed under their RECORD
+    yml = {
+        "name": column["name"],
+        "description": column["description"],
+        "data_type": column.get("data_type", column.get("type")),
+    }
+    if "fields" in column:
+        yml["fields"] = [yml_column(field) for field in column["fields"]]
+    return yml
 
 
 def generate_yml(model_name: str, columns: List[dict]) -> str:
@@ -372,14 +1066,7 @@ def generate_yml(model_name: str, columns: List[dict]) -> str:
         "models": [
             {
                 "name": model_name,
-                "columns": [
-                    {
-                        "name": column["name"],
-                        "description": column["description"],
-                        "data_type": column.get("data_type", column.get("type")),
-                    }
-                    for column in columns
-                ],
+                "columns": [yml_column(column) for column in columns],
             }
         ],
     }
@@ -388,58 +1075,410 @@ def generate_yml(model_name: str, columns: List[dict]) -> str:
     return yaml.dump(yaml_data, sort_keys=False, default_flow_style=False, indent=2)
 
 
-def generate_all():
-    for filename, target in pages_to_process.items():
-        generate_files(
-            filename,
-            target["dir"],
-            target["url"],
-            target.get("exclude_columns"),
-            target.get("override_table_name"),
-            target.get("type"),
-            target.get("materialization"),
-            target.get("enabled"),
-            target.get("tags"),
-            target.get("field_mappings"),
+def load_pages(
+    targets_by_url: dict,
+    jobs: int = DEFAULT_JOBS,
+    cache: HttpCache = None,
+    record_dir: str = None,
+    replay_dir: str = None,
+    dump_dir: str = None,
+) -> dict:
+    """
+    Fetch the pages of the targets, or load them from a recorded corpus.
+
+    Args:
+        targets_by_url: The keys of pages_to_process grouped by URL
+        jobs: Maximum number of pages fetched in parallel
+        cache: On-disk HTTP cache used for the fetches
+        record_dir: Directory where the fetched pages are recorded, if any
+        replay_dir: Directory of a recorded corpus to read instead of fetching
+        dump_dir: Directory where a compressed copy of each key's page is
+            written for debugging, if any
+
+    Returns:
+        Dictionary mapping each URL to its page, as returned by fetch_pages
+    """
+    if replay_dir:
+        pages = replay_pages(replay_dir, targets_by_url)
+        print(f"Replayed {len(pages)} pages from {replay_dir}")
+    else:
+        pages = fetch_pages(list(targets_by_url), jobs=jobs, cache=cache)
+        print(format_transfer_summary(list(pages.values())))
+        if record_dir:
+            record_pages(record_dir, targets_by_url, pages)
+            print(f"Recorded {len(pages)} pages in {record_dir}")
+
+    if dump_dir:
+        dumped = dump_pages(dump_dir, targets_by_url, pages)
+        print(f"Dumped {len(dumped)} pages in {dump_dir}")
+    return pages
+
+
+def expected_output_paths(targets: dict, output_dir: str = OUTPUT_DIR) -> List[str]:
+    """
+    Return the paths of the .sql and .yml files generated for the targets.
+    """
+    return [
+        f"{output_dir}/{target['dir']}/{model_name_for_key(key)}.{extension}"
+        for key, target in targets.items()
+        for extension in ("sql", "yml")
+    ]
+
+
+def generate_all(
+    jobs: int = DEFAULT_JOBS,
+    cache: HttpCache = None,
+    record_dir: str = None,
+    replay_dir: str = None,
+    parser_backend: str = None,
+    workers: int = DEFAULT_WORKERS,
+    output_dir: str = OUTPUT_DIR,
+    force: bool = False,
+    prune: bool = False,
+    dump_dir: str = None,
+    schema_dir: str = DEFAULT_SCHEMA_DIR,
+    metrics_file: str = None,
+    profile_dir: str = None,
+    profile_top: int = DEFAULT_TOP,
+) -> dict:
+    """
+    Fetch, parse and render every target of pages_to_process.
+
+    With a profile_dir, the extraction of the page and the rendering of each
+    rebuilt target are profiled and written as <key>.pstats and <key>.collapsed,
+    see ProfileReport.
+
+    Returns:
+        The metrics of the run, see collect_run_metrics, also written in the
+        Prometheus text format to metrics_file when given
+    """
+    start = time.perf_counter()
+    # Targets sharing a URL are fetched and parsed once, then rendered each
+    targets_by_url = group_targets_by_url(pages_to_process)
+
+    # Fetch every page concurrently first
+    with span("load_pages", "fetch", pages=len(targets_by_url)):
+        pages = load_pages(
+            targets_by_url, jobs, cache, record_dir, replay_dir, dump_dir
+        )
+
+    # Targets whose page, configuration entry and generator are unchanged since the
+    # last run, and whose files and cached schema are untouched, are skipped
+    manifest = BuildManifest(output_dir)
+    schema_cache = SchemaCache(schema_dir)
+    version = generator_version()
+    page_hashes = {url: hash_text(pages[url]["html"]) for url in targets_by_url}
+    inputs_by_key = {
+        key: target_inputs(page_hashes[url], pages_to_process[key], version)
+        for url, keys in targets_by_url.items()
+        for key in keys
+    }
+
+    def is_up_to_date(key: str, url: str) -> bool:
+        cached = schema_cache.load(key, url)
+        return (
+            cached is not None
+            and cached["page_hash"] == page_hashes[url]
+            and manifest.is_up_to_date(key, inputs_by_key[key])
+        )
+
+    stale_keys_by_url = {}
+    for url, keys in targets_by_url.items():
+        stale_keys = [key for key in keys if force or not is_up_to_date(key, url)]
+        if stale_keys:
+            stale_keys_by_url[url] = stale_keys
+
+    # Parse the pages of the stale targets in worker processes, then apply the
+    # per-target settings and render them in order
+    profile_report = ProfileReport(profile_dir, profile_top) if profile_dir else None
+    page_profiles = {} if profile_report else None
+    # The pages only keep their transfer details once parsed, so the HTML of a
+    # whole run is not held until the last model is rendered
+    html_by_url = {url: pages[url].pop("html") for url in stale_keys_by_url}
+    for page in pages.values():
+        page.pop("html", None)
+    with span("extract_pages", "extract", pages=len(stale_keys_by_url)):
+        extracted_pages = extract_pages(
+            html_by_url, workers, parser_backend, page_profiles
+        )
+    del html_by_url
+
+    models = {}
+    for url, keys in stale_keys_by_url.items():
+        schema = TableSchema.from_dict(extracted_pages[url])
+        for key in keys:
+            schema_cache.store(key, url, page_hashes[url], schema)
+            with profile(profile_report is not None) as render_profile:
+                models[key] = generate_target_files(
+                    key, pages_to_process[key], schema, output_dir
+                )
+            manifest.record(key, inputs_by_key[key], models[key]["outputs"])
+            if profile_report:
+                profile_report.add(key, [page_profiles[url], render_profile["stats"]])
+
+    # Remove the models of the keys no longer in the configuration
+    if prune:
+        for path in prune_generated_files(
+            output_dir, expected_output_paths(pages_to_process, output_dir)
+        ):
+            print(f"Pruned {path}")
+        manifest.retain(pages_to_process)
+    manifest.save()
+
+    rebuilt = [key for keys in stale_keys_by_url.values() for key in keys]
+    skipped = [key for key in pages_to_process if key not in rebuilt]
+    print(
+        f"Rebuilt {len(rebuilt)} targets from {len(stale_keys_by_url)} pages, "
+        f"skipped {len(skipped)} unchanged targets."
+    )
+    if rebuilt:
+        print(f"Rebuilt: {', '.join(rebuilt)}")
+    if skipped:
+        print(f"Skipped: {', '.join(skipped)}")
+    for url, keys in targets_by_url.items():
+        if len(keys) > 1:
+            print(f"Shared page {url} -> {', '.join(keys)}")
+
+    metrics = collect_run_metrics(
+        pages, list(stale_keys_by_url), models, skipped, time.perf_counter() - start
+    )
+    print(format_metrics_summary(metrics))
+    if metrics_file:
+        write_prometheus_textfile(metrics_file, metrics)
+        print(f"Metrics written to {metrics_file}")
+    if profile_report:
+        print(profile_report.format_hotspots())
+    return metrics
+
+
+def render_all(output_dir: str = OUTPUT_DIR, schema_dir: str = DEFAULT_SCHEMA_DIR):
+    """
+    Render the models of every target from the cached schemas, without fetching
+    or parsing any page.
+
+    Args:
+        output_dir: Directory of the generated models
+        schema_dir: Directory of the schema cache filled by generate_all
+    """
+    start = time.perf_counter()
+    schema_cache = SchemaCache(schema_dir)
+    manifest = BuildManifest(output_dir)
+    version = generator_version()
+    rendered = []
+    missing = []
+    for key, target in pages_to_process.items():
+        cached = schema_cache.load(key, target["url"])
+        if cached is None:
+            missing.append(key)
+            continue
+        model = generate_target_files(key, target, cached["schema"], output_dir)
+        manifest.record(
+            key, target_inputs(cached["page_hash"], target, version), model["outputs"]
         )
+        rendered.append(key)
+    manifest.save()
 
+    print(
+        f"Rendered {len(rendered)} targets from {schema_dir} "
+        f"in {time.perf_counter() - start:.2f}s."
+    )
+    if missing:
+        print(
+            f"No cached schema for: {', '.join(missing)}. "
+            "Run 'all' to fetch and parse their pages."
+        )
 
-def generate_for_key(key: str):
+
+def generate_for_key(
+    key: str,
+    cache: HttpCache = None,
+    record_dir: str = None,
+    replay_dir: str = None,
+    parser_backend: str = None,
+    dump_dir: str = None,
+    profile_dir: str = None,
+    profile_top: int = DEFAULT_TOP,
+):
     if key in pages_to_process:
         target = pages_to_process[key]
-        generate_files(
-            key,
-            target["dir"],
-            target["url"],
-            target.get("exclude_columns"),
-            target.get("override_table_name"),
-            target.get("type"),
-            target.get("materialization"),
-            target.get("enabled"),
-            target.get("tags"),
-            target.get("field_mappings"),
+        pages = load_pages(
+            {target["url"]: [key]},
+            cache=cache,
+            record_dir=record_dir,
+            replay_dir=replay_dir,
+            dump_dir=dump_dir,
         )
+        # The fetch is left out of the profile, it mostly waits for the network
+        with profile(profile_dir is not None) as key_profile:
+            html_content = pages[target["url"]]["html"]
+            page = extract_page_from_html(html_content, parser_backend)
+            generate_target_files(key, target, TableSchema.from_dict(page))
+        if profile_dir:
+            profile_report = ProfileReport(profile_dir, profile_top)
+            profile_report.add(key, [key_profile["stats"]])
+            print(profile_report.format_hotspots())
     else:
         print(f"Error: Could not find key {key} in the pages_to_process dictionary.")
 
 
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Generate dbt models from the BigQuery INFORMATION_SCHEMA "
+        "documentation."
+    )
+    parser.add_argument(
+        "mode",
+        help="'all' to process every page, 'render-only' to render every model "
+        "from the cached schemas, or a model key from config.py",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"number of pages fetched in parallel (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"directory of the HTTP cache (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_TTL,
+        help="seconds during which cached pages are used without revalidation "
+        f"(default: {DEFAULT_TTL})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always download the pages, without reading or filling the cache",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=HTML_PARSER_BACKENDS,
+        help=f"HTML parser backend (default: ${PARSER_BACKEND_ENV}, else lxml "
+        "when installed, else html.parser)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="number of processes parsing the pages in 'all' mode "
+        f"(default: {DEFAULT_WORKERS}, the number of CPUs)",
+    )
+    parser.add_argument(
+        "--schema-dir",
+        default=DEFAULT_SCHEMA_DIR,
+        help="directory of the extracted schemas used by 'render-only' "
+        f"(default: {DEFAULT_SCHEMA_DIR})",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="rebuild every model in 'all' mode, even when its inputs are unchanged",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="in 'all' mode, delete the generated models of keys no longer in "
+        "config.py",
+    )
+    parser.add_argument(
+        "--dump-html",
+        metavar="DIR",
+        help="write a gzip-compressed copy of each page in DIR as <key>.html.gz, "
+        "to debug the parser",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="write timed spans of every stage to PATH, in the Chrome trace event "
+        "format (open it in chrome://tracing or https://ui.perfetto.dev)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="profile the extraction and rendering of each target with cProfile "
+        "and write <key>.pstats and <key>.collapsed (for flame graphs) in DIR",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=DEFAULT_TOP,
+        metavar="N",
+        help="number of functions in the hotspot table of --profile "
+        f"(default: {DEFAULT_TOP})",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="record the peak and retained memory of every stage and target with "
+        "tracemalloc and print them at the end (slows the run down)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="in 'all' mode, write the run metrics to PATH in the Prometheus text "
+        "format, for the node_exporter textfile collector",
+    )
+    corpus_group = parser.add_mutually_exclusive_group()
+    corpus_group.add_argument(
+        "--record",
+        metavar="DIR",
+        help="save every fetched page in DIR, keyed by config key and URL",
+    )
+    corpus_group.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="run offline from the pages previously recorded in DIR",
+    )
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else HttpCache(args.cache_dir, ttl=args.cache_ttl)
+
+    print("Running for: ", args.mode)
+    print("HTML parser: ", args.parser or default_parser_backend())
+    if args.trace:
+        start_trace(args.trace)
+    try:
+        with memory_accounting(args.memory) as memory, span(args.mode, "run"):
+            if args.mode == "all":
+                generate_all(
+                    jobs=args.jobs,
+                    cache=cache,
+                    record_dir=args.record,
+                    replay_dir=args.replay,
+                    parser_backend=args.parser,
+                    workers=args.workers,
+                    force=args.force,
+                    prune=args.prune,
+                    dump_dir=args.dump_html,
+                    schema_dir=args.schema_dir,
+                    metrics_file=args.metrics_file,
+                    profile_dir=args.profile,
+                    profile_top=args.profile_top,
+                )
+            elif args.mode == "render-only":
+                render_all(schema_dir=args.schema_dir)
+            else:
+                generate_for_key(
+                    args.mode,
+                    cache=cache,
+                    record_dir=args.record,
+                    replay_dir=args.replay,
+                    parser_backend=args.parser,
+                    dump_dir=args.dump_html,
+                    profile_dir=args.profile,
+                    profile_top=args.profile_top,
+                )
+        if args.memory:
+            print(format_memory_report(memory))
+    finally:
+        if args.trace:
+            stop_trace()
+            print(f"Trace written to {args.trace}")
+
+
 if __name__ == "__main__":
-    if len(sys.argv) == 2:
-        print("Running for: ", sys.argv[1:])
-        print("Usage: python documentation_parser.py <mode>")
-        mode = sys.argv[1]
-        if mode == "all":
-            generate_all()
-            sys.exit(0)
-        else:
-            generate_for_key(mode)
-    elif 1 < len(sys.argv) != 3:
-        print("Received arguments: ", sys.argv[1:])
-        print("Usage: python documentation_parser.py <filename> <URL>")
-        sys.exit(1)
-    else:
-        print("Unsupported parameters")
-        print("Received arguments: ", sys.argv[1:])
-        print("Usage: python documentation_parser.py <mode> (supported modes: all)")
-        print("Usage: python documentation_parser.py <model_name> (see config.py)")
-        print("Usage: python documentation_parser.py <filename> <URL>")
+    main()
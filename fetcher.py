@@ -0,0 +1,336 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+
+from http_cache import HttpCache
+from tracing import span
+
+# Number of pages fetched in parallel
+DEFAULT_JOBS = 8
+
+# Requests per second allowed for a single host, and the burst it may absorb
+DEFAULT_HOST_RATE = 4.0
+DEFAULT_HOST_BURST = 4
+
+# How many times a page answered with 429 Too Many Requests is retried
+MAX_RATE_LIMITED_RETRIES = 5
+
+# Wait used when a 429 response carries no usable Retry-After header
+DEFAULT_RETRY_AFTER = 2.0
+
+# Connection errors and these statuses are retried with exponential backoff
+# (0.5s, 1s, 2s, ...)
+MAX_RETRIES = 4
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (10, 60)
+
+USER_AGENT = "dbt-bigquery-monitoring-parser"
+
+CHARSET_HEADER_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+CHARSET_META_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+META_CHARSET_SCAN_BYTES = 4096
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to throttle the requests sent to one host.
+
+    Args:
+        rate: Number of tokens added per second
+        capacity: Maximum number of tokens the bucket can hold
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.blocked_until:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                    )
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.blocked_until - now
+            time.sleep(wait)
+
+    def block(self, seconds: float):
+        # A 429 applies to the whole host, so every worker backs off together
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated_at = self.blocked_until
+
+
+def parse_retry_after(value: str) -> float:
+    """
+    Convert a Retry-After header (delay in seconds or HTTP date) to seconds.
+    """
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def create_session(pool_size: int = DEFAULT_JOBS) -> requests.Session:
+    """
+    Create a pooled HTTP session with keep-alive, compression and retries.
+
+    Args:
+        pool_size: Number of connections kept alive per host
+
+    Returns:
+        A requests.Session shared by all the fetches of a run
+    """
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        raise_on_status=False,
+        # 429 responses are handled by fetch_page to also throttle the host bucket
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {"Accept-Encoding": ACCEPT_ENCODING, "User-Agent": USER_AGENT}
+    )
+    return session
+
+
+def get_default_session() -> requests.Session:
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = create_session()
+        return _default_session
+
+
+def decode_body(content: bytes, content_type: str) -> tuple:
+    """
+    Decode a page body using its declared charset instead of charset sniffing.
+
+    The charset is read from the Content-Type header, then from a <meta>
+    tag at the start of the document, and defaults to UTF-8.
+
+    Returns:
+        Tuple of (decoded text, encoding used)
+    """
+    with span("decode", "fetch", bytes=len(content)):
+        match = CHARSET_HEADER_RE.search(content_type or "")
+        if not match:
+            match = CHARSET_META_RE.search(content[:META_CHARSET_SCAN_BYTES])
+        encoding = match.group(1) if match else "utf-8"
+        if isinstance(encoding, bytes):
+            encoding = encoding.decode("ascii")
+        try:
+            return content.decode(encoding, errors="replace"), encoding.lower()
+        except LookupError:
+            return content.decode("utf-8", errors="replace"), "utf-8"
+
+
+def _cached_page(url: str, entry: dict, cache_status: str, start: float) -> dict:
+    html, encoding = decode_body(entry["body"], entry.get("content_type"))
+    return {
+        "url": url,
+        "html": html,
+        "status_code": 200 if cache_status == "hit" else 304,
+        "wire_bytes": 0,
+        "decoded_bytes": len(entry["body"]),
+        "encoding": encoding,
+        "elapsed": time.monotonic() - start,
+        "retries": 0,
+        "cache": cache_status,
+    }
+
+
+def fetch_page(
+    url: str,
+    bucket: TokenBucket = None,
+    session: requests.Session = None,
+    cache: HttpCache = None,
+) -> dict:
+    """
+    Fetch a single page, waiting on the host bucket and honouring 429 responses.
+
+    With a cache, pages younger than its TTL are served from disk, and older
+    ones are revalidated with a conditional request.
+
+    Args:
+        url: The URL of the page
+        bucket: Rate limiter of the URL host, no throttling when None
+        session: Session used for the request (defaults to the shared session)
+        cache: On-disk HTTP cache, pages are always downloaded when None
+
+    Returns:
+        Dictionary with the decoded 'html' and the fetch statistics: 'status_code',
+        'wire_bytes' (as transferred), 'decoded_bytes' (after decompression),
+        'encoding', 'elapsed' (seconds), 'retries' and 'cache' (hit, revalidated,
+        miss or None when no cache is used)
+    """
+    with span("fetch", "fetch", url=url) as args:
+        page = _fetch_page(url, bucket, session, cache)
+        args.update(cache=page["cache"], retries=page["retries"])
+        return page
+
+
+def _fetch_page(
+    url: str, bucket: TokenBucket, session: requests.Session, cache: HttpCache
+) -> dict:
+    start = time.monotonic()
+    entry = cache.lookup(url) if cache else None
+    if entry and entry["is_fresh"]:
+        cache.touch(entry)
+        return _cached_page(url, entry, "hit", start)
+    headers = cache.conditional_headers(entry) if entry else {}
+
+    session = session or get_default_session()
+    retries = 0
+    for attempt in range(MAX_RATE_LIMITED_RETRIES + 1):
+        if bucket:
+            bucket.acquire()
+        response = session.get(url, headers=headers, timeout=DEFAULT_TIMEOUT)
+        if response.raw is not None and response.raw.retries is not None:
+            retries += len(response.raw.retries.history)
+        if response.status_code != 429 or attempt == MAX_RATE_LIMITED_RETRIES:
+            break
+        retries += 1
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        print(f"Rate limited on {url}, retrying in {retry_after:.1f}s")
+        if bucket:
+            bucket.block(retry_after)
+        else:
+            time.sleep(retry_after)
+
+    if entry and response.status_code == 304:
+        cache.touch(
+            entry,
+            revalidated=True,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        page = _cached_page(url, entry, "revalidated", start)
+        page["wire_bytes"] = response.raw.tell() if response.raw is not None else 0
+        page["retries"] = retries
+        return page
+    response.raise_for_status()
+
+    content = response.content
+    if cache:
+        cache.store(
+            url,
+            content,
+            response.headers.get("Content-Type"),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+    html, encoding = decode_body(content, response.headers.get("Content-Type"))
+    wire_bytes = response.raw.tell() if response.raw is not None else len(content)
+    return {
+        "url": url,
+        "html": html,
+        "status_code": response.status_code,
+        "wire_bytes": wire_bytes or len(content),
+        "decoded_bytes": len(content),
+        "encoding": encoding,
+        "elapsed": time.monotonic() - start,
+        "retries": retries,
+        "cache": "miss" if cache else None,
+    }
+
+
+def fetch_pages(
+    urls: List[str],
+    jobs: int = DEFAULT_JOBS,
+    host_rate: float = DEFAULT_HOST_RATE,
+    host_burst: int = DEFAULT_HOST_BURST,
+    session: requests.Session = None,
+    cache: HttpCache = None,
+) -> Dict[str, dict]:
+    """
+    Fetch a list of pages concurrently with a bounded pool of worker threads.
+
+    Each distinct URL is fetched once and every host gets its own token bucket.
+    All workers share one pooled session so connections are reused.
+
+    Args:
+        urls: The URLs to fetch, duplicates are fetched only once
+        jobs: Maximum number of pages fetched in parallel
+        host_rate: Requests per second allowed for each host
+        host_burst: Number of requests a host may receive in a burst
+        session: Session used for the requests (defaults to a new pooled session)
+        cache: On-disk HTTP cache shared by all the workers
+
+    Returns:
+        Dictionary mapping each URL to the page returned by fetch_page
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    buckets = {
+        host: TokenBucket(host_rate, host_burst)
+        for host in {urlsplit(url).netloc for url in unique_urls}
+    }
+    jobs = max(1, jobs)
+    session = session or create_session(pool_size=jobs)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            url: executor.submit(
+                fetch_page, url, buckets[urlsplit(url).netloc], session, cache
+            )
+            for url in unique_urls
+        }
+        return {url: future.result() for url, future in futures.items()}
+
+
+def format_transfer_summary(pages: List[dict]) -> str:
+    wire_bytes = sum(page["wire_bytes"] for page in pages)
+    decoded_bytes = sum(page["decoded_bytes"] for page in pages)
+    summary = (
+        f"Fetched {len(pages)} pages: {wire_bytes / 1024:.0f} KB on the wire, "
+        f"{decoded_bytes / 1024:.0f} KB decoded"
+    )
+    cache_statuses = [page["cache"] for page in pages if page.get("cache")]
+    if cache_statuses:
+        summary += (
+            f" (cache: {cache_statuses.count('hit')} hits, "
+            f"{cache_statuses.count('revalidated')} revalidated, "
+            f"{cache_statuses.count('miss')} misses)"
+        )
+    return summary
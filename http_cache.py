@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None
+
+DEFAULT_CACHE_DIR = ".cache/http"
+
+# Pages younger than this are served without contacting the server
+DEFAULT_TTL = 6 * 60 * 60
+
+# Bodies are evicted, least recently used first, above this total size
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class HttpCache:
+    """
+    Content-addressed on-disk cache of fetched pages.
+
+    Bodies are stored once under objects/<sha256 of the body>, and each URL has an
+    entry under entries/<sha256 of the URL>.json holding the body hash, the ETag and
+    Last-Modified validators and the access times used for TTL and LRU eviction.
+    A lock file serialises writers so several runs can share one directory.
+
+    Args:
+        cache_dir: Directory holding the cache
+        ttl: Seconds during which a stored page is served without revalidation
+        max_bytes: Maximum total size of the stored bodies
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(cache_dir, "entries")
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    @contextmanager
+    def lock(self, exclusive: bool = True):
+        with open(os.path.join(self.cache_dir, "lock"), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _entry_path(self, url: str) -> str:
+        url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.entries_dir, f"{url_hash}.json")
+
+    def _object_path(self, body_hash: str) -> str:
+        return os.path.join(self.objects_dir, body_hash)
+
+    def _write_atomic(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _write_entry(self, entry: dict):
+        self._write_atomic(
+            self._entry_path(entry["url"]), json.dumps(entry).encode("utf-8")
+        )
+
+    def lookup(self, url: str):
+        """
+        Return the cached entry of a URL with its 'body', or None when not cached.
+
+        The entry also carries 'is_fresh', True while it is younger than the TTL.
+        """
+        with self.lock(exclusive=False):
+            try:
+                with open(self._entry_path(url)) as f:
+                    entry = json.load(f)
+                with open(self._object_path(entry["body_hash"]), "rb") as f:
+                    body = f.read()
+            except (OSError, ValueError, KeyError):
+                return None
+        entry["body"] = body
+        entry["is_fresh"] = time.time() - entry["validated_at"] < self.ttl
+        return entry
+
+    def conditional_headers(self, entry: dict) -> dict:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(
+        self,
+        entry: dict,
+        revalidated: bool = False,
+        etag: str = None,
+        last_modified: str = None,
+    ):
+        """
+        Record an access to a cached entry, and a successful revalidation (304).
+
+        The entry is read again under the lock, so a page stored meanwhile by
+        another run is kept. A revalidation only applies to the body it was made
+        for, and the validators sent with the 304, if any, replace the stored ones.
+        """
+        now = time.time()
+        with self.lock():
+            try:
+                with open(self._entry_path(entry["url"])) as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                # Evicted since the lookup
+                return
+            stored["last_access"] = now
+            if revalidated and stored.get("body_hash") == entry["body_hash"]:
+                stored["validated_at"] = now
+                if etag:
+                    stored["etag"] = etag
+                if last_modified:
+                    stored["last_modified"] = last_modified
+            self._write_entry(stored)
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        content_type: str = None,
+        etag: str = None,
+        last_modified: str = None,
+    ):
+        """
+        Store a freshly downloaded page and evict old bodies if over the size limit.
+        """
+        now = time.time()
+        body_hash = hashlib.sha256(body).hexdigest()
+        entry = {
+            "url": url,
+            "body_hash": body_hash,
+            "size": len(body),
+            "content_type": content_type,
+            "etag": etag,
+            "last_modified": last_modified,
+            "validated_at": now,
+            "last_access": now,
+        }
+        with self.lock():
+            object_path = self._object_path(body_hash)
+            if not os.path.exists(object_path):
+                self._write_atomic(object_path, body)
+            self._write_entry(entry)
+            self._evict()
+
+    def _evict(self):
+        # Must be called with the exclusive lock held
+        entries = []
+        for name in os.listdir(self.entries_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.entries_dir, name)
+            try:
+                with open(path) as f:
+                    entries.append((path, json.load(f)))
+            except (OSError, ValueError):
+                os.unlink(path)
+
+        # Identical bodies are shared, so the size is counted once per object
+        object_sizes = {entry["body_hash"]: entry["size"] for _, entry in entries}
+        total_size = sum(object_sizes.values())
+        referenced = {body_hash: 0 for body_hash in object_sizes}
+        for _, entry in entries:
+            referenced[entry["body_hash"]] += 1
+
+        for path, entry in sorted(entries, key=lambda item: item[1]["last_access"]):
+            if total_size <= self.max_bytes:
+                break
+            os.unlink(path)
+            referenced[entry["body_hash"]] -= 1
+            if referenced[entry["body_hash"]] == 0:
+                total_size -= entry["size"]
+
+        # Remove the bodies that no entry points to anymore
+        for name in os.listdir(self.objects_dir):
+            if not name.endswith(".tmp") and not referenced.get(name):
+                os.unlink(self._object_path(name))
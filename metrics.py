@@ -0,0 +1,274 @@
+import time
+from typing import Dict, List
+
+from output_writer import write_if_changed
+
+# Upper bounds in seconds of the fetch latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Number of slowest pages listed in the summary
+SLOWEST_PAGES = 5
+
+METRIC_PREFIX = "bigquery_doc_parser"
+
+
+def collect_run_metrics(
+    pages: Dict[str, dict],
+    parsed_urls: List[str],
+    models: Dict[str, dict],
+    skipped_keys: List[str],
+    duration: float,
+) -> dict:
+    """
+    Gather the metrics of a generate_all run.
+
+    Args:
+        pages: The pages by URL, as returned by fetch_pages
+        parsed_urls: The URLs whose page was parsed
+        models: The result of generate_model_files of every rebuilt key
+        skipped_keys: The keys skipped as up to date
+        duration: Duration of the run in seconds
+
+    Returns:
+        Dictionary with the 'pages' (per-URL 'status_code', 'elapsed',
+        'wire_bytes', 'decoded_bytes', 'retries', 'cache'), the 'status_codes',
+        'cache' and 'latency_buckets' counts, the 'wire_bytes', 'decoded_bytes'
+        and 'retries' totals, 'pages_parsed', 'columns' (per rebuilt key),
+        'files_written', 'files_unchanged', 'targets_rebuilt', 'targets_skipped',
+        'warnings' (per rebuilt key that had any) and 'duration'
+    """
+    fetches = {
+        url: {
+            field: page.get(field)
+            for field in (
+                "status_code",
+                "elapsed",
+                "wire_bytes",
+                "decoded_bytes",
+                "retries",
+                "cache",
+            )
+        }
+        for url, page in pages.items()
+    }
+    status_codes = {}
+    cache = {"hit": 0, "revalidated": 0, "miss": 0}
+    for fetch in fetches.values():
+        status_code = fetch["status_code"]
+        status_codes[status_code] = status_codes.get(status_code, 0) + 1
+        if fetch["cache"]:
+            cache[fetch["cache"]] += 1
+
+    latency_buckets = {
+        bound: sum(1 for fetch in fetches.values() if fetch["elapsed"] <= bound)
+        for bound in LATENCY_BUCKETS
+    }
+    files_written = sum(len(model["written"]) for model in models.values())
+    files = sum(len(model["outputs"]) for model in models.values())
+    return {
+        "pages": fetches,
+        "status_codes": dict(sorted(status_codes.items())),
+        "cache": cache,
+        "latency_buckets": latency_buckets,
+        "wire_bytes": sum(fetch["wire_bytes"] for fetch in fetches.values()),
+        "decoded_bytes": sum(fetch["decoded_bytes"] for fetch in fetches.values()),
+        "retries": sum(fetch["retries"] for fetch in fetches.values()),
+        "pages_parsed": len(parsed_urls),
+        "columns": {key: model["columns"] for key, model in models.items()},
+        "files_written": files_written,
+        "files_unchanged": files - files_written,
+        "targets_rebuilt": len(models),
+        "targets_skipped": len(skipped_keys),
+        "warnings": {
+            key: model["warnings"] for key, model in models.items() if model["warnings"]
+        },
+        "duration": duration,
+    }
+
+
+def format_metrics_summary(metrics: dict) -> str:
+    """
+    Return the end-of-run summary of the metrics, one fact per line.
+    """
+    cache = metrics["cache"]
+    status_codes = ", ".join(
+        f"{count} x {status_code}"
+        for status_code, count in metrics["status_codes"].items()
+    )
+    lines = [
+        f"Run metrics ({metrics['duration']:.1f}s):",
+        f"  pages: {len(metrics['pages'])} ({status_codes}), "
+        f"{metrics['retries']} retries",
+        f"  transfer: {metrics['wire_bytes'] / 1024:.0f} KB on the wire, "
+        f"{metrics['decoded_bytes'] / 1024:.0f} KB decoded",
+        f"  cache: {cache['hit']} hits, {cache['revalidated']} revalidated, "
+        f"{cache['miss']} misses",
+        f"  parsed: {metrics['pages_parsed']} pages, "
+        f"{sum(metrics['columns'].values())} columns in "
+        f"{metrics['targets_rebuilt']} rebuilt models, "
+        f"{metrics['targets_skipped']} skipped",
+        f"  files: {metrics['files_written']} written, "
+        f"{metrics['files_unchanged']} unchanged",
+    ]
+    warnings = metrics["warnings"]
+    if warnings:
+        lines.append(f"  warnings: {sum(len(w) for w in warnings.values())}")
+        lines += [
+            f"    {key}: {warning}"
+            for key, key_warnings in warnings.items()
+            for warning in key_warnings
+        ]
+    slowest = sorted(
+        metrics["pages"].items(), key=lambda item: item[1]["elapsed"], reverse=True
+    )[:SLOWEST_PAGES]
+    if slowest and slowest[0][1]["elapsed"] > 0:
+        lines.append("  slowest pages:")
+        lines += [
+            f"    {fetch['elapsed']:.2f}s {url}"
+            for url, fetch in slowest
+            if fetch["elapsed"] > 0
+        ]
+    return "\n".join(lines)
+
+
+def _labels(**labels) -> str:
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in labels.values()
+    )
+    return (
+        "{"
+        + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+        + "}"
+    )
+
+
+def format_prometheus(metrics: dict, timestamp: float = None) -> str:
+    """
+    Return the metrics in the Prometheus text exposition format.
+    """
+    prefix = METRIC_PREFIX
+    lines = []
+
+    def metric(name: str, kind: str, help: str, samples: List[tuple]):
+        lines.append(f"# HELP {prefix}_{name} {help}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{prefix}_{name}{suffix}{labels} {value}")
+
+    pages = metrics["pages"]
+    metric(
+        "fetch_duration_seconds",
+        "gauge",
+        "Duration of the fetch of each page.",
+        [("", _labels(url=url), fetch["elapsed"]) for url, fetch in pages.items()],
+    )
+    metric(
+        "fetch_response_bytes",
+        "gauge",
+        "Size of each page, as transferred and after decoding.",
+        [
+            ("", _labels(url=url, encoding=encoding), fetch[f"{encoding}_bytes"])
+            for url, fetch in pages.items()
+            for encoding in ("wire", "decoded")
+        ],
+    )
+    metric(
+        "fetch_retries",
+        "gauge",
+        "Retries needed to fetch each page.",
+        [("", _labels(url=url), fetch["retries"]) for url, fetch in pages.items()],
+    )
+    metric(
+        "fetch_responses",
+        "gauge",
+        "Pages by final HTTP status code.",
+        [
+            ("", _labels(code=status_code), count)
+            for status_code, count in metrics["status_codes"].items()
+        ],
+    )
+    metric(
+        "fetch_latency_seconds",
+        "histogram",
+        "Distribution of the page fetch durations.",
+        [
+            ("_bucket", _labels(le=bound), count)
+            for bound, count in metrics["latency_buckets"].items()
+        ]
+        + [
+            ("_bucket", _labels(le="+Inf"), len(pages)),
+            ("_sum", "", sum(fetch["elapsed"] for fetch in pages.values())),
+            ("_count", "", len(pages)),
+        ],
+    )
+    metric(
+        "cache_requests",
+        "gauge",
+        "Pages served by the HTTP cache (hit), revalidated or downloaded (miss).",
+        [
+            ("", _labels(result=result), count)
+            for result, count in metrics["cache"].items()
+        ],
+    )
+    metric(
+        "pages_parsed",
+        "gauge",
+        "Pages parsed during the run.",
+        [("", "", metrics["pages_parsed"])],
+    )
+    metric(
+        "model_columns",
+        "gauge",
+        "Columns of each rebuilt model.",
+        [("", _labels(key=key), count) for key, count in metrics["columns"].items()],
+    )
+    metric(
+        "files",
+        "gauge",
+        "Files of the rebuilt models written or left unchanged.",
+        [
+            ("", _labels(result="written"), metrics["files_written"]),
+            ("", _labels(result="unchanged"), metrics["files_unchanged"]),
+        ],
+    )
+    metric(
+        "targets",
+        "gauge",
+        "Targets rebuilt or skipped as up to date.",
+        [
+            ("", _labels(result="rebuilt"), metrics["targets_rebuilt"]),
+            ("", _labels(result="skipped"), metrics["targets_skipped"]),
+        ],
+    )
+    metric(
+        "model_warnings",
+        "gauge",
+        "Warnings raised while rendering each rebuilt model.",
+        [
+            ("", _labels(key=key), len(warnings))
+            for key, warnings in metrics["warnings"].items()
+        ],
+    )
+    metric(
+        "run_duration_seconds",
+        "gauge",
+        "Duration of the run.",
+        [("", "", metrics["duration"])],
+    )
+    metric(
+        "last_run_timestamp_seconds",
+        "gauge",
+        "Time the run finished.",
+        [("", "", timestamp if timestamp is not None else time.time())],
+    )
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path: str, metrics: dict):
+    """
+    Write the metrics for the node_exporter textfile collector.
+
+    The file is replaced atomically so the collector never reads a partial file.
+    """
+    write_if_changed(path, format_prometheus(metrics))
@@ -0,0 +1,83 @@
+import glob
+import hashlib
+import os
+import tempfile
+from typing import Iterable, List
+
+from tracing import span
+
+# Generated models are named information_schema_<key>.sql / .yml
+GENERATED_FILE_PATTERNS = ("information_schema_*.sql", "information_schema_*.yml")
+
+# Permissions of the written files, as open() would create them with a 022 umask
+FILE_MODE = 0o644
+
+
+def _file_hash(path: str) -> str:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """
+    Write a file atomically, only when its content differs from the existing one.
+
+    Unchanged files keep their modification time, so tools watching them (like dbt
+    partial parsing) do not see them as modified. The content goes to a temporary
+    file in the same directory, then replaces the target in one step.
+
+    Args:
+        path: Path of the file, its directory is created if needed
+        content: The new content of the file
+
+    Returns:
+        True when the file was written, False when it was already up to date
+    """
+    with span("write", "write", path=path) as args:
+        data = content.encode("utf-8")
+        args["written"] = False
+        if _file_hash(path) == hashlib.sha256(data).hexdigest():
+            return False
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        args["written"] = True
+        return True
+
+
+def prune_generated_files(output_dir: str, expected_paths: Iterable[str]) -> List[str]:
+    """
+    Delete the generated models that are not expected anymore, for instance those of
+    a key removed from pages_to_process, and the directories left empty.
+
+    Args:
+        output_dir: Directory of the generated models
+        expected_paths: Paths of the files the current configuration generates
+
+    Returns:
+        The paths of the deleted files
+    """
+    expected = {os.path.normpath(path) for path in expected_paths}
+    removed = []
+    for pattern in GENERATED_FILE_PATTERNS:
+        for path in glob.glob(os.path.join(output_dir, "*", pattern)):
+            if os.path.normpath(path) not in expected:
+                os.unlink(path)
+                removed.append(path)
+
+    for directory in {os.path.dirname(path) for path in removed}:
+        if not os.listdir(directory):
+            os.rmdir(directory)
+    return sorted(removed)
@@ -0,0 +1,121 @@
+import gzip
+import json
+import os
+from typing import Dict, List
+
+# Maps each recorded key to the URL its page was fetched from
+INDEX_FILE = "index.json"
+
+
+def _read_index(corpus_dir: str) -> dict:
+    index_path = os.path.join(corpus_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, "r") as f:
+        return json.load(f)
+
+
+def record_pages(
+    corpus_dir: str, targets_by_url: Dict[str, List[str]], pages: Dict[str, dict]
+):
+    """
+    Save fetched pages as <key>.html files so a run can be replayed offline.
+
+    Args:
+        corpus_dir: Directory of the recorded corpus, created if needed
+        targets_by_url: The keys of pages_to_process grouped by URL
+        pages: The fetched pages by URL, as returned by fetch_pages
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    index = _read_index(corpus_dir)
+    for url, keys in targets_by_url.items():
+        for key in keys:
+            with open(
+                os.path.join(corpus_dir, f"{key}.html"),
+                "w",
+                encoding="utf-8",
+                newline="",
+            ) as f:
+                f.write(pages[url]["html"])
+            index[key] = url
+
+    with open(os.path.join(corpus_dir, INDEX_FILE), "w") as f:
+        json.dump(dict(sorted(index.items())), f, indent=2)
+        f.write("\n")
+
+
+def replay_pages(
+    corpus_dir: str, targets_by_url: Dict[str, List[str]]
+) -> Dict[str, dict]:
+    """
+    Load recorded pages instead of fetching them.
+
+    A page recorded for any key with the same URL can be used, and a key
+    recorded with a different URL than the configured one is not.
+
+    Args:
+        corpus_dir: Directory of the recorded corpus
+        targets_by_url: The keys of pages_to_process grouped by URL
+
+    Returns:
+        Dictionary mapping each URL to a page shaped like the fetch_page result
+    """
+    index = _read_index(corpus_dir)
+    key_by_url = {}
+    for key, url in index.items():
+        key_by_url.setdefault(url, key)
+
+    missing = [url for url in targets_by_url if url not in key_by_url]
+    if missing:
+        raise FileNotFoundError(
+            f"No page recorded in {corpus_dir} for: {', '.join(missing)}"
+        )
+
+    pages = {}
+    for url in targets_by_url:
+        with open(
+            os.path.join(corpus_dir, f"{key_by_url[url]}.html"),
+            "r",
+            encoding="utf-8",
+            newline="",
+        ) as f:
+            html = f.read()
+        pages[url] = {
+            "url": url,
+            "html": html,
+            "status_code": 200,
+            "wire_bytes": 0,
+            "decoded_bytes": len(html.encode("utf-8")),
+            "encoding": "utf-8",
+            "elapsed": 0.0,
+            "retries": 0,
+            "cache": None,
+        }
+    return pages
+
+
+def dump_pages(
+    dump_dir: str, targets_by_url: Dict[str, List[str]], pages: Dict[str, dict]
+) -> List[str]:
+    """
+    Save a gzip-compressed copy of the page of each key, to debug the parser.
+
+    Args:
+        dump_dir: Directory of the <key>.html.gz files, created if needed
+        targets_by_url: The keys of pages_to_process grouped by URL
+        pages: The pages by URL, as returned by fetch_pages
+
+    Returns:
+        The paths of the written files
+    """
+    os.makedirs(dump_dir, exist_ok=True)
+    paths = []
+    for url, keys in targets_by_url.items():
+        # A null mtime keeps the archive identical for an identical page
+        data = gzip.compress(pages[url]["html"].encode("utf-8"), mtime=0)
+        for key in keys:
+            path = os.path.join(dump_dir, f"{key}.html.gz")
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+    return paths
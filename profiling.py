@@ -0,0 +1,188 @@
+import cProfile
+import os
+import pstats
+from contextlib import contextmanager
+from typing import Dict, List
+
+from output_writer import write_if_changed
+
+# Number of functions in the hotspot table
+DEFAULT_TOP = 20
+
+# Call paths holding less time than this are left out of the collapsed stacks
+MIN_STACK_SECONDS = 1e-6
+
+
+class _RawProfile:
+    # pstats.Stats loads any object with a create_stats method and a stats dict,
+    # this wraps the stats of a cProfile.Profile sent back by a worker process
+    def __init__(self, stats: dict):
+        self.stats = dict(stats)
+
+    def create_stats(self):
+        pass
+
+
+@contextmanager
+def profile(enabled: bool = True):
+    """
+    Profile a block with cProfile.
+
+    The yielded dictionary holds the raw profile under 'stats' after the block, a
+    picklable dict that a worker process can return, or None when disabled.
+    """
+    result = {"stats": None}
+    if not enabled:
+        yield result
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        profiler.create_stats()
+        result["stats"] = profiler.stats
+
+
+def merge_profiles(raw_profiles: List[dict]) -> pstats.Stats:
+    """
+    Return the pstats.Stats of several raw profiles, see profile().
+    """
+    raw_profiles = [raw for raw in raw_profiles if raw is not None]
+    stats = pstats.Stats(_RawProfile(raw_profiles[0]))
+    for raw in raw_profiles[1:]:
+        stats.add(_RawProfile(raw))
+    return stats
+
+
+def function_label(func: tuple) -> str:
+    """
+    Return 'file.py:line(name)' for a pstats function key, the name only for the
+    built-in functions.
+    """
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> List[str]:
+    """
+    Return the profile as collapsed stacks, one 'root;caller;function count' line
+    per call path with the own time of the function in microseconds, the input
+    of flamegraph.pl, speedscope or inferno.
+
+    cProfile only records the direct callers of each function, not the full call
+    paths, so the time of a function called from several paths is split between
+    them in proportion of the time spent under each caller.
+
+    Args:
+        stats: The profile, see merge_profiles
+
+    Returns:
+        The collapsed stack lines, sorted
+    """
+    children = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            # edge is (primitive calls, calls, own time, cumulative time)
+            children.setdefault(caller, []).append((func, edge[3]))
+
+    times = {}
+
+    def walk(func: tuple, seconds: float, path: List[tuple]):
+        _, _, own_time, cumulative_time, _ = stats.stats[func]
+        share = seconds / cumulative_time if cumulative_time else 0.0
+        path = path + [func]
+        stack = ";".join(function_label(f).replace(";", ",") for f in path)
+        times[stack] = times.get(stack, 0.0) + own_time * share
+        for child, child_seconds in children.get(func, []):
+            # Recursive calls are already counted in the cumulative time
+            if child not in path and child_seconds * share >= MIN_STACK_SECONDS:
+                walk(child, child_seconds * share, path)
+
+    for func, (_, _, _, cumulative_time, callers) in stats.stats.items():
+        if not callers:
+            walk(func, cumulative_time, [])
+
+    return sorted(
+        f"{stack} {round(seconds * 1e6)}"
+        for stack, seconds in times.items()
+        if round(seconds * 1e6) > 0
+    )
+
+
+def format_hotspot_table(stats: pstats.Stats, top: int = DEFAULT_TOP) -> List[str]:
+    """
+    Return the lines of a table of the functions with the most own time.
+    """
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    lines = [f"  {'own (s)':>9} {'cum (s)':>9} {'calls':>9}  function"]
+    lines += [
+        f"  {own_time:9.3f} {cumulative_time:9.3f} {calls:9d}  {function_label(func)}"
+        for func, (_, calls, own_time, cumulative_time, _) in rows[:top]
+    ]
+    return lines
+
+
+class ProfileReport:
+    """
+    Profiles of the targets of a run, written as <key>.pstats and <key>.collapsed
+    files, and their hotspots over the whole run.
+
+    Args:
+        profile_dir: Directory of the profile files
+        top: Number of functions in the hotspot table
+    """
+
+    def __init__(self, profile_dir: str, top: int = DEFAULT_TOP):
+        self.profile_dir = profile_dir
+        self.top = top
+        self.key_times: Dict[str, float] = {}
+        self._run_profiles: Dict[int, dict] = {}
+
+    def add(self, key: str, raw_profiles: List[dict]) -> List[str]:
+        """
+        Write the profile of a key, merged from the raw profiles of its stages.
+
+        A raw profile shared by several keys, like the extraction of a shared
+        page, is in the file of each key but counted once in the hotspots.
+
+        Returns:
+            The paths of the .pstats and .collapsed files
+        """
+        raw_profiles = [raw for raw in raw_profiles if raw is not None]
+        stats = merge_profiles(raw_profiles)
+        for raw in raw_profiles:
+            self._run_profiles[id(raw)] = raw
+        self.key_times[key] = stats.total_tt
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        pstats_path = os.path.join(self.profile_dir, f"{key}.pstats")
+        stats.dump_stats(pstats_path)
+        collapsed_path = os.path.join(self.profile_dir, f"{key}.collapsed")
+        write_if_changed(collapsed_path, "\n".join(collapsed_stacks(stats)) + "\n")
+        return [pstats_path, collapsed_path]
+
+    def format_hotspots(self) -> str:
+        """
+        Return the hotspots of the run: the functions with the most own time over
+        all the profiled keys, then the slowest keys.
+        """
+        if not self.key_times:
+            return "No profiled target."
+        stats = merge_profiles(list(self._run_profiles.values()))
+        slowest_keys = sorted(
+            self.key_times.items(), key=lambda item: item[1], reverse=True
+        )[: self.top]
+        lines = [
+            f"Top {self.top} functions by own time over {len(self.key_times)} "
+            f"profiled targets ({stats.total_tt:.2f}s):"
+        ]
+        lines += format_hotspot_table(stats, self.top)
+        lines.append("Slowest targets:")
+        lines += [f"  {seconds:9.3f}s {key}" for key, seconds in slowest_keys]
+        lines.append(f"Profiles written to {self.profile_dir}")
+        return "\n".join(lines)
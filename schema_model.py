@@ -0,0 +1,161 @@
+import json
+import os
+from typing import List
+
+from output_writer import write_if_changed
+
+DEFAULT_SCHEMA_DIR = ".cache/schemas"
+
+# Scopes of the views queried within a project, given by a PROJECT_ID qualifier or
+# the default project of the connection, whose models get a config() block
+PROJECT_SCOPES = ("region", "project", "dataset")
+
+
+def scope_has_project(scope: List[str]) -> bool:
+    """
+    Return whether a view of these scopes is queried within a project, see
+    scope_from_scan.
+    """
+    return any(name in PROJECT_SCOPES for name in scope)
+
+
+class Column:
+    """
+    A row of the schema table of a documentation page.
+
+    Struct fields are separate columns named <struct>.<field>.
+    """
+
+    __slots__ = ("name", "type", "description")
+
+    def __init__(self, name: str, type: str, description: str):
+        self.name = name
+        self.type = type
+        self.description = description
+
+    def __eq__(self, other):
+        return isinstance(other, Column) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Column({self.name!r}, {self.type!r})"
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "type": self.type, "description": self.description}
+
+    @classmethod
+    def from_dict(cls, column: dict) -> "Column":
+        return cls(column["name"], column["type"], column["description"])
+
+
+class TableSchema:
+    """
+    The facts extracted from a documentation page, shared by all its targets.
+
+    This is the boundary between extraction and rendering: the models are rendered
+    from a TableSchema and the target settings only, so it can be cached and
+    rendered again without the HTML.
+
+    Args:
+        table_name: Name of the INFORMATION_SCHEMA view, None when not found
+        required_role: Text of the required permissions section
+        scope: Qualifiers accepted by the view, see scope_from_scan
+        partitioning_key: Column the underlying data is partitioned by, if any
+        clustering_columns: Columns the underlying data is clustered by
+        columns: Rows of the schema table
+    """
+
+    __slots__ = (
+        "table_name",
+        "required_role",
+        "scope",
+        "partitioning_key",
+        "clustering_columns",
+        "columns",
+    )
+
+    def __init__(
+        self,
+        table_name: str,
+        required_role: str,
+        scope: List[str],
+        partitioning_key: str,
+        clustering_columns: List[str],
+        columns: List[Column],
+    ):
+        self.table_name = table_name
+        self.required_role = required_role
+        self.scope = scope
+        self.partitioning_key = partitioning_key
+        self.clustering_columns = clustering_columns
+        self.columns = columns
+
+    @property
+    def has_project_id_scope(self) -> bool:
+        return scope_has_project(self.scope)
+
+    def __eq__(self, other):
+        return isinstance(other, TableSchema) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"TableSchema({self.table_name!r}, {len(self.columns)} columns)"
+
+    def to_dict(self) -> dict:
+        return {
+            "table_name": self.table_name,
+            "required_role": self.required_role,
+            "scope": list(self.scope),
+            "partitioning_key": self.partitioning_key,
+            "clustering_columns": list(self.clustering_columns),
+            "columns": [column.to_dict() for column in self.columns],
+        }
+
+    @classmethod
+    def from_dict(cls, schema: dict) -> "TableSchema":
+        """
+        Build a schema from its to_dict() form or from the facts of extract_page.
+        """
+        return cls(
+            schema["table_name"],
+            schema["required_role"],
+            list(schema["scope"]),
+            schema["partitioning_key"],
+            list(schema["clustering_columns"]),
+            [Column.from_dict(column) for column in schema["columns"]],
+        )
+
+
+class SchemaCache:
+    """
+    On-disk cache of the extracted schema of each key, as <key>.json files.
+
+    Each file also holds the URL and the page hash the schema was extracted from,
+    so an entry is not used for a key whose URL changed in the configuration.
+
+    Args:
+        schema_dir: Directory holding the cache
+    """
+
+    def __init__(self, schema_dir: str = DEFAULT_SCHEMA_DIR):
+        self.schema_dir = schema_dir
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.schema_dir, f"{key}.json")
+
+    def load(self, key: str, url: str):
+        """
+        Return the cached entry of a key, with its 'schema' as a TableSchema and
+        its 'page_hash', or None when not cached for this URL.
+        """
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        entry["schema"] = TableSchema.from_dict(entry["schema"])
+        return entry
+
+    def store(self, key: str, url: str, page_hash: str, schema: TableSchema):
+        entry = {"url": url, "page_hash": page_hash, "schema": schema.to_dict()}
+        write_if_changed(self._path(key), json.dumps(entry, indent=2) + "\n")
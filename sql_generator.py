@@ -2,6 +2,304 @@ import textwrap
 from typing import List
 
 
+# Partition granularities BigQuery accepts for each partitioning column type
+PARTITION_GRANULARITIES = {
+    "timestamp": ("hour", "day", "month", "year"),
+    "datetime": ("hour", "day", "month", "year"),
+    "date": ("day", "month", "year"),
+}
+
+# INFORMATION_SCHEMA views keep 180 days of history, expire partitions with it
+DEFAULT_PARTITION_EXPIRATION_DAYS = 180
+
+# Most partitions a single job can write: a full refresh of an hourly model over
+# the 180 days of history (4,320 partitions) fails
+MAX_PARTITIONS_PER_JOB = 4000
+
+_PARTITIONS_PER_DAY = {"hour": 24, "day": 1, "month": 1 / 28, "year": 1 / 365}
+
+
+def partitioning_key_error(partitioning_key: str, columns: List[dict]) -> str:
+    """
+    Return why a model cannot be partitioned by a column, None when it can.
+
+    Args:
+        partitioning_key: The partitioning column
+        columns: The columns of the model, with 'name' and 'data_type'
+    """
+    column_types = {column["name"].lower(): column["data_type"] for column in columns}
+    data_type = column_types.get(partitioning_key.lower())
+    if data_type is None:
+        return f"Cannot partition by {partitioning_key}: not a column of the model"
+    if data_type.lower() not in PARTITION_GRANULARITIES:
+        return (
+            f"Cannot partition by {partitioning_key}: {data_type.lower()} is not a "
+            "timestamp, datetime or date column"
+        )
+    return None
+
+
+def partition_config(
+    partitioning_key: str, columns: List[dict], partitioning: dict = None
+) -> dict:
+    """
+    Choose the partitioning of a model partitioned by a column.
+
+    The data type comes from the documented type of the column. Partitions are
+    daily and expire after DEFAULT_PARTITION_EXPIRATION_DAYS, which keeps a full
+    refresh of the 180 days of history within MAX_PARTITIONS_PER_JOB and lets
+    queries prune by day.
+
+    Args:
+        partitioning_key: The partitioning column
+        columns: The columns of the model, with 'name' and 'data_type'
+        partitioning: Overrides of the defaults: 'granularity' (hour, day, month
+            or year), 'expiration_days' (None for no expiration) and
+            'require_partition_filter'
+
+    Returns:
+        Dictionary with the 'field', 'data_type', 'granularity',
+        'expiration_days' and 'require_partition_filter' of the partitioning
+
+    Raises:
+        ValueError: When the model cannot be partitioned by the column, see
+            partitioning_key_error, when the granularity is not valid for the
+            column type, or when a full refresh would write more than
+            MAX_PARTITIONS_PER_JOB
+    """
+    error = partitioning_key_error(partitioning_key, columns)
+    if error:
+        raise ValueError(error)
+    partitioning = partitioning or {}
+    column_types = {column["name"].lower(): column["data_type"] for column in columns}
+    data_type = column_types[partitioning_key.lower()].lower()
+
+    granularity = partitioning.get("granularity", "day")
+    if granularity not in PARTITION_GRANULARITIES[data_type]:
+        raise ValueError(
+            f"Invalid partition granularity {granularity!r} for the {data_type} "
+            f"column {partitioning_key}, expected one of "
+            f"{', '.join(PARTITION_GRANULARITIES[data_type])}"
+        )
+
+    expiration_days = partitioning.get(
+        "expiration_days", DEFAULT_PARTITION_EXPIRATION_DAYS
+    )
+    history_days = min(
+        expiration_days or DEFAULT_PARTITION_EXPIRATION_DAYS,
+        DEFAULT_PARTITION_EXPIRATION_DAYS,
+    )
+    partitions = history_days * _PARTITIONS_PER_DAY[granularity]
+    if partitions > MAX_PARTITIONS_PER_JOB:
+        raise ValueError(
+            f"{granularity.capitalize()} partitions over {history_days} days make "
+            f"{partitions:.0f} partitions, more than the {MAX_PARTITIONS_PER_JOB} "
+            "a BigQuery job can write: use a coarser granularity or a shorter "
+            "expiration"
+        )
+
+    return {
+        "field": partitioning_key,
+        "data_type": data_type,
+        "granularity": granularity,
+        "expiration_days": expiration_days,
+        "require_partition_filter": partitioning.get(
+            "require_partition_filter", False
+        ),
+    }
+
+
+# Incremental strategies of dbt-bigquery the models can use
+INCREMENTAL_STRATEGIES = ("insert_overwrite", "merge")
+
+# dbt variable holding the hours of history re-read by an incremental run
+DEFAULT_LOOKBACK_VAR = "dbt_bigquery_monitoring_lookback_hours"
+DEFAULT_LOOKBACK_HOURS = 24
+
+_CURRENT_TIME_FUNCTIONS = {
+    "timestamp": ("TIMESTAMP", "CURRENT_TIMESTAMP()"),
+    "datetime": ("DATETIME", "CURRENT_DATETIME()"),
+    "date": ("DATE", "CURRENT_DATE()"),
+}
+
+
+def incremental_config(
+    incremental: dict, partition_by: dict, columns: List[dict]
+) -> dict:
+    """
+    Check the incremental settings of a model.
+
+    Incremental models only read the recent partitions of the view, so they need
+    a partitioning column.
+
+    Args:
+        incremental: 'strategy' (insert_overwrite or merge), 'unique_key' (a
+            column or a list of columns, required by merge), 'lookback_var' and
+            'lookback_hours', the dbt variable holding the hours of history
+            re-read by each run and its default value
+        partition_by: Partitioning of the model, see partition_config
+        columns: The columns of the model, with 'name' and 'data_type'
+
+    Returns:
+        Dictionary with the 'strategy', the 'unique_key' (lowercase names or None),
+        the 'lookback_var' and the 'lookback_hours'
+
+    Raises:
+        ValueError: When the settings are invalid for the model
+    """
+    strategy = incremental.get("strategy", "insert_overwrite")
+    if strategy not in INCREMENTAL_STRATEGIES:
+        raise ValueError(
+            f"Invalid incremental strategy {strategy!r}, expected one of "
+            f"{', '.join(INCREMENTAL_STRATEGIES)}"
+        )
+    if not partition_by:
+        raise ValueError(
+            "Incremental models need a partitioning column to read recent data only"
+        )
+
+    unique_key = incremental.get("unique_key")
+    if isinstance(unique_key, str):
+        unique_key = [unique_key]
+    if strategy == "merge":
+        if not unique_key:
+            raise ValueError("The merge incremental strategy needs a unique_key")
+        column_names = {column["name"].lower() for column in columns}
+        missing = [name for name in unique_key if name.lower() not in column_names]
+        if missing:
+            raise ValueError(f"Invalid unique_key columns {missing}: not in the model")
+        unique_key = [name.lower() for name in unique_key]
+    else:
+        # insert_overwrite replaces whole partitions and ignores the unique key
+        unique_key = None
+
+    return {
+        "strategy": strategy,
+        "unique_key": unique_key,
+        "lookback_var": incremental.get("lookback_var", DEFAULT_LOOKBACK_VAR),
+        "lookback_hours": incremental.get("lookback_hours", DEFAULT_LOOKBACK_HOURS),
+    }
+
+
+def incremental_filter(partition_by: dict, incremental: dict) -> str:
+    """
+    Render the filter of the rows read by an incremental run.
+
+    The lookback is rounded down to the partition granularity, so every partition
+    an insert_overwrite replaces is read whole.
+    """
+    type_name, current_time = _CURRENT_TIME_FUNCTIONS[partition_by["data_type"]]
+    lookback = (
+        f"{{{{ var('{incremental['lookback_var']}', "
+        f"{incremental['lookback_hours']}) }}}}"
+    )
+    if type_name == "DATE":
+        since = f"DATE_SUB({current_time}, INTERVAL DIV({lookback}, 24) DAY)"
+    else:
+        since = f"{type_name}_SUB({current_time}, INTERVAL {lookback} HOUR)"
+    granularity = partition_by["granularity"].upper()
+    return (
+        "{% if is_incremental() %}\n"
+        f"WHERE {partition_by['field']} >= "
+        f"{type_name}_TRUNC({since}, {granularity})\n"
+        "{% endif %}"
+    )
+
+
+def _model_partition_by(
+    partitioning_key: str, columns: List[dict], partitioning: dict
+) -> dict:
+    partition_by = (
+        partition_config(partitioning_key, columns, partitioning)
+        if partitioning_key
+        else None
+    )
+    # Configured partitioning settings must not be silently ignored
+    if partitioning and partition_by is None:
+        raise ValueError(
+            f"Partitioning settings {sorted(partitioning)} are set but the model has "
+            "no partitioning column"
+        )
+    return partition_by
+
+
+def _quoted_list(values: List[str]) -> str:
+    return '["' + '", "'.join(values) + '"]'
+
+
+def generate_config_block(
+    materialization: str = None,
+    enabled: bool = None,
+    tags: List[str] = None,
+    partition_by: dict = None,
+    cluster_by: List[str] = None,
+    incremental: dict = None,
+) -> str:
+    """
+    Render the dbt config() call of a model.
+
+    Args:
+        materialization: Materialization of the model, defaults to the one chosen
+            by the dbt_bigquery_monitoring_materialization() macro
+        enabled: Whether the model is enabled, left to dbt when None
+        tags: Tags of the model
+        partition_by: Partitioning of the table, see partition_config, if any
+        cluster_by: Columns the table is clustered by, if any
+        incremental: Incremental settings, see incremental_config, rendered as an
+            incremental model instead of the default materialization
+
+    Raises:
+        ValueError: When both a materialization and incremental settings are set
+    """
+    if incremental and materialization:
+        raise ValueError(
+            f"Both materialization={materialization!r} and incremental settings are "
+            "set: incremental models are always materialized as incremental"
+        )
+
+    # Use custom materialization if provided, otherwise use the default one
+    if incremental:
+        config_block = (
+            "{{ config(materialized='incremental', "
+            f"incremental_strategy='{incremental['strategy']}'"
+        )
+        if incremental["unique_key"]:
+            config_block += f", unique_key={_quoted_list(incremental['unique_key'])}"
+    elif materialization:
+        config_block = f"{{{{ config(materialized='{materialization}'"
+    else:
+        config_block = (
+            "{{ config(materialized=dbt_bigquery_monitoring_materialization()"
+        )
+
+    # Add enabled parameter
+    if enabled is not None:
+        config_block += f", enabled={'true' if enabled else 'false'}"
+
+    # Add tags parameter
+    if tags:
+        config_block += f", tags={_quoted_list(tags)}"
+
+    # Add partitioning configuration
+    if partition_by:
+        config_block += (
+            f", partition_by={{'field': '{partition_by['field']}', "
+            f"'data_type': '{partition_by['data_type']}', "
+            f"'granularity': '{partition_by['granularity']}'}}"
+        )
+        if partition_by["expiration_days"]:
+            config_block += (
+                f", partition_expiration_days={partition_by['expiration_days']}"
+            )
+        if partition_by["require_partition_filter"]:
+            config_block += ", require_partition_filter=true"
+
+    # Add clustering configuration
+    if cluster_by:
+        config_block += f", cluster_by={_quoted_list(cluster_by)}"
+    return config_block + ") }}"
+
+
 def generate_sql_for_dataset(
     url: str,
     columns: List[dict],
@@ -12,6 +310,9 @@ def generate_sql_for_dataset(
     materialization: str = None,
     enabled: bool = None,
     tags: List[str] = None,
+    cluster_by: List[str] = None,
+    partitioning: dict = None,
+    incremental: dict = None,
 ):
     # Prepare a run_query statement to fetch datasets for the list of projects
     preflight_sql = textwrap.dedent(f"""
@@ -60,29 +361,25 @@ SELECT
 FROM
 base""")
 
-    # Add config block if we have project scoping, custom materialization, enabled, or tags
-    if has_project_id_scope or materialization or enabled is not None or tags:
-        # Use custom materialization if provided, otherwise use default for project-scoped tables
-        if materialization:
-            config_block = f"{{{{ config(materialized='{materialization}'"
-        else:
-            config_block = (
-                "{{ config(materialized=dbt_bigquery_monitoring_materialization()"
-            )
-
-        # Add enabled parameter
-        if enabled is not None:
-            config_block += f", enabled={'true' if enabled else 'false'}"
-
-        # Add tags parameter
-        if tags:
-            tags_str = '["' + '", "'.join(tags) + '"]'
-            config_block += f", tags={tags_str}"
+    # Add config block if we have project scoping, custom materialization, enabled,
+    # tags, clustering, partitioning or incremental settings
+    if (
+        has_project_id_scope
+        or materialization
+        or enabled is not None
+        or tags
+        or cluster_by
+        or partitioning
+        or incremental
+    ):
+        partition_by = _model_partition_by(partitioning_key, columns, partitioning)
+        if incremental:
+            incremental = incremental_config(incremental, partition_by, columns)
+            sql += "\n" + incremental_filter(partition_by, incremental)
 
-        # Add partitioning configuration
-        if partitioning_key:
-            config_block += f", partition_by={{'field': '{partitioning_key}', 'data_type': 'timestamp', 'granularity': 'hour'}}, partition_expiration_days=180"
-        config_block += ") }}"
+        config_block = generate_config_block(
+            materialization, enabled, tags, partition_by, cluster_by, incremental
+        )
 
         sql = f"""{config_block}
 {sql}"""
@@ -100,6 +397,9 @@ def generate_sql_for_table(
     materialization: str = None,
     enabled: bool = None,
     tags: List[str] = None,
+    cluster_by: List[str] = None,
+    partitioning: dict = None,
+    incremental: dict = None,
 ):
     # Prepare the column names as a comma-separated string
     column_names = [column["name"].lower() for column in columns]
@@ -112,29 +412,25 @@ SELECT
 {columns_str}
 FROM `region-{{{{ dbt_bigquery_monitoring_variable_bq_region() }}}}`.`INFORMATION_SCHEMA`.`{table_name}`""")
 
-    # Add config block if we have project scoping, custom materialization, enabled, or tags
-    if has_project_id_scope or materialization or enabled is not None or tags:
-        # Use custom materialization if provided, otherwise use default for project-scoped tables
-        if materialization:
-            config_block = f"{{{{ config(materialized='{materialization}'"
-        else:
-            config_block = (
-                "{{ config(materialized=dbt_bigquery_monitoring_materialization()"
-            )
-
-        # Add enabled parameter
-        if enabled is not None:
-            config_block += f", enabled={'true' if enabled else 'false'}"
+    # Add config block if we have project scoping, custom materialization, enabled,
+    # tags, clustering, partitioning or incremental settings
+    if (
+        has_project_id_scope
+        or materialization
+        or enabled is not None
+        or tags
+        or cluster_by
+        or partitioning
+        or incremental
+    ):
+        partition_by = _model_partition_by(partitioning_key, columns, partitioning)
+        if incremental:
+            incremental = incremental_config(incremental, partition_by, columns)
+            query += "\n" + incremental_filter(partition_by, incremental)
 
-        # Add tags parameter
-        if tags:
-            tags_str = '["' + '", "'.join(tags) + '"]'
-            config_block += f", tags={tags_str}"
-
-        # Add partitioning configuration
-        if partitioning_key:
-            config_block += f", partition_by={{'field': '{partitioning_key}', 'data_type': 'timestamp', 'granularity': 'hour'}}, partition_expiration_days=180"
-        config_block += ") }}"
+        config_block = generate_config_block(
+            materialization, enabled, tags, partition_by, cluster_by, incremental
+        )
 
         query = f"""{config_block}
 {query}"""
@@ -142,6 +438,21 @@ FROM `region-{{{{ dbt_bigquery_monitoring_variable_bq_region() }}}}`.`INFORMATIO
     return query
 
 
+def sql_type_for_scope(scope: List[str]) -> str:
+    """
+    Choose the SQL form of a view from the resource scopes of its syntax.
+
+    Views that can only be queried per dataset are read with one query per
+    dataset joined by UNION ALL, every other view with a single region-level query.
+
+    Returns:
+        "dataset" or "table", as expected by generate_sql
+    """
+    if "dataset" in scope and "region" not in scope:
+        return "dataset"
+    return "table"
+
+
 def generate_sql(
     url: str,
     columns: List[dict],
@@ -153,6 +464,9 @@ def generate_sql(
     materialization: str = None,
     enabled: bool = None,
     tags: List[str] = None,
+    cluster_by: List[str] = None,
+    partitioning: dict = None,
+    incremental: dict = None,
 ):
     if type == "table":
         return generate_sql_for_table(
@@ -165,6 +479,9 @@ def generate_sql(
             materialization,
             enabled,
             tags,
+            cluster_by,
+            partitioning,
+            incremental,
         )
     elif type == "dataset":
         return generate_sql_for_dataset(
@@ -177,6 +494,9 @@ def generate_sql(
             materialization,
             enabled,
             tags,
+            cluster_by,
+            partitioning,
+            incremental,
         )
     else:
         raise ValueError(f"Invalid type: {type}")
@@ -0,0 +1,145 @@
+from typing import List
+
+# Columns every synthetic page starts with, read by the partitioning notes
+PARTITIONING_COLUMNS = [
+    {"name": "creation_time", "type": "TIMESTAMP", "description": "Creation time"},
+    {"name": "project_id", "type": "STRING", "description": "ID of the project"},
+    {"name": "user_email", "type": "STRING", "description": "Email of the user"},
+]
+
+COLUMN_TYPES = ("STRING", "INTEGER", "TIMESTAMP", "BOOLEAN", "FLOAT")
+
+
+def synthetic_columns(
+    columns: int = 20, structs: int = 2, struct_depth: int = 2, struct_fanout: int = 3
+) -> List[dict]:
+    """
+    Return the schema rows of a synthetic page, as parsed by columns_from_scan.
+
+    Args:
+        columns: Number of top-level columns, including the partitioning columns
+        structs: Number of top-level structs
+        struct_depth: Levels of nested fields in each struct
+        struct_fanout: Fields per struct level, the last level holding the leaves
+
+    Returns:
+        The top-level columns followed by the fields of each struct, named
+        <struct>.<field>[.<field>...]
+    """
+    rows = [dict(column) for column in PARTITIONING_COLUMNS[:columns]]
+    for i in range(len(rows), columns):
+        rows.append(
+            {
+                "name": f"column_{i}",
+                "type": COLUMN_TYPES[i % len(COLUMN_TYPES)],
+                "description": f"Description of column {i}.",
+            }
+        )
+
+    def add_fields(path: str, depth: int):
+        for i in range(struct_fanout):
+            name = f"{path}.field_{i}"
+            if depth == struct_depth:
+                rows.append(
+                    {"name": name, "type": "STRING", "description": f"Field {name}."}
+                )
+            else:
+                rows.append(
+                    {"name": name, "type": "RECORD", "description": f"Struct {name}."}
+                )
+                add_fields(name, depth + 1)
+
+    for i in range(structs):
+        add_fields(f"struct_{i}", 1)
+    return rows
+
+
+def synthetic_page(
+    columns: int = 20,
+    structs: int = 2,
+    struct_depth: int = 2,
+    struct_fanout: int = 3,
+    notes: int = 1,
+    padding: int = 0,
+    view_name: str = "SYNTHETIC_VIEW",
+) -> str:
+    """
+    Build a documentation page shaped like the BigQuery INFORMATION_SCHEMA pages.
+
+    The article body holds a "Required role" section, the partitioning and
+    clustering paragraph, the notes, the schema table and the syntax table, and
+    the page around it holds navigation and script padding like the real site.
+
+    Args:
+        columns, structs, struct_depth, struct_fanout: Shape of the schema, see
+            synthetic_columns
+        notes: Number of <aside> notes before the schema table
+        padding: Number of navigation entries and script blocks around the article
+        view_name: Name of the view in the syntax table
+
+    Returns:
+        The HTML of the page
+    """
+    parts = [
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n",
+        f"<title>{view_name} view | BigQuery</title>\n",
+    ]
+    parts += [
+        f'<script type="application/json">{{"entry": {i}, "data": "{"x" * 200}"}}'
+        "</script>\n"
+        for i in range(padding)
+    ]
+    parts.append('</head>\n<body>\n<nav class="devsite-nav">\n<ul>\n')
+    parts += [
+        f'<li class="devsite-nav-item"><a href="/bigquery/docs/page-{i}">'
+        f"<span>Documentation page {i}</span></a></li>\n"
+        for i in range(padding)
+    ]
+    parts.append('</ul>\n</nav>\n<div class="devsite-article-body clearfix\n">\n')
+
+    parts.append(
+        '<h2 id="required_role" data-text="Required role">Required role</h2>\n'
+        "<p>To get the permission that you need to query the "
+        f"<code>INFORMATION_SCHEMA.{view_name}</code> view, ask your administrator "
+        "to grant you the BigQuery Resource Viewer "
+        "(<code>roles/bigquery.resourceViewer</code>) IAM role on your project.</p>\n"
+        '<h2 id="schema" data-text="Schema">Schema</h2>\n'
+        "<p>The underlying data is partitioned by the "
+        '<code translate="no" dir="ltr">creation_time</code> column and clustered\n'
+        'by <code translate="no" dir="ltr">project_id</code> and '
+        '<code translate="no" dir="ltr">user_email</code>.</p>\n'
+    )
+    parts += [
+        '<aside class="note"><strong>Note:</strong><span> Note '
+        f"{i} about the <code>{view_name}</code> view, kept for 180 days."
+        "</span></aside>\n"
+        for i in range(notes)
+    ]
+
+    parts.append(
+        "<table>\n<thead>\n<tr>\n<th>Column name</th>\n<th>Data type</th>\n"
+        "<th>Value</th>\n</tr>\n</thead>\n<tbody>\n"
+    )
+    for column in synthetic_columns(columns, structs, struct_depth, struct_fanout):
+        parts.append(
+            f'<tr>\n<td><code translate="no" dir="ltr">{column["name"]}</code></td>\n'
+            f'<td><code translate="no" dir="ltr">{column["type"]}</code></td>\n'
+            f"<td>{column['description']}</td>\n</tr>\n"
+        )
+    parts.append("</tbody>\n</table>\n")
+
+    parts.append(
+        '<h2 id="scope_and_syntax" data-text="Scope and syntax">Scope and syntax</h2>\n'
+        '<table class="syntax">\n<tr><th>View name</th><th>Resource scope</th>'
+        "<th>Region scope</th></tr>\n<tr>\n"
+        "<td><code>[`PROJECT_ID`.]`region-REGION`.INFORMATION_SCHEMA."
+        f"{view_name}</code></td>\n<td>Project level</td>\n<td><code>REGION</code>"
+        "</td>\n</tr>\n</table>\n</div>\n"
+    )
+    parts.append('<footer class="devsite-footer">\n')
+    parts += [
+        f'<a class="devsite-footer-link" href="/terms-{i}">Terms {i}</a>\n'
+        for i in range(padding)
+    ]
+    parts.append("</footer>\n</body>\n</html>\n")
+    return "".join(parts)
@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import documentation_parser
+from documentation_parser import group_targets_by_url
+from page_corpus import record_pages
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Fixture page recorded for each URL of the replay_corpus targets
+REPLAY_PAGES = {
+    "https://example.com/object_privileges": "html_content.html",
+    "https://example.com/jobs": "html_content_2.html",
+}
+
+
+class DocumentationPageHandler(BaseHTTPRequestHandler):
+    # Stand-in for cloud.google.com serving the checked-in fixture pages.
+    # Behaviour is driven by the server attributes set in the doc_server fixture.
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests_log.append(self.path)
+            status_queue = server.statuses.get(self.path)
+            status = status_queue.pop(0) if status_queue else 200
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            self.respond(status)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def respond(self, status: int):
+        server = self.server
+        time.sleep(server.latency)
+
+        if status != 200:
+            self.send_response(status)
+            for header, value in server.error_headers.items():
+                self.send_header(header, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        page = server.pages.get(self.path)
+        if page is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = page.encode(server.charset)
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        content_type = "text/html"
+        if server.declare_charset:
+            content_type += f"; charset={server.charset}"
+        self.send_header("Content-Type", content_type)
+        if server.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmarks",
+        action="store_true",
+        help="also run the tests marked as benchmark, which assert on timings",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # Timings are unreliable on shared runners, only check them when asked to
+    if config.getoption("--benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="timing benchmark, run with --benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def doc_server():
+    """
+    Local HTTP server serving html_content.html and html_content_2.html.
+
+    Tests can tune `latency` (seconds added to every response), `pages`
+    (path -> HTML), `statuses` (path -> list of status codes returned
+    before the page is served), `compress` (gzip when accepted), `charset`
+    and `declare_charset`, and inspect `requests_log` and `max_in_flight`, the
+    most requests served at the same time. Pages carry an ETag
+    and conditional requests for an unchanged page get a 304.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DocumentationPageHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.latency = 0.0
+    server.requests_log = []
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.statuses = {}
+    server.error_headers = {}
+    server.compress = False
+    server.charset = "utf-8"
+    server.declare_charset = True
+    server.pages = {
+        "/html_content": (ROOT_DIR / "html_content.html").read_text(),
+        "/html_content_2": (ROOT_DIR / "html_content_2.html").read_text(),
+    }
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def replay_corpus(tmp_path, monkeypatch):
+    """
+    Offline generate_all runs in tmp_path, the working directory of the test.
+
+    Returns a function installing targets as pages_to_process, by default the
+    object_privileges and jobs targets, and recording the fixture page of each of
+    their URLs (see REPLAY_PAGES) in corpus/, for generate_all(replay_dir="corpus").
+    The installed targets are returned and can be changed between runs.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    def install(targets: dict = None) -> dict:
+        if targets is None:
+            targets = {
+                "object_privileges": {
+                    "dir": "access_control",
+                    "url": "https://example.com/object_privileges",
+                },
+                "jobs": {"dir": "jobs", "url": "https://example.com/jobs"},
+            }
+        monkeypatch.setattr(documentation_parser, "pages_to_process", targets)
+        targets_by_url = group_targets_by_url(targets)
+        record_pages(
+            "corpus",
+            targets_by_url,
+            {
+                url: {"html": (ROOT_DIR / REPLAY_PAGES[url]).read_text()}
+                for url in targets_by_url
+            },
+        )
+        return targets
+
+    return install
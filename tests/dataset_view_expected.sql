@@ -0,0 +1,35 @@
+{{ config(materialized=dbt_bigquery_monitoring_materialization()) }}
+{# More details about base table in https://example.com/view -#}
+
+
+{% set preflight_sql -%}
+SELECT
+CONCAT('`', CATALOG_NAME, '`.`', SCHEMA_NAME, '`') AS SCHEMA_NAME
+FROM `region-{{ dbt_bigquery_monitoring_variable_bq_region() }}`.`INFORMATION_SCHEMA`.`SCHEMATA`
+{%- endset %}
+{% set results = run_query(preflight_sql) %}
+{% set dataset_list = results | map(attribute='SCHEMA_NAME') | list %}
+{%- if dataset_list | length == 0 -%}
+{{ log("No datasets found in the project list", info=False) }}
+{%- endif -%}
+
+WITH base AS (
+{%- if dataset_list | length == 0 -%}
+  SELECT CAST(NULL AS STRING) AS table_name, CAST(NULL AS INT64) AS total_rows
+  LIMIT 0
+{%- else %}
+{% for dataset in dataset_list -%}
+  SELECT
+  table_name,
+total_rows
+  FROM {{ dataset | trim }}.`INFORMATION_SCHEMA`.`PARTITIONS`
+{% if not loop.last %}UNION ALL{% endif %}
+{% endfor %}
+{%- endif -%}
+)
+
+SELECT
+table_name,
+total_rows
+FROM
+base
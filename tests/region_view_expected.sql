@@ -0,0 +1,7 @@
+{{ config(materialized=dbt_bigquery_monitoring_materialization()) }}
+{# More details about base table in https://example.com/view -#}
+
+SELECT
+table_name,
+total_rows
+FROM `region-{{ dbt_bigquery_monitoring_variable_bq_region() }}`.`INFORMATION_SCHEMA`.`TABLE_STORAGE`
@@ -0,0 +1,86 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import benchmark
+from benchmark import compare_to_baseline, summarize
+
+
+def test_summarize():
+    durations = [float(i) for i in range(1, 21)]
+    assert summarize(durations) == {"min": 1.0, "median": 10.5, "p95": 19.0}
+    assert summarize([0.5]) == {"min": 0.5, "median": 0.5, "p95": 0.5}
+
+
+def test_compare_to_baseline():
+    baseline = {"page.html": {"parse": {"median": 0.010}, "sql": {"median": 0.0001}}}
+    results = {
+        "page.html": {
+            "parse": {"median": 0.014},
+            # Twice as slow, but by less than the timer noise
+            "sql": {"median": 0.0002},
+            "new_stage": {"median": 1.0},
+        }
+    }
+
+    regressions = compare_to_baseline(results, baseline, threshold=0.25)
+    assert [(r["stage"], round(r["ratio"], 2)) for r in regressions] == [
+        ("parse", 1.4)
+    ]
+    assert compare_to_baseline(results, baseline, threshold=0.5) == []
+
+
+def test_stages_suite_saves_and_checks_a_baseline(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    benchmark.main(["stages", "--repeat", "1", "--save", str(baseline)])
+
+    saved = json.loads(baseline.read_text())
+    stages = saved["results"]["html_content_2.html"]
+    assert list(stages) == [
+        "parse",
+        "table_name",
+        "required_role",
+        "project_id_scope",
+        "partitioning_key",
+        "columns",
+        "update_column_list",
+        "generate_sql",
+        "generate_yml",
+    ]
+    assert set(stages["parse"]) == {"min", "median", "p95", "peak_memory"}
+
+    # A generous threshold against its own results never fails
+    benchmark.main(
+        ["stages", "--repeat", "1", "--baseline", str(baseline), "--threshold", "100"]
+    )
+    assert "No stage is more than" in capsys.readouterr().out
+
+
+def test_pipeline_soup_falls_back_like_the_parser():
+    # The article body has the syntax but the schema table is outside of it
+    html_content = """
+    <div class="devsite-article-body">
+      <table class="syntax">
+        <tr><td><code>`region-REGION`.INFORMATION_SCHEMA.TABLES</code></td></tr>
+      </table>
+    </div>
+    <table>
+      <tr><th>Column name</th><th>Data type</th><th>Value</th></tr>
+      <tr><td>table_name</td><td>STRING</td><td>The name of the table</td></tr>
+    </table>
+    """
+    soup = benchmark.pipeline_soup(html_content, "html.parser")
+    assert benchmark.parse_columns(soup) == [
+        {"name": "table_name", "type": "STRING", "description": "The name of the table"}
+    ]
+
+
+def test_stages_suite_rejects_unknown_parser(capsys):
+    with pytest.raises(SystemExit):
+        benchmark.main(["stages", "--parser", "lxm"])
+    assert "invalid choice: 'lxm'" in capsys.readouterr().err
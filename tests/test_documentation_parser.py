@@ -1,6 +1,7 @@
 import pytest
 import sys
 import os
+import yaml
 from pathlib import Path
 
 # Add the parent directory to the Python path so we can import the modules
@@ -9,13 +10,28 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from bs4 import BeautifulSoup
 from documentation_parser import (
     parse_has_project_id_scope,
+    parse_information_schema_scope,
     parse_required_role,
     parse_table_name,
     update_column_list,
     extract_partitioning_key,
+    extract_page,
+    extract_page_from_html,
+    generate_target_files,
     generate_yml,
+    model_cluster_by,
+    partitioning_key_from_scan,
+    scan_document,
+)
+from schema_model import TableSchema
+from synthetic_pages import synthetic_columns
+from config import pages_to_process
+from sql_generator import (
+    generate_sql,
+    incremental_config,
+    partition_config,
+    sql_type_for_scope,
 )
-from sql_generator import generate_sql
 
 # Get the root directory (parent of tests)
 ROOT_DIR = Path(__file__).parent.parent
@@ -94,6 +110,131 @@ def test_parse_has_project_id():
     assert parse_has_project_id_scope(soup) is False
 
 
+def test_parse_information_schema_scope():
+    # Test case: region-level view with an optional project qualifier
+    for fixture in ["html_content.html", "html_content_2.html"]:
+        with open(ROOT_DIR / fixture, "r") as file:
+            soup = BeautifulSoup(file.read(), "html.parser")
+        assert parse_information_schema_scope(soup) == ["region", "project"]
+
+    # Test case: dataset-level view
+    html_content = """
+    <table>
+      <tr><th>View name</th><th>Resource scope</th><th>Region scope</th></tr>
+      <tr>
+        <td><code>[<var>PROJECT_ID</var>.]<var>DATASET_ID</var>.INFORMATION_SCHEMA.PARTITIONS</code></td>
+        <td>Dataset level</td>
+        <td>Dataset location</td>
+      </tr>
+    </table>
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    assert parse_information_schema_scope(soup) == ["project", "dataset"]
+
+    # Test case: organization-level view
+    html_content = """
+    <table>
+      <tr>
+        <td><code>`region-<var>REGION</var>`.INFORMATION_SCHEMA.JOBS_BY_ORGANIZATION</code></td>
+        <td>Organization level</td>
+        <td><code><var>REGION</var></code></td>
+      </tr>
+    </table>
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    assert parse_information_schema_scope(soup) == ["region", "organization"]
+
+    # Test case: PROJECT_ID in prose does not make a project scope, but a
+    # region-level view is still queried within the default project
+    html_content = """
+    <table><tr><td><code>`region-REGION`.INFORMATION_SCHEMA.TABLES</code></td></tr></table>
+    <p>Replace PROJECT_ID with the ID of your project.</p>
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    assert parse_information_schema_scope(soup) == ["region"]
+    assert parse_has_project_id_scope(soup) is True
+
+
+SCOPED_VIEW_PAGE = """
+<div class="devsite-article-body">
+  <table>
+    <tr><th>Column name</th><th>Data type</th><th>Value</th></tr>
+    <tr><td>table_name</td><td>STRING</td><td>The name of the table</td></tr>
+    <tr><td>total_rows</td><td>INT64</td><td>The number of rows</td></tr>
+  </table>
+  <table class="syntax">
+    <tr><td><code>{syntax}</code></td><td>{level}</td></tr>
+  </table>
+</div>
+"""
+
+
+@pytest.mark.parametrize(
+    "syntax, level, expected",
+    [
+        # Region-level view without PROJECT_ID qualifier: one region-level query,
+        # with a config() block as it runs in the default project
+        (
+            "`region-<var>REGION</var>`.INFORMATION_SCHEMA.TABLE_STORAGE",
+            "Region level",
+            "region_view_expected.sql",
+        ),
+        # Dataset-only view: one query per dataset joined by UNION ALL
+        (
+            "[<var>PROJECT_ID</var>.]<var>DATASET_ID</var>.INFORMATION_SCHEMA.PARTITIONS",
+            "Dataset level",
+            "dataset_view_expected.sql",
+        ),
+    ],
+)
+def test_generate_target_files_for_scoped_views(syntax, level, expected, tmp_path):
+    html_content = SCOPED_VIEW_PAGE.format(syntax=syntax, level=level)
+    schema = TableSchema.from_dict(extract_page_from_html(html_content))
+
+    generate_target_files(
+        "view", {"dir": "views", "url": "https://example.com/view"}, schema, tmp_path
+    )
+
+    sql = (tmp_path / "views/information_schema_view.sql").read_text()
+    assert sql == (TESTS_DIR / expected).read_text()
+
+
+def test_sql_type_for_scope():
+    assert sql_type_for_scope(["region", "project"]) == "table"
+    assert sql_type_for_scope(["project", "dataset"]) == "dataset"
+    assert sql_type_for_scope(["region", "project", "dataset"]) == "table"
+    assert sql_type_for_scope([]) == "table"
+
+
+def test_extract_page():
+    # The single-pass extraction matches the individual extractors
+    for fixture, table_name, partitioning_key, column_count in [
+        ("html_content.html", "OBJECT_PRIVILEGES", None, 6),
+        ("html_content_2.html", "JOBS", "creation_time", 35),
+    ]:
+        with open(ROOT_DIR / fixture, "r") as file:
+            html_content = file.read()
+        soup = BeautifulSoup(html_content, "html.parser")
+        page = extract_page(soup)
+
+        assert page["table_name"] == table_name == parse_table_name(soup)
+        assert page["required_role"] == parse_required_role(soup)
+        assert page["has_project_id_scope"] is parse_has_project_id_scope(soup)
+        assert (page["partitioning_key"], page["clustering_columns"]) == (
+            extract_partitioning_key(soup)
+        )
+        assert page["partitioning_key"] == partitioning_key
+        assert len(page["columns"]) == column_count
+
+    with open(ROOT_DIR / "html_content.html", "r") as file:
+        page = extract_page(BeautifulSoup(file.read(), "html.parser"))
+    assert page["columns"][0] == {
+        "name": "OBJECT_CATALOG",
+        "type": "STRING",
+        "description": "The project ID of the project that contains the resource.",
+    }
+
+
 def test_update_column_list():
     # Test case: Columns with exclude_columns
     columns = [
@@ -187,6 +328,89 @@ def test_update_column_list():
     assert result == expected_columns
 
 
+def test_update_column_list_groups_structs_by_exact_name():
+    columns = [
+        {"name": "query_info", "type": "STRING", "description": "Not a struct"},
+        {"name": "query_info_x.a", "type": "STRING", "description": "A"},
+        {"name": "query_info.b", "type": "INT64", "description": "B"},
+        {"name": "query_info.c.d", "type": "STRING", "description": "D"},
+    ]
+    original = [dict(column) for column in columns]
+
+    result = update_column_list(
+        columns, ["query_info"], field_mappings={"query_info_x.a": "renamed"}
+    )
+
+    assert result == [
+        {
+            "name": "query_info",
+            "type": "RECORD",
+            "description": "query_info.b : B\nquery_info.c.d : D",
+        },
+        {"name": "query_info_x", "type": "RECORD", "description": "query_info_x.a : A"},
+    ]
+    # The columns of the page are shared by several targets and left untouched
+    assert columns == original
+
+
+def test_update_column_list_nested_fields():
+    columns = [
+        {"name": "job_id", "type": "STRING", "description": "ID"},
+        {"name": "query_info.c.d", "type": "STRING", "description": "D"},
+        {"name": "query_info.b", "type": "INT64", "description": "B"},
+        {"name": "query_info.c", "type": "RECORD", "description": "C"},
+        {"name": "query_info.c.e", "type": "BOOL", "description": "E"},
+    ]
+
+    result = update_column_list(columns, [], nested_fields=True)
+
+    assert result == [
+        {"name": "job_id", "type": "STRING", "description": "ID"},
+        {
+            "name": "query_info",
+            "type": "RECORD",
+            "description": "",
+            "fields": [
+                {
+                    "name": "c",
+                    "type": "RECORD",
+                    "description": "C",
+                    "fields": [
+                        {"name": "d", "type": "STRING", "description": "D"},
+                        {"name": "e", "type": "BOOL", "description": "E"},
+                    ],
+                },
+                {"name": "b", "type": "INT64", "description": "B"},
+            ],
+        },
+    ]
+
+    yml = yaml.safe_load(generate_yml("model", result))
+    query_info = yml["models"][0]["columns"][1]
+    assert query_info["fields"][0]["fields"][1] == {
+        "name": "e",
+        "description": "E",
+        "data_type": "BOOL",
+    }
+    assert "fields" not in yml["models"][0]["columns"][0]
+
+
+def test_update_column_list_groups_many_structs():
+    columns = synthetic_columns(
+        columns=5000, structs=5000, struct_depth=1, struct_fanout=4
+    )
+
+    result = update_column_list(columns, ["column_10"])
+    assert len(result) == 2 * 5000 - 1
+    assert all(record["description"].count("\n") == 3 for record in result[-5000:])
+    # struct_1 is a prefix of struct_10, struct_100, ..., which are grouped apart
+    struct_1 = next(record for record in result if record["name"] == "struct_1")
+    assert all(
+        line.startswith("struct_1.field_")
+        for line in struct_1["description"].splitlines()
+    )
+
+
 def test_generate_sql_table():
     # Test generate_sql function
     columns = [
@@ -318,12 +542,36 @@ def test_extract_partitioning_key():
     assert clustering_columns == ["project_id", "user_email"]
 
 
+def test_partitioning_key_from_scan_indexes_page_text_on_demand():
+    # The page text is only indexed for the creation_time special case
+    html_content = """
+    <p>The underlying data is clustered by <code>project_id</code>.</p>
+    <p><code>partitioned by the <b>creation_time</b></code> is not a key.</p>
+    """
+    scan = scan_document(BeautifulSoup(html_content, "html.parser"))
+    with pytest.raises(ValueError):
+        partitioning_key_from_scan(scan)
+    assert "text_index" not in scan
+
+    html_content = """
+    <p>Columns: CREATION_TIME, Project_Id and user_email.</p>
+    <p>The underlying data is partitioned by the <code>creation_time</code> column.</p>
+    """
+    scan = scan_document(BeautifulSoup(html_content, "html.parser"))
+    assert partitioning_key_from_scan(scan) == (
+        "creation_time",
+        ["project_id", "user_email"],
+    )
+    assert scan["text_index"] == scan["soup"].get_text().lower()
+
+
 def test_generate_sql_table_with_partitioning_key():
     # Test generate_sql function with partitioning key
     columns = [
         {"name": "field1", "data_type": "STRING", "description": "Field 1"},
         {"name": "field2", "data_type": "INTEGER", "description": "Field 2"},
         {"name": "field3", "data_type": "STRING", "description": "Field 3"},
+        {"name": "creation_time", "data_type": "TIMESTAMP", "description": "Time"},
     ]
     partitioning_key = "creation_time"
     result = generate_sql(
@@ -401,6 +649,7 @@ def test_generate_sql_table_with_custom_materialization_and_partitioning():
         {"name": "field1", "data_type": "STRING", "description": "Field 1"},
         {"name": "field2", "data_type": "INTEGER", "description": "Field 2"},
         {"name": "field3", "data_type": "STRING", "description": "Field 3"},
+        {"name": "creation_time", "data_type": "TIMESTAMP", "description": "Time"},
     ]
     partitioning_key = "creation_time"
     result = generate_sql(
@@ -677,6 +926,7 @@ def test_generate_sql_config_parameter_order():
     # materialized, enabled, tags, partition_by, partition_expiration_days
     columns = [
         {"name": "field1", "data_type": "STRING", "description": "Field 1"},
+        {"name": "creation_time", "data_type": "TIMESTAMP", "description": "Time"},
     ]
     result = generate_sql(
         "https://cloud.google.com/bigquery/docs/information-schema-jobs",
@@ -716,6 +966,437 @@ def test_generate_sql_config_parameter_order():
     assert tags_pos < partition_pos
 
 
+def test_generate_sql_with_cluster_by():
+    columns = [
+        {"name": "creation_time", "data_type": "TIMESTAMP", "description": "Time"},
+        {"name": "project_id", "data_type": "STRING", "description": "Project"},
+        {"name": "user_email", "data_type": "STRING", "description": "User"},
+    ]
+    for sql_type in ("table", "dataset"):
+        result = generate_sql(
+            "https://cloud.google.com/bigquery/docs/information-schema-jobs",
+            columns,
+            "jobs",
+            "",
+            sql_type,
+            has_project_id_scope=True,
+            partitioning_key="creation_time",
+            cluster_by=["project_id", "user_email"],
+        )
+        assert result.startswith(
+            "{{ config(materialized=dbt_bigquery_monitoring_materialization(), "
+            "partition_by={'field': 'creation_time', 'data_type': 'timestamp', "
+            "'granularity': 'day'}, partition_expiration_days=180, "
+            'cluster_by=["project_id", "user_email"]) }}\n'
+        )
+
+    # Clustering alone is enough for a config block
+    result = generate_sql(
+        "https://cloud.google.com/bigquery/docs/information-schema-jobs",
+        columns,
+        "jobs",
+        "",
+        "table",
+        has_project_id_scope=False,
+        cluster_by=["project_id"],
+    )
+    assert result.startswith(
+        "{{ config(materialized=dbt_bigquery_monitoring_materialization(), "
+        'cluster_by=["project_id"]) }}\n'
+    )
+
+
+def test_partition_config_defaults_to_daily_partitions():
+    columns = [
+        {"name": "creation_time", "data_type": "TIMESTAMP", "description": ""},
+        {"name": "usage_date", "data_type": "DATE", "description": ""},
+        {"name": "project_id", "data_type": "STRING", "description": ""},
+    ]
+    assert partition_config("creation_time", columns) == {
+        "field": "creation_time",
+        "data_type": "timestamp",
+        "granularity": "day",
+        "expiration_days": 180,
+        "require_partition_filter": False,
+    }
+    # The data type follows the documented type of the column
+    assert partition_config("usage_date", columns)["data_type"] == "date"
+
+    with pytest.raises(ValueError, match="project_id: string is not a timestamp"):
+        partition_config("project_id", columns)
+    # The model would not SELECT the column it is partitioned by
+    with pytest.raises(ValueError, match="unknown_time: not a column of the model"):
+        partition_config("unknown_time", columns)
+    with pytest.raises(ValueError, match="project_id: string"):
+        generate_sql("u", columns, "X", "", "table", True, "project_id")
+
+
+def test_unusable_partitioning_key_leaves_the_model_unpartitioned(tmp_path, capsys):
+    with open(ROOT_DIR / "html_content_2.html", "r") as file:
+        schema = TableSchema.from_dict(extract_page_from_html(file.read()))
+    target = {"dir": "jobs", "url": "u", "exclude_columns": ["creation_time"]}
+
+    model = generate_target_files("jobs", target, schema, str(tmp_path))
+
+    assert model["warnings"] == [
+        "Cannot partition by creation_time: not a column of the model, the model "
+        "is left unpartitioned"
+    ]
+    assert "Warning: jobs: Cannot partition by creation_time" in capsys.readouterr().out
+    sql = (tmp_path / "jobs/information_schema_jobs.sql").read_text()
+    assert "partition_by" not in sql
+    assert "cluster_by" in sql
+
+    # Settings that need the partitioning still fail the generation
+    with pytest.raises(ValueError, match="jobs: Partitioning settings"):
+        generate_target_files(
+            "jobs", {**target, "partition_granularity": "month"}, schema, str(tmp_path)
+        )
+    with pytest.raises(ValueError, match="jobs: Incremental models need"):
+        generate_target_files(
+            "jobs",
+            {**target, "incremental": {"strategy": "insert_overwrite"}},
+            schema,
+            str(tmp_path),
+        )
+
+
+def test_generate_sql_applies_configured_partitioning():
+    columns = [{"name": "creation_time", "data_type": "TIMESTAMP", "description": ""}]
+    # Models without config() block are not partitioned by the page's key
+    result = generate_sql("u", columns, "X", "role", "table", False, "creation_time")
+    assert result.startswith("{# More details about base table in u -#}")
+
+    # Configured partitioning settings add the config block, and are checked
+    result = generate_sql(
+        "u",
+        columns,
+        "X",
+        "role",
+        "dataset",
+        False,
+        "creation_time",
+        partitioning={"granularity": "month"},
+    )
+    assert result.startswith(
+        "{{ config(materialized=dbt_bigquery_monitoring_materialization(), "
+        "partition_by={'field': 'creation_time', 'data_type': 'timestamp', "
+        "'granularity': 'month'}"
+    )
+    with pytest.raises(ValueError, match="4320 partitions"):
+        generate_sql(
+            "u",
+            columns,
+            "X",
+            "role",
+            "table",
+            False,
+            "creation_time",
+            partitioning={"granularity": "hour"},
+        )
+    # Settings without a partitioning column fail instead of being ignored
+    with pytest.raises(ValueError, match=r"\['expiration_days'\] are set but"):
+        generate_sql(
+            "u", columns, "X", "", "table", True, partitioning={"expiration_days": 30}
+        )
+
+def test_partition_config_overrides():
+    columns = [
+        {"name": "creation_time", "data_type": "TIMESTAMP", "description": ""},
+        {"name": "usage_date", "data_type": "DATE", "description": ""},
+    ]
+    overrides = {"granularity": "hour", "expiration_days": 30}
+    config = partition_config(
+        "creation_time", columns, {**overrides, "require_partition_filter": True}
+    )
+    assert (config["granularity"], config["expiration_days"]) == ("hour", 30)
+    assert config["require_partition_filter"] is True
+    assert partition_config(
+        "usage_date", columns, {"granularity": "month", "expiration_days": None}
+    )["expiration_days"] is None
+
+    with pytest.raises(ValueError, match="'hour' for the date column"):
+        partition_config("usage_date", columns, {"granularity": "hour"})
+    # 180 days of hourly partitions, or without expiration, exceed the job limit
+    with pytest.raises(ValueError, match="4320 partitions"):
+        partition_config("creation_time", columns, {"granularity": "hour"})
+    with pytest.raises(ValueError, match="4320 partitions"):
+        partition_config(
+            "creation_time", columns, {"granularity": "hour", "expiration_days": None}
+        )
+
+
+def test_generate_sql_with_partitioning_options():
+    columns = [
+        {"name": "usage_date", "data_type": "DATE", "description": "Day"},
+    ]
+    result = generate_sql(
+        "https://cloud.google.com/bigquery/docs/information-schema-jobs",
+        columns,
+        "jobs",
+        "",
+        "table",
+        has_project_id_scope=True,
+        partitioning_key="usage_date",
+        partitioning={"granularity": "month", "require_partition_filter": True},
+    )
+    assert result.startswith(
+        "{{ config(materialized=dbt_bigquery_monitoring_materialization(), "
+        "partition_by={'field': 'usage_date', 'data_type': 'date', "
+        "'granularity': 'month'}, partition_expiration_days=180, "
+        "require_partition_filter=true) }}\n"
+    )
+
+    result = generate_sql(
+        "https://cloud.google.com/bigquery/docs/information-schema-jobs",
+        columns,
+        "jobs",
+        "",
+        "dataset",
+        has_project_id_scope=True,
+        partitioning_key="usage_date",
+        partitioning={"expiration_days": None},
+    )
+    assert result.startswith(
+        "{{ config(materialized=dbt_bigquery_monitoring_materialization(), "
+        "partition_by={'field': 'usage_date', 'data_type': 'date', "
+        "'granularity': 'day'}) }}\n"
+    )
+
+
+def test_generated_jobs_model_uses_configured_partitioning(tmp_path):
+    with open(ROOT_DIR / "html_content_2.html", "r") as file:
+        schema = TableSchema.from_dict(extract_page_from_html(file.read()))
+    target = {
+        "dir": "jobs",
+        "url": "https://example.com/jobs",
+        "partition_granularity": "hour",
+        "partition_expiration_days": 60,
+        "require_partition_filter": True,
+    }
+
+    generate_target_files("jobs", target, schema, str(tmp_path))
+    config_line = (
+        (tmp_path / "jobs/information_schema_jobs.sql").read_text().splitlines()[0]
+    )
+    assert (
+        "partition_by={'field': 'creation_time', 'data_type': 'timestamp', "
+        "'granularity': 'hour'}, partition_expiration_days=60, "
+        "require_partition_filter=true"
+    ) in config_line
+
+    with pytest.raises(ValueError, match="jobs: Hour partitions over 180 days"):
+        generate_target_files(
+            "jobs", {**target, "partition_expiration_days": 365}, schema, str(tmp_path)
+        )
+
+
+JOBS_COLUMNS = [
+    {"name": "creation_time", "data_type": "TIMESTAMP", "description": "Time"},
+    {"name": "project_id", "data_type": "STRING", "description": "Project"},
+    {"name": "job_id", "data_type": "STRING", "description": "Job"},
+]
+
+
+def test_incremental_config():
+    partition_by = partition_config("creation_time", JOBS_COLUMNS)
+
+    assert incremental_config({}, partition_by, JOBS_COLUMNS) == {
+        "strategy": "insert_overwrite",
+        "unique_key": None,
+        "lookback_var": "dbt_bigquery_monitoring_lookback_hours",
+        "lookback_hours": 24,
+    }
+    merge = incremental_config(
+        {"strategy": "merge", "unique_key": "Job_ID", "lookback_hours": 6},
+        partition_by,
+        JOBS_COLUMNS,
+    )
+    assert (merge["unique_key"], merge["lookback_hours"]) == (["job_id"], 6)
+
+    with pytest.raises(ValueError, match="Invalid incremental strategy"):
+        incremental_config({"strategy": "append"}, partition_by, JOBS_COLUMNS)
+    with pytest.raises(ValueError, match="needs a unique_key"):
+        incremental_config({"strategy": "merge"}, partition_by, JOBS_COLUMNS)
+    with pytest.raises(ValueError, match="reservation_id"):
+        incremental_config(
+            {"strategy": "merge", "unique_key": ["job_id", "reservation_id"]},
+            partition_by,
+            JOBS_COLUMNS,
+        )
+    with pytest.raises(ValueError, match="need a partitioning column"):
+        incremental_config({}, None, JOBS_COLUMNS)
+
+
+def test_generate_sql_incremental_insert_overwrite():
+    result = generate_sql(
+        "https://cloud.google.com/bigquery/docs/information-schema-jobs-by-organization",
+        JOBS_COLUMNS,
+        "JOBS_BY_ORGANIZATION",
+        "",
+        "table",
+        has_project_id_scope=False,
+        partitioning_key="creation_time",
+        incremental={"strategy": "insert_overwrite"},
+    )
+    lines = result.splitlines()
+    assert lines[0] == (
+        "{{ config(materialized='incremental', "
+        "incremental_strategy='insert_overwrite', "
+        "partition_by={'field': 'creation_time', 'data_type': 'timestamp', "
+        "'granularity': 'day'}, partition_expiration_days=180) }}"
+    )
+    # Whole partitions are re-read, from the start of the lookback's partition
+    assert lines[-3:] == [
+        "{% if is_incremental() %}",
+        "WHERE creation_time >= TIMESTAMP_TRUNC(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), "
+        "INTERVAL {{ var('dbt_bigquery_monitoring_lookback_hours', 24) }} HOUR), DAY)",
+        "{% endif %}",
+    ]
+    assert lines[-4].endswith("`INFORMATION_SCHEMA`.`JOBS_BY_ORGANIZATION`")
+
+
+def test_generate_sql_incremental_merge_on_dataset_views():
+    result = generate_sql(
+        "https://cloud.google.com/bigquery/docs/information-schema-jobs",
+        JOBS_COLUMNS,
+        "JOBS",
+        "",
+        "dataset",
+        has_project_id_scope=True,
+        partitioning_key="creation_time",
+        partitioning={"granularity": "hour", "expiration_days": 30},
+        incremental={
+            "strategy": "merge",
+            "unique_key": ["project_id", "job_id"],
+            "lookback_var": "jobs_lookback_hours",
+            "lookback_hours": 3,
+        },
+    )
+    lines = result.splitlines()
+    assert lines[0].startswith(
+        "{{ config(materialized='incremental', incremental_strategy='merge', "
+        'unique_key=["project_id", "job_id"], partition_by='
+    )
+    assert lines[-5:] == [
+        "FROM",
+        "base",
+        "{% if is_incremental() %}",
+        "WHERE creation_time >= TIMESTAMP_TRUNC(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), "
+        "INTERVAL {{ var('jobs_lookback_hours', 3) }} HOUR), HOUR)",
+        "{% endif %}",
+    ]
+
+
+def test_generate_sql_incremental_on_date_partitions():
+    result = generate_sql(
+        "https://cloud.google.com/bigquery/docs/information-schema-table-storage-usage",
+        [{"name": "usage_date", "data_type": "DATE", "description": "Day"}],
+        "TABLE_STORAGE_USAGE_TIMELINE",
+        "",
+        "table",
+        has_project_id_scope=True,
+        partitioning_key="usage_date",
+        partitioning={"granularity": "month"},
+        incremental={"lookback_hours": 72},
+    )
+    assert (
+        "WHERE usage_date >= DATE_TRUNC(DATE_SUB(CURRENT_DATE(), INTERVAL "
+        "DIV({{ var('dbt_bigquery_monitoring_lookback_hours', 72) }}, 24) DAY), MONTH)"
+    ) in result
+
+
+def test_generated_organization_models_are_incremental(tmp_path):
+    with open(ROOT_DIR / "html_content_2.html", "r") as file:
+        schema = TableSchema.from_dict(extract_page_from_html(file.read()))
+
+    for key in ("jobs_by_organization", "jobs_timeline_by_organization"):
+        assert pages_to_process[key]["incremental"] == {"strategy": "insert_overwrite"}
+    target = pages_to_process["jobs_by_organization"]
+    generate_target_files("jobs_by_organization", target, schema, str(tmp_path))
+    sql = (tmp_path / "jobs/information_schema_jobs_by_organization.sql").read_text()
+    assert sql.startswith(
+        "{{ config(materialized='incremental', "
+        "incremental_strategy='insert_overwrite', enabled=false, "
+    )
+    assert "{% if is_incremental() %}\nWHERE creation_time >= " in sql
+
+    # Targets without incremental settings are unchanged
+    generate_target_files(
+        "jobs", {"dir": "jobs", "url": target["url"]}, schema, str(tmp_path)
+    )
+    sql = (tmp_path / "jobs/information_schema_jobs.sql").read_text()
+    assert "is_incremental" not in sql
+    assert "materialized=dbt_bigquery_monitoring_materialization()" in sql
+
+    with pytest.raises(ValueError, match="jobs: Both materialization='table' and"):
+        generate_target_files(
+            "jobs", {**target, "materialization": "table"}, schema, str(tmp_path)
+        )
+    with pytest.raises(ValueError, match="jobs: The merge incremental strategy"):
+        generate_target_files(
+            "jobs",
+            {**target, "incremental": {"strategy": "merge"}},
+            schema,
+            str(tmp_path),
+        )
+
+
+def test_model_cluster_by():
+    columns = [
+        {"name": "creation_time", "type": "TIMESTAMP", "description": ""},
+        {"name": "project_id", "type": "STRING", "description": ""},
+        {"name": "user_email", "type": "STRING", "description": ""},
+        {"name": "total_slot_ms", "type": "INTEGER", "description": ""},
+        {"name": "labels", "type": "RECORD", "description": ""},
+        {"name": "query_info", "type": "RECORD", "description": ""},
+    ]
+
+    # The documented columns the model can be clustered by are kept in order
+    assert model_cluster_by(
+        columns, ["project_id", "user_email", "query_info"]
+    ) == ["project_id", "user_email"]
+    # Excluded or renamed columns are left out
+    assert model_cluster_by(columns, ["reservation_id", "user_email"]) == [
+        "user_email"
+    ]
+    assert model_cluster_by(columns, []) == []
+
+    # The configured cluster_by replaces them, an empty list disables clustering
+    assert model_cluster_by(columns, ["project_id"], ["User_Email"]) == [
+        "user_email"
+    ]
+    assert model_cluster_by(columns, ["project_id"], []) == []
+
+    with pytest.raises(ValueError, match="labels"):
+        model_cluster_by(columns, [], ["project_id", "labels"])
+    with pytest.raises(ValueError, match="unknown"):
+        model_cluster_by(columns, [], ["unknown"])
+    with pytest.raises(ValueError, match="at most 4"):
+        model_cluster_by(columns, [], [column["name"] for column in columns[:4]] * 2)
+
+
+def test_generated_jobs_model_is_clustered_by_documented_columns(tmp_path):
+    with open(ROOT_DIR / "html_content_2.html", "r") as file:
+        schema = TableSchema.from_dict(extract_page_from_html(file.read()))
+    target = {"dir": "jobs", "url": "https://example.com/jobs"}
+
+    generate_target_files("jobs", target, schema, str(tmp_path))
+    sql = (tmp_path / "jobs/information_schema_jobs.sql").read_text()
+    assert sql.splitlines()[0].endswith('cluster_by=["project_id", "user_email"]) }}')
+
+    generate_target_files(
+        "jobs", {**target, "cluster_by": ["job_type"]}, schema, str(tmp_path)
+    )
+    sql = (tmp_path / "jobs/information_schema_jobs.sql").read_text()
+    assert sql.splitlines()[0].endswith('cluster_by=["job_type"]) }}')
+
+    with pytest.raises(ValueError, match="jobs: Invalid cluster_by"):
+        generate_target_files(
+            "jobs", {**target, "cluster_by": ["query_info"]}, schema, str(tmp_path)
+        )
+
+
 def test_update_column_list_with_field_mappings():
     # Test field mappings work correctly
     columns = [
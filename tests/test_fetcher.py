@@ -0,0 +1,141 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fetcher import (
+    TokenBucket,
+    create_session,
+    decode_body,
+    fetch_page,
+    fetch_pages,
+    parse_retry_after,
+)
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def test_fetch_pages_returns_fixture_content(doc_server):
+    urls = [
+        f"{doc_server.base_url}/html_content",
+        f"{doc_server.base_url}/html_content_2",
+    ]
+    result = fetch_pages(urls, jobs=2)
+    assert result[urls[0]]["html"] == (ROOT_DIR / "html_content.html").read_text()
+    assert result[urls[1]]["html"] == (ROOT_DIR / "html_content_2.html").read_text()
+
+
+def test_fetch_pages_fetches_duplicate_urls_once(doc_server):
+    url = f"{doc_server.base_url}/html_content"
+    result = fetch_pages([url, url, url], jobs=3)
+    assert list(result) == [url]
+    assert doc_server.requests_log == ["/html_content"]
+
+
+def test_fetch_pages_runs_concurrently(doc_server):
+    # The latency keeps each request in flight long enough to overlap the others
+    doc_server.latency = 0.3
+    for i in range(8):
+        doc_server.pages[f"/page_{i}"] = f"<html>{i}</html>"
+    urls = [f"{doc_server.base_url}/page_{i}" for i in range(8)]
+
+    result = fetch_pages(urls, jobs=8, host_rate=100, host_burst=8)
+
+    assert [result[url]["html"] for url in urls] == [
+        f"<html>{i}</html>" for i in range(8)
+    ]
+    assert doc_server.max_in_flight > 1
+
+
+def test_fetch_pages_respects_host_rate(doc_server):
+    # A burst of 2 then 10 requests per second: 6 pages need at least 0.4s
+    for i in range(6):
+        doc_server.pages[f"/page_{i}"] = f"<html>{i}</html>"
+    urls = [f"{doc_server.base_url}/page_{i}" for i in range(6)]
+
+    start = time.monotonic()
+    fetch_pages(urls, jobs=6, host_rate=10, host_burst=2)
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.35
+
+
+def test_fetch_page_retries_after_429(doc_server):
+    doc_server.statuses["/html_content"] = [429, 429]
+    doc_server.error_headers = {"Retry-After": "0"}
+    url = f"{doc_server.base_url}/html_content"
+
+    result = fetch_page(url, TokenBucket(100, 1))
+
+    assert result["html"] == (ROOT_DIR / "html_content.html").read_text()
+    assert result["retries"] == 2
+    assert doc_server.requests_log == ["/html_content"] * 3
+
+
+def test_fetch_page_retries_server_errors(doc_server):
+    doc_server.statuses["/html_content"] = [503]
+    url = f"{doc_server.base_url}/html_content"
+
+    result = fetch_page(url, session=create_session())
+
+    assert result["status_code"] == 200
+    assert result["retries"] == 1
+    assert doc_server.requests_log == ["/html_content"] * 2
+
+
+def test_fetch_page_records_compressed_transfer(doc_server):
+    doc_server.compress = True
+    url = f"{doc_server.base_url}/html_content"
+    expected = (ROOT_DIR / "html_content.html").read_text()
+
+    result = fetch_page(url, session=create_session())
+
+    assert result["html"] == expected
+    assert result["decoded_bytes"] == len(expected.encode("utf-8"))
+    assert result["wire_bytes"] < result["decoded_bytes"] / 3
+
+
+def test_fetch_pages_reuses_connections(doc_server):
+    session = create_session(pool_size=1)
+    urls = [
+        f"{doc_server.base_url}/html_content",
+        f"{doc_server.base_url}/html_content_2",
+    ]
+    fetch_pages(urls, jobs=1, session=session)
+    pools = session.get_adapter(urls[0]).poolmanager.pools
+    pool = pools[next(iter(pools.keys()))]
+    assert pool.num_connections == 1
+    assert pool.num_requests == 2
+
+
+def test_fetch_page_raises_on_http_error(doc_server):
+    with pytest.raises(requests.HTTPError):
+        fetch_page(f"{doc_server.base_url}/missing")
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) > 0
+    assert parse_retry_after("not a date") > 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_decode_body_uses_declared_charset():
+    content = "Caf\u00e9".encode("latin-1")
+    assert decode_body(content, "text/html; charset=ISO-8859-1") == (
+        "Caf\u00e9",
+        "iso-8859-1",
+    )
+
+    # Without a header charset, the <meta> declaration is used
+    content = '<meta charset="latin-1"><p>Caf\u00e9</p>'.encode("latin-1")
+    assert decode_body(content, "text/html")[1] == "latin-1"
+
+    # Without any declaration, UTF-8 is assumed instead of sniffing
+    content = "Caf\u00e9".encode("utf-8")
+    assert decode_body(content, "text/html") == ("Caf\u00e9", "utf-8")
@@ -0,0 +1,310 @@
+import gzip
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import documentation_parser
+from documentation_parser import extract_pages, generate_all, group_targets_by_url
+from http_cache import HttpCache
+from page_corpus import record_pages, replay_pages
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def test_group_targets_by_url():
+    targets = {
+        "jobs": {"dir": "jobs", "url": "https://example.com/jobs"},
+        "tables": {"dir": "tables", "url": "https://example.com/tables"},
+        "jobs_by_project": {
+            "dir": "jobs",
+            "url": "https://example.com/jobs",
+            "override_table_name": "JOBS_BY_PROJECT",
+        },
+    }
+    assert group_targets_by_url(targets) == {
+        "https://example.com/jobs": ["jobs", "jobs_by_project"],
+        "https://example.com/tables": ["tables"],
+    }
+
+
+def test_extract_pages_in_worker_processes():
+    html_by_url = {
+        "https://example.com/object_privileges": (
+            ROOT_DIR / "html_content.html"
+        ).read_text(),
+        "https://example.com/jobs": (ROOT_DIR / "html_content_2.html").read_text(),
+    }
+    serial = extract_pages(html_by_url, workers=1, backend="html.parser")
+    parallel = extract_pages(html_by_url, workers=2, backend="html.parser")
+
+    assert list(parallel) == list(html_by_url)
+    assert parallel == serial
+    assert parallel["https://example.com/jobs"]["table_name"] == "JOBS"
+
+
+def test_generate_all_fetches_shared_pages_once(doc_server, tmp_path, monkeypatch):
+    url = f"{doc_server.base_url}/html_content_2"
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        documentation_parser,
+        "pages_to_process",
+        {
+            "jobs": {"dir": "jobs", "url": url, "exclude_columns": ["query"]},
+            "jobs_by_project": {
+                "dir": "jobs",
+                "url": url,
+                "override_table_name": "JOBS_BY_PROJECT",
+            },
+        },
+    )
+
+    generate_all(jobs=2)
+
+    assert doc_server.requests_log == ["/html_content_2"]
+    jobs_sql = (tmp_path / "output/jobs/information_schema_jobs.sql").read_text()
+    by_project_sql = (
+        tmp_path / "output/jobs/information_schema_jobs_by_project.sql"
+    ).read_text()
+    assert "`INFORMATION_SCHEMA`.`JOBS`" in jobs_sql
+    assert "`INFORMATION_SCHEMA`.`JOBS_BY_PROJECT`" in by_project_sql
+
+    # Per-target settings only apply to their own target
+    assert "\nquery,\n" not in jobs_sql
+    assert "\nquery,\n" in by_project_sql
+
+
+def test_generate_all_replays_recorded_pages_offline(
+    doc_server, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        documentation_parser,
+        "pages_to_process",
+        {
+            "object_privileges": {
+                "dir": "access_control",
+                "url": f"{doc_server.base_url}/html_content",
+            },
+            "jobs": {"dir": "jobs", "url": f"{doc_server.base_url}/html_content_2"},
+        },
+    )
+    generate_all(record_dir="corpus")
+    recorded_sql = (
+        tmp_path / "output/jobs/information_schema_jobs.sql"
+    ).read_text()
+    assert (tmp_path / "corpus/jobs.html").read_text() == (
+        ROOT_DIR / "html_content_2.html"
+    ).read_text()
+
+    # Replaying does not send any request and renders the same files, also when
+    # the pages are parsed in worker processes
+    doc_server.requests_log.clear()
+    (tmp_path / "output/jobs/information_schema_jobs.sql").unlink()
+    generate_all(replay_dir="corpus", workers=2)
+
+    assert doc_server.requests_log == []
+    assert (
+        tmp_path / "output/jobs/information_schema_jobs.sql"
+    ).read_text() == recorded_sql
+
+
+def test_replay_pages_shares_pages_recorded_for_the_same_url(tmp_path):
+    url = "https://example.com/jobs"
+    record_pages(str(tmp_path), {url: ["jobs"]}, {url: {"html": "<html/>"}})
+
+    pages = replay_pages(str(tmp_path), {url: ["jobs", "jobs_by_project"]})
+    assert pages[url]["html"] == "<html/>"
+
+    # A page recorded for another URL is not used
+    with pytest.raises(FileNotFoundError):
+        replay_pages(str(tmp_path), {"https://example.com/moved": ["jobs"]})
+
+
+def test_generate_all_skips_unchanged_targets(
+    replay_corpus, tmp_path, monkeypatch, capsys
+):
+    targets = replay_corpus()
+    parsed_urls = []
+
+    def spy_extract_pages(html_by_url, *args):
+        parsed_urls.extend(html_by_url)
+        return extract_pages(html_by_url, *args)
+
+    monkeypatch.setattr(documentation_parser, "extract_pages", spy_extract_pages)
+    jobs_sql = tmp_path / "output/jobs/information_schema_jobs.sql"
+
+    generate_all(replay_dir="corpus")
+    assert "Rebuilt 2 targets from 2 pages, skipped 0" in capsys.readouterr().out
+    assert (tmp_path / "output/.parser_manifest.json").exists()
+
+    # Nothing changed: no page is parsed and no file is written
+    parsed_urls.clear()
+    generate_all(replay_dir="corpus")
+    assert "Rebuilt 0 targets from 0 pages, skipped 2" in capsys.readouterr().out
+    assert parsed_urls == []
+
+    # A changed configuration entry or a modified output rebuilds that target only
+    targets["jobs"] = {**targets["jobs"], "exclude_columns": ["query"]}
+    generate_all(replay_dir="corpus")
+    assert "Rebuilt: jobs\nSkipped: object_privileges" in capsys.readouterr().out
+    assert parsed_urls == ["https://example.com/jobs"]
+    assert "\nquery,\n" not in jobs_sql.read_text()
+
+    jobs_sql.write_text("edited")
+    generate_all(replay_dir="corpus")
+    assert "Rebuilt: jobs\n" in capsys.readouterr().out
+    assert jobs_sql.read_text() != "edited"
+
+    # --force rebuilds everything
+    generate_all(replay_dir="corpus", force=True)
+    assert "Rebuilt 2 targets from 2 pages, skipped 0" in capsys.readouterr().out
+
+
+def test_generate_all_prunes_removed_keys(replay_corpus, tmp_path):
+    url = "https://example.com/jobs"
+    targets = replay_corpus(
+        {
+            "jobs": {"dir": "jobs", "url": url},
+            "jobs_by_project": {
+                "dir": "jobs",
+                "url": url,
+                "override_table_name": "JOBS_BY_PROJECT",
+            },
+        }
+    )
+    generate_all(replay_dir="corpus")
+    jobs_sql = tmp_path / "output/jobs/information_schema_jobs.sql"
+    by_project_sql = tmp_path / "output/jobs/information_schema_jobs_by_project.sql"
+
+    # Without --prune the models of a removed key are kept
+    del targets["jobs_by_project"]
+    generate_all(replay_dir="corpus")
+    assert by_project_sql.exists()
+
+    os.utime(jobs_sql, (0, 0))
+    generate_all(replay_dir="corpus", prune=True)
+    assert not by_project_sql.exists()
+    assert not by_project_sql.with_suffix(".yml").exists()
+    assert jobs_sql.stat().st_mtime == 0
+    manifest = json.loads((tmp_path / "output/.parser_manifest.json").read_text())
+    assert list(manifest) == ["jobs"]
+
+    # Rebuilding identical content does not touch the files either
+    generate_all(replay_dir="corpus", force=True)
+    assert jobs_sql.stat().st_mtime == 0
+
+
+def test_generate_all_dumps_pages_only_on_request(replay_corpus, tmp_path):
+    url = "https://example.com/jobs"
+    replay_corpus(
+        {
+            "jobs": {"dir": "jobs", "url": url},
+            "jobs_by_project": {"dir": "jobs", "url": url},
+        }
+    )
+    html = (ROOT_DIR / "html_content_2.html").read_text()
+
+    # A default run writes no HTML besides the models and the extracted schemas
+    generate_all(replay_dir="corpus")
+    assert sorted(os.listdir(tmp_path)) == [".cache", "corpus", "output"]
+    assert os.listdir(tmp_path / ".cache") == ["schemas"]
+
+    generate_all(replay_dir="corpus", dump_dir="dump")
+    assert sorted(os.listdir(tmp_path / "dump")) == [
+        "jobs.html.gz",
+        "jobs_by_project.html.gz",
+    ]
+    with gzip.open(tmp_path / "dump/jobs_by_project.html.gz", "rt") as f:
+        assert f.read() == html
+
+
+def test_render_all_from_cached_schemas(
+    replay_corpus, tmp_path, monkeypatch, capsys
+):
+    targets = replay_corpus()
+    generate_all(replay_dir="corpus")
+    jobs_sql = tmp_path / "output/jobs/information_schema_jobs.sql"
+    generated_sql = jobs_sql.read_text()
+
+    # Rendering needs neither the pages nor the parser
+    shutil.rmtree(tmp_path / "corpus")
+    shutil.rmtree(tmp_path / "output")
+    monkeypatch.setattr(documentation_parser, "extract_page_from_html", None)
+    capsys.readouterr()
+    documentation_parser.render_all()
+
+    assert "Rendered 2 targets from .cache/schemas" in capsys.readouterr().out
+    assert jobs_sql.read_text() == generated_sql
+
+    # Settings are read from the current configuration
+    targets["jobs"]["exclude_columns"] = ["query"]
+    documentation_parser.render_all()
+    assert "\nquery,\n" not in jobs_sql.read_text()
+
+    targets["tables"] = {"dir": "tables", "url": "https://example.com/tables"}
+    documentation_parser.render_all()
+    assert "No cached schema for: tables." in capsys.readouterr().out
+
+
+def test_generate_all_reports_run_metrics(doc_server, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    url = f"{doc_server.base_url}/html_content_2"
+    monkeypatch.setattr(
+        documentation_parser,
+        "pages_to_process",
+        {
+            "jobs": {"dir": "jobs", "url": url, "exclude_columns": ["query"]},
+            "jobs_by_project": {"dir": "jobs", "url": url},
+        },
+    )
+    cache = HttpCache(str(tmp_path / "cache"))
+
+    metrics = generate_all(cache=cache, metrics_file="metrics/parser.prom")
+    assert metrics["pages"][url]["status_code"] == 200
+    assert metrics["cache"] == {"hit": 0, "revalidated": 0, "miss": 1}
+    assert metrics["pages_parsed"] == 1
+    assert metrics["columns"]["jobs"] == metrics["columns"]["jobs_by_project"] - 1
+    assert (metrics["files_written"], metrics["files_unchanged"]) == (4, 0)
+    assert "cache: 0 hits, 0 revalidated, 1 misses" in capsys.readouterr().out
+    prom = (tmp_path / "metrics/parser.prom").read_text()
+    assert 'bigquery_doc_parser_cache_requests{result="miss"} 1' in prom
+    assert 'bigquery_doc_parser_files{result="written"} 4' in prom
+
+    # The second run reads the page from the cache and skips both targets
+    metrics = generate_all(cache=cache, metrics_file="metrics/parser.prom")
+    assert metrics["cache"]["hit"] == 1
+    assert (metrics["targets_rebuilt"], metrics["targets_skipped"]) == (0, 2)
+    assert metrics["columns"] == {}
+    prom = (tmp_path / "metrics/parser.prom").read_text()
+    assert 'bigquery_doc_parser_cache_requests{result="hit"} 1' in prom
+
+    # Forced rebuilds render identical files, which are left unchanged
+    metrics = generate_all(cache=cache, force=True)
+    assert (metrics["files_written"], metrics["files_unchanged"]) == (0, 4)
+
+
+def test_generate_all_profiles_each_rebuilt_target(replay_corpus, tmp_path, capsys):
+    replay_corpus()
+
+    # Pages parsed in worker processes are profiled there
+    generate_all(replay_dir="corpus", workers=2, profile_dir="profiles", profile_top=5)
+
+    assert sorted(os.listdir("profiles")) == [
+        "jobs.collapsed",
+        "jobs.pstats",
+        "object_privileges.collapsed",
+        "object_privileges.pstats",
+    ]
+    collapsed = (tmp_path / "profiles/jobs.collapsed").read_text()
+    assert "(extract_page_from_html);" in collapsed
+    assert "(generate_target_files);" in collapsed
+    out = capsys.readouterr().out
+    assert "Top 5 functions by own time over 2 profiled targets" in out
+    assert "Profiles written to profiles" in out
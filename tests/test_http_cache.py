@@ -0,0 +1,131 @@
+import sys
+import threading
+from pathlib import Path
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fetcher import create_session, fetch_page, fetch_pages
+from http_cache import HttpCache
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def test_fresh_pages_are_served_from_cache(doc_server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    url = f"{doc_server.base_url}/html_content"
+
+    first = fetch_page(url, session=create_session(), cache=cache)
+    second = fetch_page(url, session=create_session(), cache=cache)
+
+    assert first["cache"] == "miss"
+    assert second["cache"] == "hit"
+    assert second["wire_bytes"] == 0
+    assert second["html"] == first["html"]
+    assert doc_server.requests_log == ["/html_content"]
+
+
+def test_stale_pages_are_revalidated(doc_server, tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=0)
+    url = f"{doc_server.base_url}/html_content"
+
+    fetch_page(url, session=create_session(), cache=cache)
+    revalidated = fetch_page(url, session=create_session(), cache=cache)
+
+    assert revalidated["cache"] == "revalidated"
+    assert revalidated["status_code"] == 304
+    assert revalidated["html"] == (ROOT_DIR / "html_content.html").read_text()
+    assert len(doc_server.requests_log) == 2
+
+    # A changed page is downloaded again and replaces the cached body
+    doc_server.pages["/html_content"] = "<html>changed</html>"
+    changed = fetch_page(url, session=create_session(), cache=cache)
+    assert changed["cache"] == "miss"
+    assert changed["html"] == "<html>changed</html>"
+    assert cache.lookup(url)["body"] == b"<html>changed</html>"
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store("https://example.com/a", b"<html>same</html>")
+    cache.store("https://example.com/b", b"<html>same</html>")
+
+    assert len(list((tmp_path / "objects").iterdir())) == 1
+    assert cache.lookup("https://example.com/a")["body"] == b"<html>same</html>"
+    assert cache.lookup("https://example.com/b")["body"] == b"<html>same</html>"
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=25)
+    cache.store("https://example.com/a", b"a" * 10)
+    cache.store("https://example.com/b", b"b" * 10)
+    cache.touch(cache.lookup("https://example.com/a"))
+    cache.store("https://example.com/c", b"c" * 10)
+
+    assert cache.lookup("https://example.com/a") is not None
+    assert cache.lookup("https://example.com/b") is None
+    assert cache.lookup("https://example.com/c") is not None
+    assert len(list((tmp_path / "objects").iterdir())) == 2
+
+
+def test_touch_keeps_a_page_stored_since_the_lookup(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    url = "https://example.com/a"
+    cache.store(url, b"old", etag='"old"')
+    entry = cache.lookup(url)
+
+    # Another run downloads a new version before the 304 of the old one lands
+    cache.store(url, b"new", etag='"new"')
+    cache.touch(entry, revalidated=True, etag='"old-2"')
+    assert cache.lookup(url)["body"] == b"new"
+    assert cache.lookup(url)["etag"] == '"new"'
+
+    # An entry evicted since the lookup is not written back
+    cache.max_bytes = 0
+    cache.store("https://example.com/b", b"b")
+    cache.touch(entry)
+    assert cache.lookup(url) is None
+
+
+def test_touch_stores_the_validators_of_a_304(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=0)
+    url = "https://example.com/a"
+    cache.store(url, b"page", etag='"v1"', last_modified="Mon, 01 Jan 2024")
+
+    cache.touch(cache.lookup(url), revalidated=True, etag='"v2"')
+    entry = cache.lookup(url)
+    assert (entry["etag"], entry["last_modified"]) == ('"v2"', "Mon, 01 Jan 2024")
+    assert cache.conditional_headers(entry)["If-None-Match"] == '"v2"'
+
+
+def test_cache_directory_is_shared_between_writers(tmp_path):
+    urls = [f"https://example.com/{i}" for i in range(20)]
+
+    def write_all():
+        cache = HttpCache(str(tmp_path))
+        for url in urls:
+            cache.store(url, url.encode("utf-8"))
+
+    threads = [threading.Thread(target=write_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cache = HttpCache(str(tmp_path))
+    assert all(cache.lookup(url)["body"] == url.encode("utf-8") for url in urls)
+
+
+def test_fetch_pages_with_warm_cache_sends_no_request(doc_server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    urls = [
+        f"{doc_server.base_url}/html_content",
+        f"{doc_server.base_url}/html_content_2",
+    ]
+    fetch_pages(urls, jobs=2, cache=cache)
+    doc_server.requests_log.clear()
+
+    pages = fetch_pages(urls, jobs=2, cache=cache)
+
+    assert [page["cache"] for page in pages.values()] == ["hit", "hit"]
+    assert doc_server.requests_log == []
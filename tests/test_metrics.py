@@ -0,0 +1,130 @@
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from metrics import (
+    collect_run_metrics,
+    format_metrics_summary,
+    format_prometheus,
+    write_prometheus_textfile,
+)
+
+
+def fetched_page(elapsed, status_code=200, cache="miss", retries=0):
+    return {
+        "html": "<html/>",
+        "status_code": status_code,
+        "wire_bytes": 1000,
+        "decoded_bytes": 4000,
+        "elapsed": elapsed,
+        "retries": retries,
+        "cache": cache,
+    }
+
+
+def run_metrics():
+    pages = {
+        "https://example.com/jobs": fetched_page(0.3, retries=2),
+        "https://example.com/tables": fetched_page(0.0, cache="hit"),
+        "https://example.com/views": fetched_page(1.5, 304, "revalidated"),
+    }
+    models = {
+        "jobs": {
+            "outputs": ["output/jobs/a.sql", "output/jobs/a.yml"],
+            "written": ["output/jobs/a.sql"],
+            "columns": 12,
+            "warnings": [],
+        },
+        "views": {
+            "outputs": ["output/views/b.sql", "output/views/b.yml"],
+            "written": [],
+            "columns": 5,
+            "warnings": ["Cannot partition by day: not a column of the model"],
+        },
+    }
+    return collect_run_metrics(
+        pages,
+        ["https://example.com/jobs", "https://example.com/views"],
+        models,
+        ["tables"],
+        2.0,
+    )
+
+
+def test_collect_run_metrics():
+    metrics = run_metrics()
+
+    assert metrics["status_codes"] == {200: 2, 304: 1}
+    assert metrics["cache"] == {"hit": 1, "revalidated": 1, "miss": 1}
+    assert metrics["latency_buckets"][0.1] == 1
+    assert metrics["latency_buckets"][0.5] == 2
+    assert metrics["latency_buckets"][2.5] == 3
+    assert (metrics["wire_bytes"], metrics["decoded_bytes"]) == (3000, 12000)
+    assert metrics["retries"] == 2
+    assert metrics["pages_parsed"] == 2
+    assert metrics["columns"] == {"jobs": 12, "views": 5}
+    assert (metrics["files_written"], metrics["files_unchanged"]) == (1, 3)
+    assert (metrics["targets_rebuilt"], metrics["targets_skipped"]) == (2, 1)
+    assert metrics["warnings"] == {
+        "views": ["Cannot partition by day: not a column of the model"]
+    }
+
+
+def test_format_metrics_summary():
+    summary = format_metrics_summary(run_metrics())
+
+    assert "pages: 3 (2 x 200, 1 x 304), 2 retries" in summary
+    assert "cache: 1 hits, 1 revalidated, 1 misses" in summary
+    assert "parsed: 2 pages, 17 columns in 2 rebuilt models, 1 skipped" in summary
+    assert "files: 1 written, 3 unchanged" in summary
+    assert (
+        "  warnings: 1\n"
+        "    views: Cannot partition by day: not a column of the model\n"
+    ) in summary
+    # Pages served from the cache without a request are not listed as slow
+    assert summary.endswith(
+        "slowest pages:\n"
+        "    1.50s https://example.com/views\n"
+        "    0.30s https://example.com/jobs"
+    )
+
+
+def test_format_prometheus():
+    prom = format_prometheus(run_metrics(), timestamp=1700000000)
+    lines = prom.splitlines()
+
+    assert "# TYPE bigquery_doc_parser_fetch_latency_seconds histogram" in lines
+    assert 'bigquery_doc_parser_fetch_latency_seconds_bucket{le="0.5"} 2' in lines
+    assert 'bigquery_doc_parser_fetch_latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "bigquery_doc_parser_fetch_latency_seconds_count 3" in lines
+    assert (
+        'bigquery_doc_parser_fetch_response_bytes{url="https://example.com/jobs",'
+        'encoding="wire"} 1000'
+    ) in lines
+    assert 'bigquery_doc_parser_fetch_responses{code="304"} 1' in lines
+    assert 'bigquery_doc_parser_model_columns{key="jobs"} 12' in lines
+    assert 'bigquery_doc_parser_model_warnings{key="views"} 1' in lines
+    assert "bigquery_doc_parser_last_run_timestamp_seconds 1700000000" in lines
+    # Every sample belongs to a declared metric
+    declared = {line.split()[2] for line in lines if line.startswith("# TYPE")}
+    for line in lines:
+        if not line.startswith("#"):
+            name = line.split("{")[0].split()[0]
+            assert name in declared or name.rsplit("_", 1)[0] in declared
+
+
+def test_format_prometheus_escapes_label_values():
+    metrics = run_metrics()
+    metrics["columns"] = {'odd"key\\': 1}
+
+    assert 'model_columns{key="odd\\"key\\\\"} 1' in format_prometheus(metrics)
+
+
+def test_write_prometheus_textfile(tmp_path):
+    path = tmp_path / "textfile/parser.prom"
+    write_prometheus_textfile(str(path), run_metrics())
+
+    assert path.read_text().startswith("# HELP bigquery_doc_parser_")
+    assert list(path.parent.iterdir()) == [path]
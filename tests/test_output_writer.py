@@ -0,0 +1,63 @@
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from output_writer import prune_generated_files, write_if_changed
+
+
+def test_write_if_changed_keeps_unchanged_files(tmp_path):
+    path = tmp_path / "jobs" / "information_schema_jobs.sql"
+
+    assert write_if_changed(str(path), "SELECT 1\n") is True
+    assert path.read_text() == "SELECT 1\n"
+
+    # Same content: the file is not rewritten and keeps its modification time
+    os.utime(path, (0, 0))
+    assert write_if_changed(str(path), "SELECT 1\n") is False
+    assert path.stat().st_mtime == 0
+
+    assert write_if_changed(str(path), "SELECT 2\n") is True
+    assert path.read_text() == "SELECT 2\n"
+    assert path.stat().st_mtime > 0
+    assert oct(path.stat().st_mode & 0o777) == "0o644"
+
+    # No temporary file is left next to the output
+    assert os.listdir(path.parent) == ["information_schema_jobs.sql"]
+
+
+def test_prune_generated_files(tmp_path):
+    for name in (
+        "jobs/information_schema_jobs.sql",
+        "jobs/information_schema_jobs.yml",
+        "jobs/information_schema_jobs_by_folder.sql",
+        "jobs/information_schema_jobs_by_folder.yml",
+        "removed/information_schema_removed.sql",
+        "removed/information_schema_removed.yml",
+        "jobs/README.md",
+    ):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text("")
+
+    removed = prune_generated_files(
+        str(tmp_path),
+        [
+            f"{tmp_path}/jobs/information_schema_jobs.sql",
+            f"{tmp_path}/jobs/information_schema_jobs.yml",
+        ],
+    )
+
+    assert [os.path.relpath(path, tmp_path) for path in removed] == [
+        "jobs/information_schema_jobs_by_folder.sql",
+        "jobs/information_schema_jobs_by_folder.yml",
+        "removed/information_schema_removed.sql",
+        "removed/information_schema_removed.yml",
+    ]
+    assert sorted(os.listdir(tmp_path / "jobs")) == [
+        "README.md",
+        "information_schema_jobs.sql",
+        "information_schema_jobs.yml",
+    ]
+    assert not (tmp_path / "removed").exists()
@@ -0,0 +1,163 @@
+import gc
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+from bs4 import NavigableString, Tag
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import documentation_parser
+from documentation_parser import (
+    HTML_PARSER_BACKENDS,
+    default_parser_backend,
+    extract_page,
+    extract_page_from_html,
+    extract_partitioning_key,
+    parse_columns,
+    parse_html,
+    parse_required_role,
+    parse_table_name,
+)
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def extract_with(html_content, backend):
+    soup = parse_html(html_content, backend)
+    return {
+        "table_name": parse_table_name(soup),
+        "required_role": parse_required_role(soup),
+        "partitioning": extract_partitioning_key(soup),
+        "columns": parse_columns(soup),
+        "page": extract_page(soup),
+    }
+
+
+@pytest.mark.parametrize("fixture", ["html_content.html", "html_content_2.html"])
+@pytest.mark.parametrize(
+    "backend", [b for b in HTML_PARSER_BACKENDS if b != "html.parser"]
+)
+def test_backends_extract_identical_output(fixture, backend):
+    if importlib.util.find_spec(backend) is None:
+        pytest.skip(f"{backend} is not installed")
+    with open(ROOT_DIR / fixture, "r") as file:
+        html_content = file.read()
+
+    assert extract_with(html_content, backend) == extract_with(
+        html_content, "html.parser"
+    )
+
+
+def test_default_parser_backend(monkeypatch):
+    monkeypatch.setenv("DOC_PARSER_BACKEND", "html5lib")
+    assert default_parser_backend() == "html5lib"
+
+    monkeypatch.setenv("DOC_PARSER_BACKEND", "unknown")
+    with pytest.raises(ValueError):
+        default_parser_backend()
+
+    monkeypatch.delenv("DOC_PARSER_BACKEND")
+    expected = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+    assert default_parser_backend() == expected
+
+
+@pytest.mark.parametrize("fixture", ["html_content.html", "html_content_2.html"])
+@pytest.mark.parametrize("backend", HTML_PARSER_BACKENDS)
+def test_scoped_parsing_matches_full_parsing(fixture, backend):
+    if backend != "html.parser" and importlib.util.find_spec(backend) is None:
+        pytest.skip(f"{backend} is not installed")
+    with open(ROOT_DIR / fixture, "r") as file:
+        html_content = file.read()
+
+    scoped_soup = parse_html(html_content, backend, scoped=True)
+    full_soup = parse_html(html_content, backend)
+
+    assert extract_page(scoped_soup) == extract_page(full_soup)
+    if backend != "html5lib":
+        assert len(scoped_soup.find_all(True)) < len(full_soup.find_all(True))
+
+
+def test_extract_page_from_html_falls_back_to_full_document():
+    # No article body: the whole document is parsed
+    html_content = """
+    <table>
+      <tr><th>Column name</th><th>Data type</th><th>Value</th></tr>
+      <tr><td>table_name</td><td>STRING</td><td>The name of the table</td></tr>
+    </table>
+    <table><tr><td><code>`region-REGION`.INFORMATION_SCHEMA.TABLES</code></td></tr></table>
+    """
+    page = extract_page_from_html(html_content, "html.parser")
+    assert page["table_name"] == "TABLES"
+    assert page["columns"] == [
+        {"name": "table_name", "type": "STRING", "description": "The name of the table"}
+    ]
+
+
+@pytest.mark.parametrize("backend", HTML_PARSER_BACKENDS)
+def test_extract_page_from_html_frees_the_tree(backend):
+    if backend != "html.parser" and importlib.util.find_spec(backend) is None:
+        pytest.skip(f"{backend} is not installed")
+    with open(ROOT_DIR / "html_content_2.html", "r") as file:
+        html_content = file.read()
+
+    gc.collect()
+    gc.disable()
+    gc.set_debug(gc.DEBUG_SAVEALL)
+    try:
+        page = extract_page_from_html(html_content, backend)
+        gc.collect()
+        elements = [
+            obj
+            for obj in gc.garbage
+            if isinstance(obj, (Tag, NavigableString)) and not obj.decomposed
+        ]
+    finally:
+        gc.set_debug(0)
+        gc.garbage.clear()
+        gc.enable()
+
+    # No live element is left for the garbage collector (html5lib keeps cycles to
+    # some emptied ones), and the page facts hold plain strings, not tree strings
+    assert elements == []
+    assert all(type(column["name"]) is str for column in page["columns"])
+    assert type(page["required_role"]) is str
+
+
+@pytest.mark.parametrize("failing", ["page_from_scan", "fallback_scan"])
+def test_extract_page_from_html_frees_the_tree_on_error(failing, monkeypatch):
+    torn_down = []
+    teardown_tree = documentation_parser.teardown_tree
+    scan_document = documentation_parser.scan_document
+
+    def recording_teardown(soup):
+        torn_down.append(soup)
+        teardown_tree(soup)
+
+    def failing_call(*args):
+        raise ValueError("broken page")
+
+    def failing_fallback_scan(soup):
+        # The scoped parse has no article body, the full document scan fails
+        if torn_down:
+            raise ValueError("broken page")
+        return scan_document(soup)
+
+    monkeypatch.setattr(documentation_parser, "teardown_tree", recording_teardown)
+    if failing == "page_from_scan":
+        monkeypatch.setattr(documentation_parser, "page_from_scan", failing_call)
+    else:
+        monkeypatch.setattr(
+            documentation_parser, "scan_document", failing_fallback_scan
+        )
+
+    with open(ROOT_DIR / "html_content_2.html", "r") as file:
+        html_content = file.read()
+    with pytest.raises(ValueError, match="broken page"):
+        extract_page_from_html(html_content.replace("devsite-article-body", "x"))
+
+    # Every parsed tree is torn down, the fallback one included
+    assert len(torn_down) == 2
+    assert all(soup.decomposed for soup in torn_down)
@@ -0,0 +1,114 @@
+import pstats
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from profiling import (
+    ProfileReport,
+    collapsed_stacks,
+    format_hotspot_table,
+    merge_profiles,
+    profile,
+)
+
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def leaf():
+    busy(0.002)
+
+
+def branch():
+    leaf()
+    busy(0.002)
+
+
+def root():
+    branch()
+    leaf()
+
+
+def test_profile_is_disabled_on_request():
+    with profile(False) as result:
+        root()
+    assert result["stats"] is None
+
+
+def test_collapsed_stacks_split_time_by_call_path():
+    with profile() as result:
+        root()
+    stats = merge_profiles([result["stats"]])
+    stacks = {
+        line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1])
+        for line in collapsed_stacks(stats)
+    }
+
+    labels = {
+        name: next(
+            stack.split(";")[-1]
+            for stack in stacks
+            if stack.endswith(f"({name})")
+        )
+        for name in ("root", "branch", "leaf")
+    }
+    root_path = labels["root"]
+    branch_path = f"{root_path};{labels['branch']}"
+    # leaf is called under root directly and under branch, busy under all three
+    assert any(stack.startswith(f"{branch_path};{labels['leaf']};") for stack in stacks)
+    assert any(stack.startswith(f"{root_path};{labels['leaf']};") for stack in stacks)
+    assert any(stack.startswith(f"{branch_path};") for stack in stacks)
+
+    # Every microsecond of the profile is in exactly one stack
+    assert abs(sum(stacks.values()) - stats.total_tt * 1e6) < len(stacks) + 1
+
+
+def test_merge_profiles_adds_the_calls():
+    profiles = []
+    for _ in range(2):
+        with profile() as result:
+            root()
+        profiles.append(result["stats"])
+
+    stats = merge_profiles(profiles + [None])
+    calls = {func[2]: value[1] for func, value in stats.stats.items()}
+    assert calls["root"] == 2
+    assert calls["leaf"] == 4
+    # The raw profiles are left untouched, so they can be merged again
+    assert merge_profiles(profiles).total_calls == stats.total_calls
+
+    table = format_hotspot_table(stats, top=3)
+    assert len(table) == 4
+    assert table[0].split() == ["own", "(s)", "cum", "(s)", "calls", "function"]
+
+
+def test_profile_report_writes_one_profile_per_key(tmp_path):
+    with profile() as shared:
+        branch()
+    with profile() as own:
+        leaf()
+
+    report = ProfileReport(str(tmp_path / "profiles"), top=5)
+    report.add("jobs", [shared["stats"], own["stats"]])
+    report.add("jobs_by_project", [shared["stats"], None])
+
+    for key in ("jobs", "jobs_by_project"):
+        stats = pstats.Stats(str(tmp_path / f"profiles/{key}.pstats"))
+        assert any(func[2] == "branch" for func in stats.stats)
+        collapsed = (tmp_path / f"profiles/{key}.collapsed").read_text()
+        assert "(branch)" in collapsed
+    assert report.key_times["jobs"] > report.key_times["jobs_by_project"]
+
+    hotspots = report.format_hotspots()
+    assert hotspots.startswith("Top 5 functions by own time over 2 profiled targets")
+    assert hotspots.index("s jobs\n") < hotspots.index("s jobs_by_project\n")
+
+
+def test_profile_report_without_profiles():
+    assert ProfileReport("unused").format_hotspots() == "No profiled target."
@@ -0,0 +1,126 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import documentation_parser
+from benchmark import time_call
+from config import pages_to_process
+from documentation_parser import (
+    extract_page_from_html,
+    generate_all,
+    group_targets_by_url,
+    update_column_list,
+)
+from page_corpus import record_pages
+from synthetic_pages import synthetic_columns, synthetic_page
+from tracing import memory_accounting
+
+# Sizes the extraction is timed at, as multiples of the base page
+SCALES = (1, 10, 100)
+
+# Allowed growth of the duration per 10x step: 10x when linear, 100x when quadratic
+MAX_GROWTH_PER_STEP = 30
+
+
+def page_shape(scale: int) -> dict:
+    return {
+        "columns": 20 * scale,
+        "structs": 2 * scale,
+        "struct_depth": 2,
+        "struct_fanout": 3,
+    }
+
+
+def best_time(function, repeat: int = 3) -> float:
+    return min(time_call(function, repeat))
+
+
+def assert_near_linear(durations: dict):
+    for small, large in zip(SCALES, SCALES[1:]):
+        growth = durations[large] / durations[small]
+        assert (
+            growth < MAX_GROWTH_PER_STEP
+        ), f"{small}x -> {large}x took {growth:.1f} times longer: {durations}"
+
+
+def test_synthetic_page_is_extracted_like_a_documentation_page():
+    shape = page_shape(1)
+    page = extract_page_from_html(synthetic_page(**shape, notes=3, padding=10))
+
+    assert page["table_name"] == "SYNTHETIC_VIEW"
+    assert page["scope"] == ["region", "project"]
+    assert "roles/bigquery.resourceViewer" in page["required_role"]
+    assert page["partitioning_key"] == "creation_time"
+    assert page["clustering_columns"] == ["project_id", "user_email"]
+    assert page["columns"] == synthetic_columns(**shape)
+    # 20 columns, then 2 structs of 3 fields holding 3 fields each
+    assert len(page["columns"]) == 20 + 2 * (3 + 3 * 3)
+
+
+@pytest.mark.benchmark
+def test_extraction_scales_linearly():
+    durations = {}
+    for scale in SCALES:
+        html_content = synthetic_page(
+            **page_shape(scale), notes=scale, padding=20 * scale
+        )
+        durations[scale] = best_time(
+            lambda: extract_page_from_html(html_content),
+            repeat=3 if scale < 100 else 1,
+        )
+    assert_near_linear(durations)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("nested_fields", [False, True])
+def test_update_column_list_scales_linearly(nested_fields):
+    # Grouping the fields of each struct by rescanning the columns would be
+    # quadratic in the number of structs
+    durations = {}
+    for scale in SCALES:
+        columns = synthetic_columns(**page_shape(scale))
+        exclude_columns = [column["name"] for column in columns[::7]]
+        durations[scale] = best_time(
+            lambda: update_column_list(columns, exclude_columns, None, nested_fields),
+            repeat=5,
+        )
+
+    columns = synthetic_columns(**page_shape(SCALES[-1]))
+    records = update_column_list(columns, [], None, nested_fields)[-2 * SCALES[-1] :]
+    assert [record["name"] for record in records[:2]] == ["struct_0", "struct_1"]
+    assert_near_linear(durations)
+
+
+def test_generate_all_memory_stays_flat_across_all_targets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(documentation_parser, "pages_to_process", pages_to_process)
+    targets_by_url = group_targets_by_url(pages_to_process)
+    record_pages(
+        "corpus",
+        targets_by_url,
+        {
+            url: {"html": synthetic_page(columns=10, view_name=keys[0].upper())}
+            for url, keys in targets_by_url.items()
+        },
+    )
+
+    with memory_accounting() as memory:
+        generate_all(replay_dir="corpus", workers=1)
+
+    # Each parsed tree is freed once its page is extracted: only the page facts,
+    # a small fraction of the tree, stay allocated
+    pages = memory["targets"]["extract_page"]
+    assert len(pages) == len(targets_by_url)
+    for url, page in pages.items():
+        assert page["retained_bytes"] < page["peak_bytes"] / 4, url
+    extract_pages = memory["stages"]["extract_pages"]
+    assert extract_pages["retained_bytes"] < 50_000 * len(pages)
+
+    # Rendering a model does not keep anything between targets
+    rendered = memory["targets"]["render"]
+    assert len(rendered) == len(pages_to_process)
+    assert sum(model["retained_bytes"] for model in rendered.values()) < 1_000_000
@@ -0,0 +1,53 @@
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from documentation_parser import extract_page_from_html
+from schema_model import Column, SchemaCache, TableSchema
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def test_table_schema_from_extracted_page():
+    page = extract_page_from_html((ROOT_DIR / "html_content_2.html").read_text())
+    schema = TableSchema.from_dict(page)
+
+    assert schema.table_name == "JOBS"
+    assert schema.partitioning_key == "creation_time"
+    assert schema.has_project_id_scope == page["has_project_id_scope"]
+    assert schema.columns[0] == Column.from_dict(page["columns"][0])
+    assert [column.to_dict() for column in schema.columns] == page["columns"]
+
+    # The round trips keep every fact
+    assert TableSchema.from_dict(schema.to_dict()) == schema
+    assert pickle.loads(pickle.dumps(schema)) == schema
+
+    # Slots keep the instances compact
+    with pytest.raises(AttributeError):
+        schema.columns[0].data_type = "STRING"
+
+
+def test_schema_cache(tmp_path):
+    schema = TableSchema(
+        "JOBS",
+        "roles/bigquery.resourceViewer",
+        ["region", "project"],
+        "creation_time",
+        ["project_id", "user_email"],
+        [Column("job_id", "STRING", "ID of the job")],
+    )
+    cache = SchemaCache(str(tmp_path))
+    assert cache.load("jobs", "https://example.com/jobs") is None
+
+    cache.store("jobs", "https://example.com/jobs", "abc", schema)
+    entry = cache.load("jobs", "https://example.com/jobs")
+    assert entry["schema"] == schema
+    assert entry["page_hash"] == "abc"
+
+    # An entry extracted from another URL is not used
+    assert cache.load("jobs", "https://example.com/moved") is None
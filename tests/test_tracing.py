@@ -0,0 +1,176 @@
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path so we can import the modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import documentation_parser
+import tracing
+from tracing import (
+    add_memory_report,
+    format_memory_report,
+    memory_accounting,
+    read_trace,
+    span,
+    start_trace,
+    stop_trace,
+)
+
+
+def test_span_is_a_no_op_without_trace():
+    assert not tracing.is_tracing()
+    with span("parse", backend="lxml") as args:
+        args["nodes"] = 3
+
+
+def test_spans_are_written_as_chrome_trace_events(tmp_path):
+    path = tmp_path / "trace.json"
+    start_trace(str(path))
+    try:
+        with span("render", "render", key="jobs") as args:
+            with span("generate_sql", "render"):
+                pass
+            args["written"] = True
+    finally:
+        stop_trace()
+
+    # One event per line after the opening bracket
+    lines = path.read_text().splitlines()
+    assert lines[0] == "["
+    assert all(line.endswith(",") for line in lines[1:])
+
+    metadata, generate_sql, render = read_trace(str(path))
+    assert metadata["ph"] == "M"
+    assert generate_sql["name"] == "generate_sql"
+    assert render["args"] == {"key": "jobs", "written": True}
+    assert render["ph"] == "X"
+    assert render["pid"] == os.getpid()
+    # The inner span lies within the outer one
+    assert render["ts"] <= generate_sql["ts"]
+    assert generate_sql["ts"] + generate_sql["dur"] <= render["ts"] + render["dur"]
+
+
+def test_main_traces_every_stage(doc_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        documentation_parser,
+        "pages_to_process",
+        {
+            "object_privileges": {
+                "dir": "access_control",
+                "url": f"{doc_server.base_url}/html_content",
+            },
+            "jobs": {"dir": "jobs", "url": f"{doc_server.base_url}/html_content_2"},
+        },
+    )
+
+    documentation_parser.main(
+        ["all", "--no-cache", "--workers", "2", "--trace", "trace.json"]
+    )
+
+    events = [event for event in read_trace("trace.json") if event["ph"] == "X"]
+    names = {event["name"] for event in events}
+    assert {
+        "all",
+        "fetch",
+        "decode",
+        "parse",
+        "scan",
+        "table_name",
+        "required_role",
+        "scope",
+        "partitioning_key",
+        "columns",
+        "update_column_list",
+        "generate_sql",
+        "generate_yml",
+        "write",
+        "render",
+    } <= names
+    rendered = [event["args"]["key"] for event in events if event["name"] == "render"]
+    assert sorted(rendered) == ["jobs", "object_privileges"]
+
+    # Pages are parsed in worker processes, whose spans are in the same trace
+    parse_pids = {event["pid"] for event in events if event["name"] == "parse"}
+    assert os.getpid() not in parse_pids
+    assert not tracing.is_tracing()
+
+
+def test_memory_accounting_records_peak_and_retained_bytes():
+    retained = []
+    with memory_accounting() as memory:
+        with span("render", key="jobs") as render_args:
+            with span("generate_yml") as yml_args:
+                temporary = bytearray(1_000_000)
+                del temporary
+            retained.append(bytearray(200_000))
+        with span("render", key="tables"):
+            pass
+    assert not tracing.is_accounting_memory()
+
+    # The peak of the inner span is also the peak of the outer one
+    assert 1_000_000 <= yml_args["peak_bytes"] < 1_100_000
+    assert yml_args["retained_bytes"] < 10_000
+    assert render_args["peak_bytes"] >= yml_args["peak_bytes"]
+    assert 200_000 <= render_args["retained_bytes"] < 300_000
+
+    assert memory["stages"]["render"]["calls"] == 2
+    assert memory["stages"]["render"]["peak_bytes"] == render_args["peak_bytes"]
+    assert memory["targets"]["render"]["jobs"] == {
+        "peak_bytes": render_args["peak_bytes"],
+        "retained_bytes": render_args["retained_bytes"],
+    }
+    assert list(memory["targets"]) == ["render"]
+
+    report = format_memory_report(memory)
+    assert report.splitlines()[2].endswith("  render")
+    assert "Largest render peaks:" in report
+
+
+def test_memory_accounting_adds_worker_reports():
+    worker = {
+        "stages": {"parse": {"calls": 1, "peak_bytes": 500, "retained_bytes": 20}},
+        "targets": {"extract_page": {"https://example.com/jobs": {}}},
+    }
+    add_memory_report(worker)
+
+    with memory_accounting() as memory:
+        add_memory_report(worker)
+        add_memory_report(worker)
+    assert memory["stages"]["parse"] == {
+        "calls": 2,
+        "peak_bytes": 500,
+        "retained_bytes": 40,
+    }
+    assert list(memory["targets"]["extract_page"]) == ["https://example.com/jobs"]
+
+    with memory_accounting(False) as memory:
+        with span("render", key="jobs"):
+            pass
+    assert memory == {"stages": {}, "targets": {}}
+
+
+def test_main_accounts_memory_in_worker_processes(
+    doc_server, tmp_path, monkeypatch, capsys
+):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        documentation_parser,
+        "pages_to_process",
+        {
+            "object_privileges": {
+                "dir": "access_control",
+                "url": f"{doc_server.base_url}/html_content",
+            },
+            "jobs": {"dir": "jobs", "url": f"{doc_server.base_url}/html_content_2"},
+        },
+    )
+
+    documentation_parser.main(["all", "--no-cache", "--workers", "2", "--memory"])
+
+    out = capsys.readouterr().out
+    report = out[out.index("Memory by stage:") :]
+    stages = {line.split()[-1] for line in report.splitlines()[2:]}
+    assert {"all", "extract_pages", "parse", "teardown", "render"} <= stages
+    assert f"{doc_server.base_url}/html_content_2" in report
@@ -0,0 +1,280 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import List
+
+# Open trace file, set by start_trace
+_trace_file = None
+_trace_lock = threading.Lock()
+
+# Spans of a worker process, sent back to the parent instead of being written
+_collected_events = None
+
+# Memory of the spans, set by memory_accounting
+_memory = None
+
+
+def _now_us() -> int:
+    # CLOCK_MONOTONIC is shared by all processes, so worker spans line up
+    return time.perf_counter_ns() // 1000
+
+
+def _write_events(events: List[dict]):
+    with _trace_lock:
+        for event in events:
+            _trace_file.write(json.dumps(event) + ",\n")
+        _trace_file.flush()
+
+
+def _record(event: dict):
+    if _collected_events is not None:
+        _collected_events.append(event)
+    elif _trace_file is not None:
+        _write_events([event])
+
+
+def start_trace(path: str, process_name: str = "documentation_parser"):
+    """
+    Start writing the spans to a trace file.
+
+    The file uses the Chrome trace event format, one event per line after an
+    opening "[", so it can be loaded as is in chrome://tracing or Perfetto, which
+    accept a missing closing bracket. Use read_trace to load it in Python.
+
+    Args:
+        path: Path of the trace file, overwritten
+        process_name: Name of the main process in the trace viewer
+    """
+    global _trace_file
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _trace_file = open(path, "w")
+    _trace_file.write("[\n")
+    _write_events([process_name_event(process_name)])
+
+
+def stop_trace():
+    global _trace_file
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+
+
+def is_tracing() -> bool:
+    return _trace_file is not None or _collected_events is not None
+
+
+def process_name_event(name: str, pid: int = None) -> dict:
+    return {
+        "name": "process_name",
+        "ph": "M",
+        "pid": pid or os.getpid(),
+        "tid": 0,
+        "args": {"name": name},
+    }
+
+
+@contextmanager
+def span(name: str, category: str = "generate", **args):
+    """
+    Record the duration of a block as a complete ("X") trace event.
+
+    Does nothing when no trace is started. The yielded dictionary holds the span
+    arguments, the block can add the results it wants to show in the viewer.
+
+    Args:
+        name: Name of the span, like "parse" or "generate_sql"
+        category: Category of the span, to filter the spans in the viewer
+        args: Arguments of the span, like the key or the URL
+    """
+    # The tracemalloc peak is shared by all threads, so memory is only accounted
+    # in the main thread, where the stages run one after the other
+    accounting = (
+        _memory is not None and threading.current_thread() is threading.main_thread()
+    )
+    if not is_tracing() and not accounting:
+        yield args
+        return
+
+    start = _now_us()
+    if accounting:
+        _enter_memory_span()
+    try:
+        yield args
+    finally:
+        if accounting:
+            _exit_memory_span(name, args)
+        if is_tracing():
+            _record(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": _now_us() - start,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+
+@contextmanager
+def collect_spans(enabled: bool = True):
+    """
+    Keep the spans of a block in a list instead of writing them, so a worker
+    process can return them to the parent, which passes them to write_spans.
+    """
+    global _collected_events
+    if not enabled:
+        yield []
+        return
+
+    _collected_events = events = [process_name_event("parse worker")]
+    try:
+        yield events
+    finally:
+        _collected_events = None
+
+
+def _enter_memory_span():
+    current, peak = tracemalloc.get_traced_memory()
+    stack = _memory["stack"]
+    if stack:
+        # Keep the peak of the enclosing span before resetting it for this one
+        stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+    tracemalloc.reset_peak()
+    stack.append({"start": current, "peak": current})
+
+
+def _exit_memory_span(name: str, args: dict):
+    current, peak = tracemalloc.get_traced_memory()
+    frame = _memory["stack"].pop()
+    peak = max(frame["peak"], peak)
+    if _memory["stack"]:
+        _memory["stack"][-1]["peak"] = max(_memory["stack"][-1]["peak"], peak)
+
+    # Bytes allocated above the level at the start of the span
+    args["peak_bytes"] = peak - frame["start"]
+    args["retained_bytes"] = current - frame["start"]
+    stage = _memory["stages"].setdefault(
+        name, {"calls": 0, "peak_bytes": 0, "retained_bytes": 0}
+    )
+    stage["calls"] += 1
+    stage["peak_bytes"] = max(stage["peak_bytes"], args["peak_bytes"])
+    stage["retained_bytes"] += args["retained_bytes"]
+    target = args.get("key") or args.get("url")
+    if target is not None:
+        _memory["targets"].setdefault(name, {})[target] = {
+            "peak_bytes": args["peak_bytes"],
+            "retained_bytes": args["retained_bytes"],
+        }
+
+
+@contextmanager
+def memory_accounting(enabled: bool = True):
+    """
+    Record with tracemalloc the memory of the spans of a block.
+
+    Each span gets 'peak_bytes' and 'retained_bytes' arguments: the most memory
+    allocated above its starting level, and what is still allocated at its end.
+    The yielded dictionary is filled after the block with the memory of each
+    span name under 'stages' ('calls', the largest 'peak_bytes' and the total
+    'retained_bytes'), and with the memory of each span of a key or a URL under
+    'targets', by span name then key or URL. Does nothing when disabled.
+    """
+    global _memory
+    report = {"stages": {}, "targets": {}}
+    if not enabled:
+        yield report
+        return
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _memory = {"stages": report["stages"], "targets": report["targets"], "stack": []}
+    try:
+        yield report
+    finally:
+        _memory = None
+        if started:
+            tracemalloc.stop()
+
+
+def is_accounting_memory() -> bool:
+    return _memory is not None
+
+
+def add_memory_report(report: dict):
+    """
+    Add the memory recorded in a worker process to the current memory_accounting
+    block, if any.
+    """
+    if _memory is None:
+        return
+    for name, worker_stage in report["stages"].items():
+        stage = _memory["stages"].setdefault(
+            name, {"calls": 0, "peak_bytes": 0, "retained_bytes": 0}
+        )
+        stage["calls"] += worker_stage["calls"]
+        stage["peak_bytes"] = max(stage["peak_bytes"], worker_stage["peak_bytes"])
+        stage["retained_bytes"] += worker_stage["retained_bytes"]
+    for name, targets in report["targets"].items():
+        _memory["targets"].setdefault(name, {}).update(targets)
+
+
+def format_memory_report(report: dict, top: int = 10) -> str:
+    """
+    Return the memory of each stage, then the targets with the largest peaks.
+    """
+    lines = [
+        "Memory by stage:",
+        f"  {'peak (KB)':>10} {'retained (KB)':>14} {'calls':>6}  stage",
+    ]
+    stages = sorted(
+        report["stages"].items(), key=lambda item: item[1]["peak_bytes"], reverse=True
+    )
+    lines += [
+        f"  {stage['peak_bytes'] / 1024:10.0f} "
+        f"{stage['retained_bytes'] / 1024:14.0f} {stage['calls']:6d}  {name}"
+        for name, stage in stages
+    ]
+    for name in ("extract_page", "render"):
+        targets = sorted(
+            report["targets"].get(name, {}).items(),
+            key=lambda item: item[1]["peak_bytes"],
+            reverse=True,
+        )[:top]
+        if targets:
+            lines.append(f"Largest {name} peaks:")
+            lines += [
+                f"  {memory['peak_bytes'] / 1024:10.0f} "
+                f"{memory['retained_bytes'] / 1024:14.0f}  {target}"
+                for target, memory in targets
+            ]
+    return "\n".join(lines)
+
+
+def write_spans(events: List[dict]):
+    """
+    Write spans collected in a worker process to the trace file, if any.
+    """
+    if _trace_file is not None and events:
+        _write_events(events)
+
+
+def read_trace(path: str) -> List[dict]:
+    """
+    Return the events of a trace file written by start_trace.
+    """
+    with open(path, "r") as f:
+        lines = f.read().splitlines()
+    return [
+        json.loads(line.rstrip(","))
+        for line in lines
+        if line.strip() not in ("", "[", "]")
+    ]